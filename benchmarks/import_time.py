@@ -0,0 +1,60 @@
+"""
+Costo de importar la app (arranque en frío), a partir de `python -X importtime`.
+
+    python -m benchmarks.import_time                   # total + módulos más pesados
+    python -m benchmarks.import_time --budget-ms 1500  # exit 1 si se pasa del presupuesto
+    python -m benchmarks.import_time --out import_time.json
+
+Se mide en un subproceso limpio (sin caché de módulos del proceso actual).
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+
+def measure(module: str = "main") -> list[tuple[str, int, int]]:
+    """Devuelve [(módulo, self_us, acumulado_us)] tal como los reporta -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-2000:])
+        raise SystemExit(f"No se pudo importar '{module}'")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="Falla si la importación supera este tiempo")
+    parser.add_argument("--out", help="Archivo JSON con el resultado")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cum for name, _, cum in rows if name == args.module) / 1000
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]
+
+    print(f"import {args.module}: {total_ms:.1f} ms")
+    for name, self_us, cum_us in heaviest:
+        print(f"  {self_us / 1000:8.1f} ms self  {cum_us / 1000:8.1f} ms acumulado  {name}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "module": args.module,
+                "total_ms": round(total_ms, 1),
+                "heaviest": [{"module": n, "self_ms": s / 1000, "cumulative_ms": c / 1000} for n, s, c in heaviest],
+            }, f, indent=2)
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"Se superó el presupuesto de {args.budget_ms} ms")
+        raise SystemExit(1)
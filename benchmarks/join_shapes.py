@@ -0,0 +1,126 @@
+"""
+Benchmark: formas del join servicio -> profesión en el listado.
+
+- $lookup con {"$toString"} en ambos lados (no usa índices)
+- $lookup localField/foreignField sobre _id
+- sin $lookup: profession_name/profession_active desnormalizados en el
+  servicio (utils/profession_sync.py), el pipeline actual
+
+Siembra una base aparte (BENCH_DB_NAME o <DB>_bench) con N servicios y M
+profesiones, con id_profession como ObjectId (estado posterior a
+`python -m utils.references`) y los campos desnormalizados ya llenos, y mide
+los tres pipelines de listado.
+
+    python -m benchmarks.join_shapes --services 100000 --professions 200 --repeat 3
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from bson import ObjectId
+
+from pipelines.service_offering_pipeline import list_services_pipeline
+from utils.mongodb import DB, get_mongo_client
+from utils.profession_sync import denormalized
+
+
+def legacy_list_services_pipeline() -> list:
+    """Forma anterior del join (compara como string, no puede usar índices)."""
+    return [
+        {"$match": {"active": True}},
+        {"$lookup": {
+            "from": "profession",
+            "let": {"pid": "$id_profession"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": [{"$toString": "$_id"}, {"$toString": "$$pid"}]}}},
+                {"$project": {"_id": 1, "name": 1, "active": 1}},
+            ],
+            "as": "profession",
+        }},
+        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
+        {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "profession_name": "$profession.name",
+                      "description": 1, "estimated_price": 1}},
+    ]
+
+
+def lookup_list_services_pipeline() -> list:
+    """Join por localField/foreignField (usa el índice de _id de profession)."""
+    return [
+        {"$match": {"active": True}},
+        {"$lookup": {
+            "from": "profession",
+            "localField": "id_profession",
+            "foreignField": "_id",
+            "as": "profession",
+        }},
+        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$_id"},
+            "id_profession": {"$toString": "$id_profession"},
+            "profession": {
+                "id": {"$toString": "$profession._id"},
+                "name": "$profession.name",
+                "active": "$profession.active",
+            },
+            "description": 1,
+            "estimated_price": 1,
+            "estimated_duration": 1,
+            "active": 1,
+        }},
+    ]
+
+
+def seed(db, n_services: int, n_professions: int, batch: int = 10_000) -> None:
+    db.profession.drop()
+    db.service_offering.drop()
+    professions = [{"_id": ObjectId(), "name": f"Profesión {i}", "active": True} for i in range(n_professions)]
+    db.profession.insert_many(professions)
+    owner = ObjectId()
+    for start in range(0, n_services, batch):
+        db.service_offering.insert_many([
+            {
+                "id_profession": (prof := random.choice(professions))["_id"],
+                **denormalized(prof),
+                "description": f"Servicio {i}",
+                "estimated_price": random.randint(50, 5000),
+                "estimated_duration": random.randint(15, 240),
+                "active": True,
+                "created_by": owner,
+            }
+            for i in range(start, min(start + batch, n_services))
+        ])
+
+
+def time_pipeline(coll, pipeline: list, repeat: int) -> dict:
+    runs = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in coll.aggregate(pipeline, allowDiskUse=True))
+        runs.append((time.perf_counter() - start) * 1000)
+    return {"docs": count, "median_ms": round(statistics.median(runs), 1), "min_ms": round(min(runs), 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", type=int, default=100_000)
+    parser.add_argument("--professions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-seed", action="store_true", help="Reusar los datos sembrados antes")
+    args = parser.parse_args()
+
+    db = get_mongo_client()[os.getenv("BENCH_DB_NAME") or f"{DB}_bench"]
+    if not args.no_seed:
+        print(f"Sembrando {args.services} servicios / {args.professions} profesiones en '{db.name}'...")
+        seed(db, args.services, args.professions)
+
+    # el listado real no ordena por nombre; se quita el $sort para medir solo el join
+    new_pipeline = [s for s in list_services_pipeline() if "$sort" not in s]
+    for label, pipeline in (("$toString join", legacy_list_services_pipeline()),
+                            ("localField/_id join", lookup_list_services_pipeline()),
+                            ("desnormalizado", new_pipeline)):
+        r = time_pipeline(db.service_offering, pipeline, args.repeat)
+        print(f"{label:<22} docs={r['docs']:>8} median={r['median_ms']:>10} ms  min={r['min_ms']:>10} ms")
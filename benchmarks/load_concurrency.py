@@ -0,0 +1,132 @@
+"""
+Prueba de carga: latencia bajo tráfico concurrente a /service_offering/ y /reservations/.
+
+Uso (con la API levantada en otra terminal: `uvicorn main:app --port 8000`):
+
+    python -m benchmarks.load_concurrency --base-url http://localhost:8000 \
+        --concurrency 50 --requests 2000 --label after --out bench_after.json
+
+Para comparar antes/después, correr el mismo comando con el servidor en el
+commit anterior (`--label before`) y en el actual (`--label after`); el
+script imprime p50/p95/p99 por endpoint y, si se pasa `--compare`, la
+diferencia contra otro archivo JSON de resultados.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = ["/service_offering/", "/reservations/"]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _summary(samples: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(samples) + errors,
+        "errors": errors,
+        "throughput_rps": round((len(samples) + errors) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(samples), 2) if samples else 0.0,
+        "p50_ms": round(_percentile(samples, 50), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "p99_ms": round(_percentile(samples, 99), 2),
+    }
+
+
+def _admin_token() -> str:
+    """Token de admin (GET /reservations/ requiere admin). Usa BENCH_TOKEN o lo firma con SECRET_KEY."""
+    token = os.getenv("BENCH_TOKEN")
+    if token:
+        return token
+    from utils.security import create_jwt_token
+    return create_jwt_token(
+        id="000000000000000000000000",
+        firstname="bench",
+        lastname="bench",
+        email="bench@example.com",
+        active=True,
+        admin=True,
+    )
+
+
+async def _run_endpoint(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> dict:
+    samples: list[float] = []
+    errors = 0
+    remaining = total
+    lock = asyncio.Lock()
+
+    async def worker():
+        nonlocal remaining, errors
+        while True:
+            async with lock:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            start = time.perf_counter()
+            try:
+                r = await client.get(path)
+                ok = r.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if ok:
+                samples.append(elapsed_ms)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(samples, errors, time.perf_counter() - start)
+
+
+async def main(args) -> dict:
+    headers = {"Authorization": f"Bearer {_admin_token()}"}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {"label": args.label, "concurrency": args.concurrency, "endpoints": {}}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=30) as client:
+        for path in ENDPOINTS:
+            await client.get(path)  # warm-up (conexión + primer acceso a Mongo)
+            results["endpoints"][path] = await _run_endpoint(client, path, args.requests, args.concurrency)
+    return results
+
+
+def _print(results: dict, baseline: dict | None) -> None:
+    print(f"[{results['label']}] concurrency={results['concurrency']}")
+    for path, r in results["endpoints"].items():
+        line = (f"  {path:<22} rps={r['throughput_rps']:>8} p50={r['p50_ms']:>8}ms "
+                f"p95={r['p95_ms']:>8}ms p99={r['p99_ms']:>8}ms errors={r['errors']}")
+        if baseline and path in baseline.get("endpoints", {}):
+            before = baseline["endpoints"][path]["p99_ms"]
+            line += f"  (p99 {baseline['label']}={before}ms)"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="Peticiones por endpoint")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--out", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una corrida previa para comparar el p99")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print(results, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,104 @@
+"""
+Benchmark: CPU por cada 1.000 documentos en los endpoints de lectura.
+
+Compara el camino anterior (BSON completo -> Model(**doc) -> validación de
+response_model en FastAPI -> jsonable_encoder + json) con el de
+utils/serialization.py (BSON proyectado -> Projection.build -> orjson). Los
+documentos se guardan como BSON para contar también el decode, que con la
+proyección recibe menos campos. No necesita Mongo.
+
+    python -m benchmarks.serialization --docs 5000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "bench")
+
+import bson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from models.page import Page
+from models.reservation import Reservation
+from models.review import Review
+from utils.references import from_db
+from utils.search import search_tokens
+from utils.serialization import Projection, fast_response
+
+OPINIONS = ["Muy buen servicio, puntual y limpio", "Regular", "Excelente trabajo, lo recomiendo", "Llegó tarde"]
+
+
+def reservation_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "id_user": ObjectId(),
+        "reservation_date": datetime(2030, 1, 1) + timedelta(minutes=15 * i),
+        "created_at": datetime.utcnow(),
+        "status": random.choice(["pending", "confirmed", "completed"]),
+        "notes": None if i % 3 else f"Nota {i}",
+    }
+
+
+def review_doc(i: int) -> dict:
+    opinion = random.choice(OPINIONS)
+    return {
+        "_id": ObjectId(),
+        "id_usuario": ObjectId(),
+        "id_service_offering": ObjectId(),
+        "opinion": opinion,
+        "rating": random.randint(0, 5),
+        # campos que guarda la base pero no expone la respuesta
+        "created_at": datetime.utcnow(),
+        "search_tokens": search_tokens(opinion),
+    }
+
+
+def legacy(raw: list[bytes], model, collection: str, field) -> bytes:
+    docs = [bson.decode(b) for b in raw]
+    items = [model(**{**from_db(collection, doc), "id": str(doc["_id"])}) for doc in docs]
+    content = asyncio.run(serialize_response(field=field, response_content={"items": items, "next": None}))
+    return JSONResponse(content).body
+
+
+def fast(raw: list[bytes], projection: Projection) -> bytes:
+    docs = [bson.decode(b) for b in raw]
+    return fast_response({"items": projection.build_many(docs), "next": None}).body
+
+
+def cpu_ms_per_1000(fn, n_docs: int, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        runs.append(time.process_time() - start)
+    return min(runs) / n_docs * 1000 * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'colección':<14}{'antes':>12}{'después':>12}{'mejora':>9}   (ms de CPU por 1.000 documentos)")
+    for model, collection, make in ((Reservation, "reservations", reservation_doc), (Review, "reviews", review_doc)):
+        projection = Projection(model, collection)
+        docs = [make(i) for i in range(args.docs)]
+        full = [bson.encode(doc) for doc in docs]
+        projected = [bson.encode({k: v for k, v in doc.items() if k == "_id" or k in projection.fields}) for doc in docs]
+        field = create_model_field(name=f"Response_{collection}", type_=Page[model], mode="serialization")
+
+        # ambos caminos producen el mismo JSON
+        assert json.loads(legacy(full[:50], model, collection, field)) == json.loads(fast(projected[:50], projection))
+
+        before = cpu_ms_per_1000(lambda: legacy(full, model, collection, field), args.docs, args.repeat)
+        after = cpu_ms_per_1000(lambda: fast(projected, projection), args.docs, args.repeat)
+        print(f"{collection:<14}{before:>12.2f}{after:>12.2f}{before / after:>8.1f}x")
@@ -0,0 +1,332 @@
+"""
+Suite de benchmarks reproducible: siembra una base MongoDB local con datos
+sintéticos (semilla fija) y mide la app real en proceso (httpx + ASGITransport,
+sin red ni uvicorn). Firebase Identity Toolkit se reemplaza por un stub en el
+cliente HTTP compartido, así /login solo mide la app y Mongo.
+
+Requiere un mongod local (p. ej. `docker run -p 27017:27017 mongo:7`):
+
+    python -m benchmarks.suite --users 2000 --professions 40 --services 5000 \
+        --reservations 20000 --reviews 20000 --requests 500 --concurrency 20 \
+        --label after --out bench_suite_after.json --compare bench_suite_before.json
+
+Escenarios (p50/p95/p99 y throughput por endpoint):
+  login, service listing, reservation CRUD (create/get/update/delete),
+  profession search y review creation.
+
+La base de datos (BENCH_DATABASE_NAME, default "bench_servicios") se BORRA y se
+vuelve a sembrar en cada corrida salvo que se pase --no-seed; por seguridad su
+nombre debe empezar con "bench". El JSON de salida tiene el mismo formato que
+benchmarks.load_concurrency, así que --compare funciona entre ambos.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+# Configuración antes de importar la app (utils.mongodb lee el entorno al importarse)
+os.environ["MONGO_URI"] = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "bench_servicios")
+os.environ.setdefault("MONGO_TLS", "0")
+os.environ.setdefault("MONGO_PROFILE", "development")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-at-least-32-bytes")
+os.environ.setdefault("FIREBASE_API_KEY", "bench")
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+import httpx
+from bson import ObjectId
+
+from benchmarks.load_concurrency import _print, _summary
+
+BENCH_PASSWORD = "Bench1234!"
+SEARCH_TERMS = ["plom", "elec", "carp", "jard", "pint", "mec", "cerr", "lim"]
+PROFESSION_NAMES = [
+    "Plomero", "Electricista", "Carpintero", "Jardinero", "Pintor", "Mecánico",
+    "Cerrajero", "Limpieza", "Albañil", "Fontanero", "Tapicero", "Soldador",
+]
+
+
+# ============================
+# Dataset sintético
+# ============================
+def _chunks(docs: list[dict], size: int = 1000):
+    for i in range(0, len(docs), size):
+        yield docs[i:i + size]
+
+
+def seed(args) -> dict:
+    """Borra y siembra la base de benchmark. Devuelve los ids necesarios para los escenarios."""
+    from utils.indexes import ensure_indexes
+    from utils.mongodb import DB, get_mongo_client
+    from utils.references import to_db
+    from utils.profession_sync import denormalized
+    from utils.search import search_tokens
+
+    if not DB.startswith("bench"):
+        raise SystemExit(f"La base '{DB}' no parece de benchmark (debe empezar con 'bench'); no se borra.")
+
+    rng = random.Random(args.seed)
+    client = get_mongo_client()
+    client.drop_database(DB)
+    db = client[DB]
+    now = datetime.utcnow()
+
+    users = [
+        {
+            "_id": ObjectId(),
+            "name": "Bench", "lastname": f"User{i}", "email": f"bench{i}@example.com",
+            "active": True, "admin": i == 0,
+        }
+        for i in range(args.users)
+    ]
+    professions = []
+    for i in range(args.professions):
+        name = f"{PROFESSION_NAMES[i % len(PROFESSION_NAMES)]} {i // len(PROFESSION_NAMES) + 1}"
+        # search_tokens como lo escribe create_profession: la búsqueda por prefijo usa ese campo
+        professions.append({"_id": ObjectId(), "name": name, "search_tokens": search_tokens(name), "active": rng.random() > 0.1})
+    services = []
+    for i in range(args.services):
+        prof = rng.choice(professions)
+        services.append(to_db("service_offering", {
+            "_id": ObjectId(),
+            "id_profession": str(prof["_id"]),
+            "created_by": str(rng.choice(users)["_id"]),
+            "description": f"Servicio sintético {i}",
+            "search_tokens": search_tokens(f"Servicio sintético {i}"),
+            "estimated_price": rng.randint(100, 5000),
+            "estimated_duration": rng.choice([30, 60, 90, 120]),
+            "active": rng.random() > 0.2,
+            # profession_name / profession_active como los copia create_service
+            **denormalized(prof),
+        }))
+    reservations = [
+        to_db("reservations", {
+            "id_user": str(rng.choice(users)["_id"]),
+            "reservation_date": now + timedelta(hours=rng.randint(-720, 720)),
+            "created_at": now,
+            "status": rng.choice(["pending", "confirmed", "cancelled", "completed"]),
+        })
+        for _ in range(args.reservations)
+    ]
+    reviews = [
+        to_db("reviews", {
+            "id_usuario": str(rng.choice(users)["_id"]),
+            "id_service_offering": str(rng.choice(services)["_id"]),
+            "opinion": "Reseña sintética",
+            "rating": rng.randint(0, 10) / 2,
+            "created_at": now,
+        })
+        for _ in range(args.reviews)
+    ]
+
+    for name, docs in [
+        ("users", users), ("profession", professions), ("service_offering", services),
+        ("reservations", reservations), ("reviews", reviews),
+    ]:
+        for chunk in _chunks(docs):
+            db[name].insert_many(chunk, ordered=False)
+
+    asyncio.run(ensure_indexes())
+    return {
+        "users": [str(u["_id"]) for u in users],
+        "emails": [u["email"] for u in users],
+        "services": [str(s["_id"]) for s in services if s["active"]],
+    }
+
+
+def load_ids(args) -> dict:
+    """Con --no-seed: lee de la base existente los ids que usan los escenarios."""
+    from utils.mongodb import get_collection
+
+    users = list(get_collection("users").find({}, {"email": 1}).limit(args.users))
+    services = get_collection("service_offering").find({"active": True}, {"_id": 1}).limit(args.services)
+    return {
+        "users": [str(u["_id"]) for u in users],
+        "emails": [u["email"] for u in users],
+        "services": [str(s["_id"]) for s in services],
+    }
+
+
+# ============================
+# Stub de Firebase
+# ============================
+def _firebase_stub(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("accounts:signInWithPassword"):
+        return httpx.Response(200, json={"idToken": "bench", "localId": "bench"})
+    return httpx.Response(404, json={"error": {"message": "NOT_FOUND"}})
+
+
+def install_firebase_stub() -> None:
+    from utils import http_client
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(_firebase_stub))
+
+
+# ============================
+# Escenarios
+# ============================
+class Recorder:
+    """Acumula latencias y errores (5xx o excepción) por endpoint."""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def call(self, name: str, request):
+        self.samples.setdefault(name, [])
+        self.errors.setdefault(name, 0)
+        start = time.perf_counter()
+        try:
+            r = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if r.status_code >= 500:
+            self.errors[name] += 1
+        else:
+            self.samples[name].append(elapsed_ms)
+        return r
+
+
+async def login(client, rec, rng, ids):
+    email = rng.choice(ids["emails"])
+    await rec.call("POST /login", client.post("/login", json={"email": email, "password": BENCH_PASSWORD}))
+
+
+async def service_listing(client, rec, rng, ids):
+    await rec.call("GET /service_offering/", client.get("/service_offering/"))
+
+
+async def reservation_crud(client, rec, rng, ids):
+    body = {
+        "id_user": rng.choice(ids["users"]),
+        "reservation_date": (datetime.utcnow() + timedelta(days=rng.randint(2, 60))).isoformat(),
+        "status": "pending",
+    }
+    r = await rec.call("POST /reservations/", client.post("/reservations/", json=body))
+    if r is None or r.status_code >= 400:
+        return
+    rid = r.json()["id"]
+    await rec.call("GET /reservations/{id}", client.get(f"/reservations/{rid}"))
+    await rec.call("PUT /reservations/{id}", client.put(f"/reservations/{rid}", json={**body, "status": "confirmed"}))
+    await rec.call("DELETE /reservations/{id}", client.delete(f"/reservations/{rid}"))
+
+
+async def profession_search(client, rec, rng, ids):
+    term = rng.choice(SEARCH_TERMS)
+    await rec.call("GET /profession/search/{term}", client.get(f"/profession/search/{term}"))
+
+
+async def review_creation(client, rec, rng, ids):
+    body = {
+        "id_usuario": rng.choice(ids["users"]),
+        "id_service_offering": rng.choice(ids["services"]),
+        "opinion": "Reseña del benchmark",
+        "rating": rng.randint(0, 10) / 2,
+    }
+    await rec.call("POST /reviews/", client.post("/reviews/", json=body))
+
+
+SCENARIOS = {
+    "login": login,
+    "service_listing": service_listing,
+    "reservation_crud": reservation_crud,
+    "profession_search": profession_search,
+    "review_creation": review_creation,
+}
+
+
+async def _run_scenario(scenario, client, ids, args, seed: int) -> dict:
+    rng = random.Random(seed)
+    warmup = Recorder()
+    for _ in range(min(args.warmup, args.requests)):
+        await scenario(client, warmup, rng, ids)
+
+    rec = Recorder()
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await scenario(client, rec, rng, ids)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    return {name: _summary(rec.samples[name], rec.errors[name], elapsed) for name in rec.samples}
+
+
+async def run(args, ids: dict) -> dict:
+    import main
+    from utils.security import create_jwt_token
+
+    token = create_jwt_token(
+        id=ids["users"][0], firstname="Bench", lastname="User0",
+        email=ids["emails"][0], active=True, admin=True,
+    )
+    results = {
+        "label": args.label,
+        "commit": _git_commit(),
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "seed": args.seed,
+        "dataset": {
+            "users": args.users, "professions": args.professions, "services": args.services,
+            "reservations": args.reservations, "reviews": args.reviews,
+        },
+        "endpoints": {},
+    }
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        install_firebase_stub()
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"}, timeout=60,
+        ) as client:
+            for i, name in enumerate(args.scenarios):
+                results["endpoints"].update(await _run_scenario(SCENARIOS[name], client, ids, args, args.seed + i))
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--professions", type=int, default=40)
+    parser.add_argument("--services", type=int, default=2000)
+    parser.add_argument("--reservations", type=int, default=10000)
+    parser.add_argument("--reviews", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del dataset y de los escenarios")
+    parser.add_argument("--no-seed", action="store_true", help="Reutilizar la base ya sembrada")
+    parser.add_argument("--requests", type=int, default=500, help="Iteraciones por escenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="Iteraciones descartadas por escenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--out", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una corrida previa para comparar el p99")
+    args = parser.parse_args()
+
+    ids = load_ids(args) if args.no_seed else seed(args)
+    results = asyncio.run(run(args, ids))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print(results, baseline)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
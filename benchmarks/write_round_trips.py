@@ -0,0 +1,136 @@
+"""
+Benchmark: round trips a MongoDB por operación de escritura.
+
+Registra un CommandListener del driver y cuenta los comandos que envía cada
+create/update/delete de profesiones y service offerings (llamando a los
+controladores, sin HTTP ni autenticación). Se reportan aparte los $inc de
+collection_versions (invalidación de ETags, utils/http_cache.py), que no
+dependen de la forma de la escritura.
+
+Requiere un mongod local (p. ej. `docker run -p 27017:27017 mongo:7`). Usa la
+base BENCH_DATABASE_NAME (default "bench_servicios"): crea sus propios
+documentos y los borra al terminar.
+
+    python -m benchmarks.write_round_trips --repeat 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import uuid
+from collections import Counter
+
+# Configuración antes de importar la app (utils.mongodb lee el entorno al importarse)
+os.environ["MONGO_URI"] = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "bench_servicios")
+os.environ.setdefault("MONGO_TLS", "0")
+os.environ.setdefault("MONGO_PROFILE", "development")
+
+from bson import ObjectId
+from pymongo import monitoring
+
+from utils.mongo_monitoring import CommandLatencyListener
+
+VERSIONS_COLLECTION = "collection_versions"
+
+
+class CommandCounter(monitoring.CommandListener):
+    """(comando, colección) de cada operación enviada al servidor."""
+
+    def __init__(self):
+        self.commands: list[tuple[str, str]] = []
+
+    def started(self, event):
+        if event.command_name in CommandLatencyListener.TRACKED:
+            self.commands.append((event.command_name, str(event.command.get(event.command_name, ""))))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Debe registrarse antes de que utils.mongodb cree el cliente
+counter = CommandCounter()
+monitoring.register(counter)
+
+from controllers import profession as profession_controller
+from controllers import service_offering as service_controller
+from controllers.profession_catalog import profession_catalog
+from models.profession import Profession
+from models.service_offering import ServiceOffering
+from utils.mongodb import DB, get_async_collection
+
+
+async def measure(op) -> tuple[int, int, Counter]:
+    """Ejecuta op() y devuelve (round trips de datos, bumps de ETag, detalle)."""
+    counter.commands.clear()
+    await op()
+    data = [c for c in counter.commands if c[1] != VERSIONS_COLLECTION]
+    return len(data), len(counter.commands) - len(data), Counter(f"{cmd} {coll}" for cmd, coll in data)
+
+
+async def run(repeat: int) -> dict:
+    owner = str(ObjectId())
+    created_professions: list[ObjectId] = []
+    created_services: list[ObjectId] = []
+    results: dict[str, list[tuple[int, int, Counter]]] = {}
+
+    async def record(name: str, op):
+        results.setdefault(name, []).append(await measure(op))
+
+    try:
+        for _ in range(repeat):
+            name = f"Bench {uuid.uuid4().hex[:8]}"
+            out = {}
+
+            async def create_profession():
+                out.update(await profession_controller.create_profession(Profession(name=name), None))
+
+            await record("profession.create", create_profession)
+            pid = out["id"]
+            created_professions.append(ObjectId(pid))
+            await record("profession.update", lambda: profession_controller.update_profession(
+                pid, Profession(name=f"{name} editada"), None))
+
+            # Catálogo caliente (estado normal): la recarga tras escribir profesiones no es parte del servicio
+            await profession_catalog.get(pid)
+            service = ServiceOffering(id_profession=pid, description=f"Servicio {name}", estimated_price=100, estimated_duration=60)
+
+            async def create_service():
+                out.update(await service_controller.create_service(service, actor_id=owner))
+
+            await record("service_offering.create", create_service)
+            sid = out["id"]
+            created_services.append(ObjectId(sid))
+            await record("service_offering.update", lambda: service_controller.update_service(
+                sid, service, actor_id=owner, is_admin=False))
+            await record("service_offering.delete", lambda: service_controller.delete_service(
+                sid, actor_id=owner, is_admin=False))
+            await record("profession.delete", lambda: profession_controller.delete_profession_safe(pid, None))
+    finally:
+        await get_async_collection("service_offering").delete_many({"_id": {"$in": created_services}})
+        await get_async_collection("profession").delete_many({"_id": {"$in": created_professions}})
+
+    return {
+        name: {
+            "round_trips": statistics.median(r[0] for r in runs),
+            "etag_bumps": statistics.median(r[1] for r in runs),
+            "commands": dict(runs[-1][2]),
+        }
+        for name, runs in results.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    if not DB.startswith("bench"):
+        parser.error(f"La base debe empezar con 'bench' (BENCH_DATABASE_NAME={DB})")
+
+    print(f"{'operación':<26}{'round trips':>12}{'+ ETag':>8}   comandos")
+    for name, row in asyncio.run(run(args.repeat)).items():
+        commands = ", ".join(f"{n}× {c}" for c, n in row["commands"].items())
+        print(f"{name:<26}{row['round_trips']:>12g}{row['etag_bumps']:>8g}   {commands}")
@@ -0,0 +1,227 @@
+# controllers/availability.py
+"""
+Disponibilidad de proveedores (dueño del service offering = created_by).
+
+El intervalo de una reservación sale de reservation_date y de sus
+reservation_service: los servicios se encadenan en orden de creación y cada
+uno ocupa estimated_duration * quantity minutos de su proveedor.
+
+Los intervalos se guardan discretizados en `reservation_slots`: un documento
+por bloque de SLOT_MINUTES ocupado, con índice único (provider, slot). Reservar
+es un insert de los bloques nuevos; si otro request ya tomó alguno, el índice
+único lo rechaza (DuplicateKeyError) sin necesidad de transacciones, se
+deshacen los bloques insertados y se responde 409. Las consultas de
+disponibilidad son un rango sobre ese mismo índice.
+
+Sin ese índice los choques pasarían sin error: main.py lo crea antes de
+arrancar y sync_reservation responde 503 (en vez de escribir) si no existe.
+
+Configuración por entorno:
+- SLOT_MINUTES: granularidad de los bloques (default 15)
+- AVAILABILITY_DAY_START / AVAILABILITY_DAY_END: jornada en UTC (default 08:00 / 18:00)
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from utils.indexes import SLOT_INDEX
+from utils.mongodb import lazy_collection
+from utils.query_profiler import run_find
+
+SLOT_MINUTES = int(os.getenv("SLOT_MINUTES", 15))
+DAY_START = time.fromisoformat(os.getenv("AVAILABILITY_DAY_START", "08:00"))
+DAY_END = time.fromisoformat(os.getenv("AVAILABILITY_DAY_END", "18:00"))
+
+# Estados que no ocupan al proveedor
+RELEASED_STATUSES = ("cancelled",)
+
+slots_coll = lazy_collection("reservation_slots")
+reservations_coll = lazy_collection("reservations")
+links_coll = lazy_collection("reservation_service")
+services_coll = lazy_collection("service_offering")
+
+_SLOT = timedelta(minutes=SLOT_MINUTES)
+_EPOCH = datetime(1970, 1, 1)
+
+_slot_index_ok = False  # se confirma una vez por proceso
+
+
+# ------------------------------
+# Helpers de tiempo (UTC naive, como los devuelve pymongo)
+# ------------------------------
+def _utc(dt: datetime) -> datetime:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def _floor(dt: datetime) -> datetime:
+    return dt - (dt - _EPOCH) % _SLOT
+
+def slots_between(start: datetime, end: datetime) -> list[datetime]:
+    """Bloques que toca el intervalo [start, end)."""
+    slot, end = _floor(_utc(start)), _utc(end)
+    out = []
+    while slot < end:
+        out.append(slot)
+        slot += _SLOT
+    return out
+
+
+# ------------------------------
+# Intervalos de una reservación
+# ------------------------------
+async def desired_slots(reservation: dict, links: list[dict], *, session=None) -> set[tuple[ObjectId, datetime]]:
+    """(proveedor, bloque) que debería ocupar la reservación con estos reservation_service."""
+    if not reservation or reservation.get("status") in RELEASED_STATUSES or not links:
+        return set()
+
+    service_ids = list({link["id_service_offering"] for link in links})
+    services = {
+        s["_id"]: s
+        for s in await services_coll.find(
+            {"_id": {"$in": service_ids}}, {"created_by": 1, "estimated_duration": 1}, session=session
+        ).to_list()
+    }
+
+    out = set()
+    start = _utc(reservation["reservation_date"])
+    for link in sorted(links, key=lambda l: l["_id"]):
+        service = services.get(link["id_service_offering"])
+        if not service or not service.get("created_by"):
+            continue
+        end = start + timedelta(minutes=int(service.get("estimated_duration", 0)) * int(link.get("quantity", 1)))
+        out.update((service["created_by"], slot) for slot in slots_between(start, end))
+        start = end
+    return out
+
+
+async def _require_slot_index() -> None:
+    """503 si reservation_slots no tiene el índice único (provider, slot)."""
+    global _slot_index_ok
+    if _slot_index_ok:
+        return
+    # Sin sesión: listIndexes no se permite dentro de una transacción
+    spec = (await slots_coll.index_information()).get(SLOT_INDEX)
+    _slot_index_ok = bool(spec and spec.get("unique"))
+    if not _slot_index_ok:
+        raise HTTPException(status_code=503, detail="No se pueden verificar choques de horario; intenta más tarde")
+
+
+async def sync_reservation(
+    reservation_id: ObjectId, *,
+    reservation: Optional[dict] = None,
+    links: Optional[list[dict]] = None,
+    session=None,
+) -> None:
+    """
+    Ajusta los bloques de la reservación al estado indicado (por defecto el
+    guardado). Se llama ANTES de escribir el cambio con el estado que tendrá
+    después: primero se toman los bloques nuevos (409 si alguno está ocupado)
+    y solo entonces se liberan los que sobran.
+    Dentro de una transacción (session) el rollback de un choque lo hace el abort.
+    """
+    if reservation is None:
+        reservation = await reservations_coll.find_one(
+            {"_id": reservation_id}, {"reservation_date": 1, "status": 1}, session=session
+        )
+    if links is None:
+        links = await links_coll.find({"id_reservation": reservation_id}, session=session).to_list()
+
+    desired = await desired_slots(reservation, links, session=session)
+    current = {
+        (doc["provider"], doc["slot"])
+        for doc in await slots_coll.find(
+            {"id_reservation": reservation_id}, {"provider": 1, "slot": 1}, session=session
+        ).to_list()
+    }
+
+    to_add = [
+        {"_id": ObjectId(), "provider": provider, "slot": slot, "id_reservation": reservation_id}
+        for provider, slot in sorted(desired - current)
+    ]
+    if to_add:
+        await _require_slot_index()
+        try:
+            await slots_coll.insert_many(to_add, ordered=True, session=session)
+        except (DuplicateKeyError, BulkWriteError):
+            if session is None:
+                await slots_coll.delete_many({"_id": {"$in": [doc["_id"] for doc in to_add]}})
+            raise HTTPException(status_code=409, detail="El proveedor ya tiene una reservación en ese horario")
+
+    to_remove = current - desired
+    if to_remove:
+        await slots_coll.delete_many({
+            "id_reservation": reservation_id,
+            "$or": [{"provider": provider, "slot": slot} for provider, slot in to_remove],
+        }, session=session)
+
+
+async def release_reservation(reservation_id: ObjectId) -> None:
+    await slots_coll.delete_many({"id_reservation": reservation_id})
+
+
+# ------------------------------
+# Consultas de disponibilidad
+# ------------------------------
+def _merge(slots: list[datetime]) -> list[dict]:
+    """Bloques ordenados -> intervalos ocupados contiguos."""
+    intervals: list[dict] = []
+    for slot in slots:
+        if intervals and intervals[-1]["end"] == slot:
+            intervals[-1]["end"] = slot + _SLOT
+        else:
+            intervals.append({"start": slot, "end": slot + _SLOT})
+    return intervals
+
+
+async def availability(service_id: str, day: date, days: int) -> dict:
+    try:
+        sid = ObjectId(service_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="ID de servicio inválido")
+
+    service = await services_coll.find_one({"_id": sid}, {"created_by": 1, "estimated_duration": 1, "active": 1})
+    if not service or not service.get("active", True):
+        raise HTTPException(status_code=404, detail="Servicio no encontrado o inactivo")
+
+    provider = service["created_by"]
+    duration = timedelta(minutes=int(service.get("estimated_duration", SLOT_MINUTES)))
+    range_start = datetime.combine(day, time.min)
+    range_end = range_start + timedelta(days=days)
+
+    busy = [
+        doc["slot"]
+        for doc in await run_find(
+            slots_coll, {"provider": provider, "slot": {"$gte": range_start, "$lt": range_end}},
+            {"_id": 0, "slot": 1}, name="availability.busy_slots", sort=[("slot", 1)],
+        )
+    ]
+    busy_set = set(busy)
+    needed = len(slots_between(range_start, range_start + duration))
+    now = datetime.utcnow()
+
+    out_days = []
+    for i in range(days):
+        current = day + timedelta(days=i)
+        open_at = datetime.combine(current, DAY_START)
+        close_at = datetime.combine(current, DAY_END)
+        free = []
+        start = open_at
+        while start + duration <= close_at:
+            if start >= now and all(start + k * _SLOT not in busy_set for k in range(needed)):
+                free.append(start)
+            start += _SLOT
+        out_days.append({"date": current.isoformat(), "free_starts": free})
+
+    return {
+        "service_id": service_id,
+        "provider_id": str(provider),
+        "slot_minutes": SLOT_MINUTES,
+        "duration_minutes": int(duration.total_seconds() // 60),
+        "busy": _merge(busy),
+        "days": out_days,
+    }
@@ -2,8 +2,11 @@
 from fastapi import HTTPException, Request
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
 
-from utils.mongodb import get_collection
+from utils.mongodb import lazy_collection
+from utils.query_profiler import run_aggregate
+from utils.pagination import PageParams, make_page
 from models.profession import Profession
 
 # === Pipelines (los que enviaste) ===
@@ -15,9 +18,16 @@ from pipelines.profession_pipelines import (
 from pipelines.profession_type_pipelines import (
     validate_profession_is_assigned_pipeline,
 )
+from utils.indexes import PROFESSION_NAME_COLLATION
+from controllers.profession_catalog import profession_catalog
+from utils.http_cache import bump_version
+from utils.cache import get_cache
+from utils.search import search_tokens
+from utils import profession_sync
 
-coll = get_collection("profession")
-services_coll = get_collection("service_offering")  # opcional para conteos directos
+coll = lazy_collection("profession")
+coll_listing = lazy_collection("profession", listing=True)  # lecturas de listados (secondaryPreferred)
+services_coll = lazy_collection("service_offering")  # opcional para conteos directos
 
 
 # ------------------------------
@@ -29,6 +39,15 @@ def _to_oid(id_str: str) -> ObjectId:
     except Exception:
         raise HTTPException(status_code=400, detail="ID inválido")
 
+async def _invalidate():
+    # Caché compartida (tag "profession": catálogo, listados, búsquedas) + ETags
+    await profession_catalog.invalidate()
+    await bump_version("profession")
+
+def _source(listing: bool):
+    # Cargas de la caché: el secundario solo si no hubo escrituras desde la última (utils/cache.py)
+    return coll_listing if listing else coll
+
 def _serialize(doc: dict) -> dict:
     if not doc:
         return doc
@@ -45,29 +64,39 @@ async def create_profession(prof: Profession, request: Request):
     if getattr(prof, "description", None):
         prof.description = prof.description.strip()
 
-    if coll.find_one({"name": {"$regex": f"^{prof.name}$", "$options": "i"}}):
+    # Igualdad con colación case-insensitive: usa el índice name_ci
+    if await coll.find_one({"name": prof.name}, projection={"_id": 1}, collation=PROFESSION_NAME_COLLATION):
         raise HTTPException(status_code=400, detail="La profesión ya existe")
 
     payload = prof.model_dump(exclude={"id"})
+    payload["search_tokens"] = search_tokens(prof.name)
     payload.setdefault("active", True)
     payload.setdefault("created_at", datetime.utcnow())
     payload["updated_at"] = datetime.utcnow()
 
-    res = coll.insert_one(payload)
-    created = coll.find_one({"_id": res.inserted_id})
-    return _serialize(created)
+    await coll.insert_one(payload)  # asigna payload["_id"]
+    await _invalidate()
+    # Lo insertado es exactamente lo guardado: no hace falta volver a leerlo
+    return _serialize(payload)
 
 
 # ---------- READ LIST (via pipeline) ----------
-async def get_all_professions(include_inactive: bool, request: Request):
+async def get_all_professions(include_inactive: bool, page: PageParams, request: Request):
+
+    async def load(listing: bool):
+        pipeline = get_all_professions_pipeline(
+            limit=page.limit + 1, include_inactive=include_inactive, after=page.after
+        )
+        docs, next_cursor = make_page(await run_aggregate(_source(listing), pipeline, name="get_all_professions_pipeline"), page, id_field="id")
+        return {"items": docs, "next": next_cursor}
 
-    pipeline = get_all_professions_pipeline(skip=0, limit=10_000, include_inactive=include_inactive)
-    return list(coll.aggregate(pipeline))
+    key = f"profession:list:{include_inactive}:{page.after}:{page.limit}"
+    return await get_cache().get_or_load_listing(key, load, tags=("profession",))
 
 
 # ---------- READ ONE ----------
 async def get_profession_by_id(id: str, request: Request):
-    doc = coll.find_one({"_id": _to_oid(id)})
+    doc = await coll.find_one({"_id": _to_oid(id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Profesión no encontrada")
     return _serialize(doc)
@@ -76,27 +105,33 @@ async def get_profession_by_id(id: str, request: Request):
 # ---------- UPDATE ----------
 async def update_profession(id: str, prof: Profession, request: Request):
     oid = _to_oid(id)
-    current = coll.find_one({"_id": oid})
-    if not current:
-        raise HTTPException(status_code=404, detail="Profesión no encontrada")
 
     # Normalizar + validar duplicados
     prof.name = prof.name.strip()
     if getattr(prof, "description", None):
         prof.description = prof.description.strip()
 
-    dup = coll.find_one({
-        "name": {"$regex": f"^{prof.name}$", "$options": "i"},
-        "_id": {"$ne": oid}
-    })
+    dup = await coll.find_one(
+        {"name": prof.name, "_id": {"$ne": oid}},
+        projection={"_id": 1},
+        collation=PROFESSION_NAME_COLLATION,
+    )
     if dup:
         raise HTTPException(status_code=400, detail="Ya existe otra profesión con ese nombre")
 
     payload = prof.model_dump(exclude={"id"})
+    payload["search_tokens"] = search_tokens(prof.name)
     payload["updated_at"] = datetime.utcnow()
 
-    coll.update_one({"_id": oid}, {"$set": payload})
-    updated = coll.find_one({"_id": oid})
+    # Escribe y devuelve el documento actualizado en un solo comando (None si no existe)
+    updated = await coll.find_one_and_update(
+        {"_id": oid}, {"$set": payload}, return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Profesión no encontrada")
+    await _invalidate()
+    # Nombre/estado copiados en sus servicios: se propagan en segundo plano
+    await profession_sync.enqueue(updated)
     return _serialize(updated)
 
 
@@ -104,22 +139,25 @@ async def update_profession(id: str, prof: Profession, request: Request):
 async def delete_profession_safe(id: str, request: Request):
 
     oid = _to_oid(id)
-    existing = coll.find_one({"_id": oid})
+
+    # Soft delete: active=False (None si no existe)
+    existing = await coll.find_one_and_update(
+        {"_id": oid},
+        {"$set": {"active": False, "updated_at": datetime.utcnow()}},
+        projection={"name": 1, "active": 1},
+        return_document=ReturnDocument.AFTER,
+    )
     if not existing:
         raise HTTPException(status_code=404, detail="Profesión no encontrada")
+    await _invalidate()
+    await profession_sync.enqueue(existing)  # profession_active=False en sus servicios
 
     # Conteo de servicios asociados vía pipeline (el que enviaste)
-    validation = list(coll.aggregate(validate_profession_is_assigned_pipeline(id)))
+    validation = await run_aggregate(coll, validate_profession_is_assigned_pipeline(id), name="validate_profession_is_assigned_pipeline")
     linked = 0
     if validation:
         linked = int(validation[0].get("number_of_services", 0))
 
-    # Soft delete: active=False
-    coll.update_one(
-        {"_id": oid},
-        {"$set": {"active": False, "updated_at": datetime.utcnow()}}
-    )
-
     return {
         "status": "deactivated",
         "message": "La profesión se desactivó correctamente (no se elimina físicamente).",
@@ -131,21 +169,39 @@ async def delete_profession_safe(id: str, request: Request):
 # ---------- PIPELINE ENDPOINTS AUX ----------
 async def professions_with_service_count(request: Request):
  
-    return list(coll.aggregate(get_profession_with_service_count_pipeline()))
+    return await get_cache().get_or_load_listing(
+        "profession:with_service_count",
+        lambda listing: run_aggregate(_source(listing), get_profession_with_service_count_pipeline(), name="get_profession_with_service_count_pipeline"),
+        tags=("profession", "service_offering"),
+    )
 
 async def search_professions(q: str, skip: int, limit: int, request: Request):
 
-    return list(coll.aggregate(search_professions_pipeline(q, skip, limit)))
+    return await get_cache().get_or_load_listing(
+        f"profession:search:{q}:{skip}:{limit}",
+        lambda listing: run_aggregate(_source(listing), search_professions_pipeline(q, skip, limit), name="search_professions_pipeline"),
+        tags=("profession",),
+    )
 
 async def validate_profession_is_assigned(id: str, request: Request):
 
-    result = list(coll.aggregate(validate_profession_is_assigned_pipeline(id)))
+    result = await run_aggregate(coll, validate_profession_is_assigned_pipeline(id), name="validate_profession_is_assigned_pipeline")
     if not result:
         raise HTTPException(status_code=404, detail="Profesión no encontrada")
     # El pipeline ya proyecta con id/name/active/number_of_services
     return result[0]
 
 
+async def sync_status(request: Request):
+    """Propagación del nombre/estado a service_offering: jobs pendientes y lag."""
+    return await profession_sync.status()
+
+
+async def catalog_stats(request: Request):
+    """Contadores de la caché del catálogo (hits/misses/recargas) y de la caché compartida."""
+    return {**profession_catalog.stats(), "shared": get_cache().stats()}
+
+
 # ---- Alias para compatibilidad (si algún router antiguo lo importa) ----
-async def get_professions(include_inactive: bool, request: Request):
-    return await get_all_professions(include_inactive, request)
+async def get_professions(include_inactive: bool, page: PageParams, request: Request):
+    return await get_all_professions(include_inactive, page, request)
@@ -0,0 +1,168 @@
+# controllers/profession_catalog.py
+"""
+Caché en memoria del catálogo de profesiones (id -> documento).
+
+La colección es pequeña y cambia poco, pero se lee en cada create/update de
+servicios, en cada listado de servicios y en /public/professions. Se carga
+completa con un solo find() y se renueva al vencer el TTL
+(PROFESSION_CACHE_TTL, segundos) o cuando cambia la versión del tag
+"profession" en la caché compartida (utils/cache.py). create/update/delete de
+profesiones llaman a invalidate(), que sube esa versión para todos los workers;
+el worker que recarga primero deja el catálogo en la caché compartida y el
+resto lo toma de ahí sin ir a Mongo.
+
+La versión del tag (un round trip con Redis) se consulta como mucho cada
+PROFESSION_VERSION_CHECK segundos (default 2); entre consultas se responde
+desde memoria. El worker que escribe se invalida al instante; los demás ven el
+cambio en a lo sumo ese intervalo.
+
+Como cada worker puede servir una copia algo vieja, las respuestas que salen
+del catálogo (/public/professions) no usan el ETag de collection_versions sino
+fingerprint: un hash del contenido cargado. ETag y cuerpo cambian juntos.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Optional
+
+import bson
+from bson import ObjectId
+
+from utils.cache import get_cache
+from utils.mongodb import get_async_collection
+from utils.pagination import PageParams, make_page
+from utils.query_profiler import run_find
+
+
+CATALOG_KEY = "profession:catalog"
+CATALOG_TAG = "profession"
+
+
+class ProfessionCatalog:
+    def __init__(self, ttl_seconds: float, check_seconds: float = 2.0):
+        self.ttl = ttl_seconds
+        self.check_interval = check_seconds
+        self._by_id: dict[ObjectId, dict] = {}
+        self._loaded_at: float | None = None
+        self._version: int | None = None  # versión del tag "profession" de la carga actual
+        self._checked_at: float | None = None  # última consulta de la versión del tag
+        self._fingerprint: str | None = None  # hash de _by_id; None = recalcular
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _fresh(self, version: int) -> bool:
+        return (
+            self._loaded_at is not None
+            and version == self._version
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def _recently_checked(self) -> bool:
+        """Cargado, dentro del TTL y con la versión consultada hace menos de check_interval."""
+        now = time.monotonic()
+        return (
+            self._loaded_at is not None
+            and self._checked_at is not None
+            and now - self._loaded_at < self.ttl
+            and now - self._checked_at < self.check_interval
+        )
+
+    async def _load(self, listing: bool) -> list[dict]:
+        coll = get_async_collection("profession", listing=listing)
+        return await run_find(coll, {}, name="profession_catalog.reload", sort=[("_id", 1)])
+
+    async def _ensure_loaded(self) -> None:
+        if self._recently_checked():
+            self.hits += 1
+            return
+        cache = get_cache()
+        version = await cache.tag_version(CATALOG_TAG)
+        if self._fresh(version):
+            self._checked_at = time.monotonic()
+            self.hits += 1
+            return
+        self.misses += 1
+        async with self._lock:
+            version = await cache.tag_version(CATALOG_TAG)
+            if self._fresh(version):  # otra corrutina ya recargó mientras esperábamos
+                return
+            # Vencimiento por TTL: puede leer de un secundario. Tras una escritura
+            # (cambió la versión) se lee del primario para no cachear datos sin replicar.
+            listing = self._version == version
+            docs = await cache.get_or_load(
+                CATALOG_KEY, lambda: self._load(listing), ttl=int(self.ttl), tags=(CATALOG_TAG,)
+            )
+            self._by_id = {doc["_id"]: doc for doc in docs}
+            self._fingerprint = None
+            self._loaded_at = self._checked_at = time.monotonic()
+            self._version = version
+            self.reloads += 1
+
+    async def get(self, id) -> Optional[dict]:
+        """Profesión por id (ObjectId o hex). None si no existe."""
+        try:
+            oid = id if isinstance(id, ObjectId) else ObjectId(id)
+        except Exception:
+            return None
+        await self._ensure_loaded()
+        doc = self._by_id.get(oid)
+        if doc is None:
+            # Puede haberse creado en otro worker después de la última carga
+            doc = await get_async_collection("profession").find_one({"_id": oid})
+            if doc is not None:
+                self.misses += 1
+                self._by_id[oid] = doc
+                self._fingerprint = None
+        return doc
+
+    async def all(self) -> list[dict]:
+        """Todas las profesiones (activas e inactivas), ordenadas por _id."""
+        await self._ensure_loaded()
+        return sorted(self._by_id.values(), key=lambda d: d["_id"])
+
+    async def page(self, page: PageParams, predicate=None) -> tuple[list, Optional[str]]:
+        """Paginación por cursor sobre el catálogo en memoria (mismo contrato que paginate_find)."""
+        docs = [
+            d for d in await self.all()
+            if (page.after is None or d["_id"] > page.after) and (predicate is None or predicate(d))
+        ]
+        return make_page(docs[:page.limit + 1], page)
+
+    async def by_id(self) -> dict[ObjectId, dict]:
+        """Mapa id -> profesión (una sola verificación de versión para muchas búsquedas)."""
+        await self._ensure_loaded()
+        return self._by_id
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash del contenido en memoria (igual en todos los workers con los mismos datos)."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for _id in sorted(self._by_id):
+                digest.update(bson.encode(self._by_id[_id]))
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    async def invalidate(self) -> None:
+        self._loaded_at = None
+        await get_cache().invalidate_tags(CATALOG_TAG)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._by_id),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+profession_catalog = ProfessionCatalog(
+    ttl_seconds=float(os.getenv("PROFESSION_CACHE_TTL", 60)),
+    check_seconds=float(os.getenv("PROFESSION_VERSION_CHECK", 2)),
+)
@@ -1,68 +1,101 @@
+import asyncio
 import os
 from datetime import datetime
 from bson import ObjectId
 from bson.errors import InvalidId
 from fastapi import HTTPException
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 
 from models.reservation import Reservation
-from utils.mongodb import get_collection
+from models.reservation_service import ReservationService
+from models.bulk import ReservationWithServices
+from utils.mongodb import get_async_mongo_client, lazy_collection
+from utils.bulk import BulkReport, bulk_write_reported, check_size, insert_reported
+from utils.pagination import PageParams, paginate_find
+from utils.streaming import ndjson_lines
+from utils.references import from_db, to_db
+from utils.serialization import Projection
+from utils.ownership import FORBIDDEN_DETAIL, actor_oid, check_owner, miss_error, owned_by
+from utils.loaders import exists, existing
+from controllers.availability import release_reservation, sync_reservation
 
 URI = os.getenv("URI")
-collection = get_collection("reservations")
-users_collection = get_collection("users")
+collection = lazy_collection("reservations")
+links_collection = lazy_collection("reservation_service")
+# Lecturas: solo los campos de Reservation, sin re-validar (utils/serialization.py)
+projection = Projection(Reservation, "reservations")
 
-async def create_reservation(reservation: Reservation) -> Reservation:
+OTHER_USER_DETAIL = "No puedes crear reservaciones a nombre de otro usuario"
+
+async def create_reservation(reservation: Reservation, *, actor_id: str, is_admin: bool) -> Reservation:
     try:
         user_id = ObjectId(reservation.id_user)
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID de usuario inválido")
+    # Solo a nombre propio (un admin puede crear para cualquiera)
+    check_owner(user_id, None if is_admin else actor_oid(actor_id), OTHER_USER_DETAIL)
 
-    user_exists = users_collection.find_one({"_id": user_id})
-    if not user_exists:
+    if not await exists("users", user_id):
         raise HTTPException(status_code=404, detail="El usuario referenciado no existe")
 
-    reservation_dict = reservation.model_dump(exclude={"id"})
-    result = collection.insert_one(reservation_dict)
+    reservation_dict = to_db("reservations", reservation.model_dump(exclude={"id"}))
+    result = await collection.insert_one(reservation_dict)
     reservation.id = str(result.inserted_id)
     return reservation
 
-async def get_all_reservations() -> list[Reservation]:
-    docs = collection.find()
-    return [Reservation(**{**doc, "id": str(doc["_id"])}) for doc in docs]
+async def get_all_reservations(page: PageParams) -> dict:
+    docs, next_cursor = await paginate_find(collection, {}, page, projection.fields)
+    return {"items": projection.build_many(docs), "next": next_cursor}
+
+def export_reservations(batch_size: int):
+    """Todas las reservaciones como NDJSON, sin materializar modelos en memoria."""
+    return ndjson_lines(collection, batch_size=batch_size)
 
-async def get_reservation_by_id(id: str) -> Reservation:
+async def get_reservation_by_id(id: str) -> dict:
     try:
         obj_id = ObjectId(id)
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    doc = collection.find_one({"_id": obj_id})
+    doc = await collection.find_one({"_id": obj_id}, projection.fields)
     if not doc:
         raise HTTPException(status_code=404, detail="Reservación no encontrada")
-    return Reservation(**{**doc, "id": str(doc["_id"])})
+    return projection.build(doc)
 
-async def update_reservation(id: str, reservation: Reservation) -> Reservation:
+def _check_owner_change(changes: dict, actor) -> None:
+    # Un usuario no puede pasarle su reservación a otro
+    check_owner(changes.get("id_user", actor), actor, "No puedes asignar la reservación a otro usuario")
+
+async def update_reservation(id: str, reservation: Reservation, *, actor_id: str, is_admin: bool) -> Reservation:
     try:
         obj_id = ObjectId(id)
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    existing = collection.find_one({"_id": obj_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Reservación no encontrada")
+    # Solo el dueño (id_user) o un admin; el dueño va en el filtro (utils/ownership.py)
+    actor = None if is_admin else actor_oid(actor_id)
+    current = await collection.find_one(owned_by(obj_id, "id_user", actor))
+    if not current:
+        raise await miss_error(collection, obj_id, not_found="Reservación no encontrada")
 
     hours_before = int(os.getenv("HOURS_BEFORE_UPDATE", 2))
-    time_diff = (existing["reservation_date"] - datetime.utcnow()).total_seconds() / 3600
+    time_diff = (current["reservation_date"] - datetime.utcnow()).total_seconds() / 3600
     if time_diff < hours_before:
         raise HTTPException(status_code=400, detail=f"Solo se puede modificar con al menos {hours_before} horas de anticipación")
 
-    updated_doc = collection.find_one_and_update(
-        {"_id": obj_id},
-        {"$set": reservation.model_dump(exclude={"id", "created_at"}, exclude_unset=True)},
+    changes = to_db("reservations", reservation.model_dump(exclude={"id", "created_at"}, exclude_unset=True))
+    _check_owner_change(changes, actor)
+    # Nuevo horario/estado: ocupa los bloques del proveedor antes de guardar (409 si chocan)
+    await sync_reservation(obj_id, reservation={**current, **changes})
+    updated_doc = await collection.find_one_and_update(
+        owned_by(obj_id, "id_user", actor),
+        {"$set": changes},
         return_document=ReturnDocument.AFTER
     )
-    return Reservation(**{**updated_doc, "id": str(updated_doc["_id"])})
+    if updated_doc is None:  # se eliminó o cambió de dueño mientras tanto
+        await sync_reservation(obj_id)  # vuelve los bloques al estado guardado
+        raise await miss_error(collection, obj_id, not_found="Reservación no encontrada")
+    return Reservation(**{**from_db("reservations", updated_doc), "id": str(updated_doc["_id"])})
 
 async def delete_reservation(id: str):
     try:
@@ -70,9 +103,141 @@ async def delete_reservation(id: str):
     except InvalidId:
         raise HTTPException(status_code=400, detail="ID inválido")
 
-    result = collection.delete_one({"_id": obj_id})
+    result = await collection.delete_one({"_id": obj_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Reservación no encontrada")
+    await release_reservation(obj_id)
     return {"message": "Reservación eliminada correctamente"}
 
 
+# ------------------------------
+# Lotes
+# ------------------------------
+async def create_reservations_bulk(items: list[Reservation], ordered: bool, *, actor_id: str, is_admin: bool) -> dict:
+    check_size(items)
+    report = BulkReport(len(items), ordered)
+    actor = None if is_admin else actor_oid(actor_id)
+
+    user_ids = {}
+    for i, item in enumerate(items):
+        if not ObjectId.is_valid(item.id_user):
+            report.fail(i, 400, "ID de usuario inválido")
+        elif actor is not None and ObjectId(item.id_user) != actor:
+            report.fail(i, 403, OTHER_USER_DETAIL)
+        else:
+            user_ids[i] = ObjectId(item.id_user)
+
+    # Una sola consulta para validar todos los usuarios del lote
+    found_users = await existing("users", user_ids.values())
+    pending = []
+    for i, user_id in user_ids.items():
+        if user_id not in found_users:
+            report.fail(i, 404, "El usuario referenciado no existe")
+            continue
+        doc = to_db("reservations", items[i].model_dump(exclude={"id"}))
+        doc["_id"] = ObjectId()
+        pending.append((i, doc))
+
+    await insert_reported(collection, pending, report)
+    return report.result()
+
+
+async def update_reservations_bulk(items: list[Reservation], ordered: bool, *, actor_id: str, is_admin: bool) -> dict:
+    check_size(items)
+    report = BulkReport(len(items), ordered)
+    actor = None if is_admin else actor_oid(actor_id)
+
+    ids = {}
+    for i, item in enumerate(items):
+        if item.id and ObjectId.is_valid(item.id):
+            ids[i] = ObjectId(item.id)
+        else:
+            report.fail(i, 400, "ID inválido")
+
+    stored = {doc["_id"]: doc for doc in await collection.find({"_id": {"$in": list(ids.values())}}).to_list()}
+    hours_before = int(os.getenv("HOURS_BEFORE_UPDATE", 2))
+    now = datetime.utcnow()
+
+    pending = []
+    for i, obj_id in ids.items():
+        first = report.first_failure()
+        if ordered and first is not None and first < i:
+            break
+        current = stored.get(obj_id)
+        if not current:
+            report.fail(i, 404, "Reservación no encontrada")
+            continue
+        if actor is not None and current.get("id_user") != actor:
+            report.fail(i, 403, FORBIDDEN_DETAIL)
+            continue
+        if (current["reservation_date"] - now).total_seconds() / 3600 < hours_before:
+            report.fail(i, 400, f"Solo se puede modificar con al menos {hours_before} horas de anticipación")
+            continue
+        changes = to_db("reservations", items[i].model_dump(exclude={"id", "created_at"}, exclude_unset=True))
+        try:
+            _check_owner_change(changes, actor)
+            await sync_reservation(obj_id, reservation={**current, **changes})
+        except HTTPException as e:
+            report.fail(i, e.status_code, e.detail)
+            continue
+        # el dueño también en el filtro: la escritura nunca toca una reservación ajena
+        pending.append((i, obj_id, UpdateOne(owned_by(obj_id, "id_user", actor), {"$set": changes})))
+
+    not_written = await bulk_write_reported(collection, pending, report)
+    for i, obj_id, _ in pending:
+        if i in not_written:
+            await sync_reservation(obj_id)  # vuelve los bloques al estado guardado
+    return report.result()
+
+
+# ------------------------------
+# Reservación + servicios (una transacción)
+# ------------------------------
+async def create_reservation_with_services(data: ReservationWithServices, *, actor_id: str, is_admin: bool) -> dict:
+    reservation = data.reservation
+    if not ObjectId.is_valid(reservation.id_user):
+        raise HTTPException(status_code=400, detail="ID de usuario inválido")
+    check_owner(ObjectId(reservation.id_user), None if is_admin else actor_oid(actor_id), OTHER_USER_DETAIL)
+    invalid = [line.id_service_offering for line in data.services if not ObjectId.is_valid(line.id_service_offering)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"IDs de servicio inválidos: {invalid}")
+
+    # Usuario y servicios en paralelo: una consulta por colección
+    service_ids = list({ObjectId(line.id_service_offering) for line in data.services})
+    user_found, found = await asyncio.gather(
+        exists("users", ObjectId(reservation.id_user)),
+        existing("service_offering", service_ids),
+    )
+    if not user_found:
+        raise HTTPException(status_code=404, detail="El usuario referenciado no existe")
+    missing = [str(sid) for sid in service_ids if sid not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Servicios no encontrados: {missing}")
+
+    reservation_doc = to_db("reservations", reservation.model_dump(exclude={"id"}))
+    reservation_doc["_id"] = reservation_id = ObjectId()
+    links = []
+    for line in data.services:
+        link = to_db("reservation_service", {"id_reservation": str(reservation_id), **line.model_dump()})
+        link["_id"] = ObjectId()  # en orden: define el encadenamiento de los servicios
+        link["created_at"] = datetime.utcnow()
+        links.append(link)
+
+    async def write(session):
+        await collection.insert_one(reservation_doc, session=session)
+        if links:
+            await links_collection.insert_many(links, session=session)
+        await sync_reservation(reservation_id, reservation=reservation_doc, links=links, session=session)
+
+    # Todo o nada: reservación, vínculos y bloques del proveedor
+    async with get_async_mongo_client().start_session() as session:
+        await session.with_transaction(write)
+
+    reservation.id = str(reservation_id)
+    return {
+        "reservation": reservation,
+        "services": [
+            ReservationService(**{**from_db("reservation_service", dict(link)), "id": str(link["_id"])})
+            for link in links
+        ],
+    }
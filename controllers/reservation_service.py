@@ -1,56 +1,251 @@
 from fastapi import HTTPException
 from models.reservation_service import ReservationService
-from utils.mongodb import get_collection
+from utils.mongodb import lazy_collection
+from utils.pagination import PageParams, paginate_find
+from utils.references import from_db, to_db
+from controllers.availability import sync_reservation
+from utils.bulk import BulkReport, bulk_write_reported, check_size, insert_reported
+from utils.loaders import exists, existing
+from utils.ownership import actor_oid, check_owner
 from bson import ObjectId
+from pymongo import UpdateOne
 from datetime import datetime
+import asyncio
 import os
 
-coll = get_collection("reservation_service")
+coll = lazy_collection("reservation_service")
+reservations = lazy_collection("reservations")
 
-async def create_reservation_service(data: ReservationService) -> ReservationService:
+# Un vínculo es del dueño de su reservación (id_user): solo él o un admin lo crea o modifica
+LINK_FORBIDDEN_DETAIL = "No puedes vincular servicios a reservaciones de otro usuario"
+
+async def _links(reservation_id) -> list[dict]:
+    return await coll.find({"id_reservation": reservation_id}).to_list()
+
+async def _reservation_owners(rids) -> dict[ObjectId, ObjectId]:
+    """id de reservación -> id_user, en una consulta. Las que no existen no aparecen."""
+    docs = await reservations.find({"_id": {"$in": list(rids)}}, {"id_user": 1}).to_list()
+    return {doc["_id"]: doc.get("id_user") for doc in docs}
+
+async def create_reservation_service(data: ReservationService, *, actor_id: str, is_admin: bool) -> ReservationService:
     try:
-        new_data = data.model_dump(exclude={"id"})
-        result = coll.insert_one(new_data)
-        data.id = str(result.inserted_id)
+        actor = None if is_admin else actor_oid(actor_id)
+        new_data = to_db("reservation_service", data.model_dump(exclude={"id"}))
+        new_data["_id"] = ObjectId()
+        rid = new_data["id_reservation"]
+        if not (isinstance(rid, ObjectId) and isinstance(new_data["id_service_offering"], ObjectId)):
+            raise HTTPException(status_code=400, detail="id_reservation e id_service_offering deben ser ObjectId válidos")
+        # Referencias en paralelo (una consulta por colección)
+        owners, service_found = await asyncio.gather(
+            _reservation_owners([rid]), exists("service_offering", new_data["id_service_offering"])
+        )
+        if rid not in owners:
+            raise HTTPException(status_code=404, detail="La reservación no existe")
+        check_owner(owners[rid], actor, LINK_FORBIDDEN_DETAIL)
+        if not service_found:
+            raise HTTPException(status_code=404, detail="El servicio no existe")
+        # Ocupa el horario del proveedor antes de guardar el vínculo (409 si choca)
+        await sync_reservation(rid, links=[*await _links(rid), new_data])
+        try:
+            await coll.insert_one(new_data)
+        except Exception:
+            await sync_reservation(rid)
+            raise
+        data.id = str(new_data["_id"])
         return data
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Error al crear ReservationService")
 
-async def get_all_reservation_services() -> list[ReservationService]:
+async def get_all_reservation_services(page: PageParams) -> dict:
     try:
-        return [ReservationService(**{**doc, "id": str(doc["_id"])}) for doc in coll.find()]
+        docs, next_cursor = await paginate_find(coll, {}, page)
+        return {
+            "items": [ReservationService(**{**from_db("reservation_service", doc), "id": str(doc["_id"])}) for doc in docs],
+            "next": next_cursor,
+        }
     except Exception:
         raise HTTPException(status_code=500, detail="Error al obtener datos")
 
 async def get_reservation_service_by_id(id: str) -> ReservationService:
     try:
-        doc = coll.find_one({"_id": ObjectId(id)})
+        doc = await coll.find_one({"_id": ObjectId(id)})
         if not doc:
             raise HTTPException(status_code=404, detail="No encontrado")
         doc["id"] = str(doc["_id"])
-        return ReservationService(**doc)
+        return ReservationService(**from_db("reservation_service", doc))
     except Exception:
         raise HTTPException(status_code=500, detail="Error al buscar dato")
 
-async def update_reservation_service(id: str, data: ReservationService) -> ReservationService:
+async def update_reservation_service(id: str, data: ReservationService, *, actor_id: str, is_admin: bool) -> ReservationService:
     try:
-        updated = coll.find_one_and_update(
-            {"_id": ObjectId(id)},
-            {"$set": data.model_dump(exclude={"id", "created_at"})},
-            return_document=True
-        )
+        actor = None if is_admin else actor_oid(actor_id)
+        oid = ObjectId(id)
+        current = await coll.find_one({"_id": oid})
+        if not current:
+            raise HTTPException(status_code=404, detail="No encontrado")
+
+        changes = to_db("reservation_service", data.model_dump(exclude={"id", "created_at"}))
+        rid = changes["id_reservation"]
+        # Dueño de la reservación actual del vínculo y de la nueva (pueden ser la misma)
+        owners = await _reservation_owners({current["id_reservation"], rid})
+        check_owner(owners.get(current["id_reservation"]), actor, LINK_FORBIDDEN_DETAIL)
+        if rid not in owners:
+            raise HTTPException(status_code=404, detail="La reservación no existe")
+        check_owner(owners[rid], actor, LINK_FORBIDDEN_DETAIL)
+        others = [link for link in await _links(rid) if link["_id"] != oid]
+        await sync_reservation(rid, links=[*others, {**current, **changes}])
+
+        updated = await coll.find_one_and_update({"_id": oid}, {"$set": changes}, return_document=True)
+        if current["id_reservation"] != rid:
+            await sync_reservation(current["id_reservation"])  # libera el horario de la reservación anterior
         if not updated:
+            await sync_reservation(rid)
             raise HTTPException(status_code=404, detail="No encontrado")
         updated["id"] = str(updated["_id"])
-        return ReservationService(**updated)
+        return ReservationService(**from_db("reservation_service", updated))
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Error al actualizar")
 
 async def delete_reservation_service(id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(id)})
-        if result.deleted_count == 0:
+        deleted = await coll.find_one_and_delete({"_id": ObjectId(id)})
+        if not deleted:
             raise HTTPException(status_code=404, detail="No encontrado")
+        await sync_reservation(deleted["id_reservation"])
         return {"message": "Eliminado correctamente"}
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Error al eliminar")
+
+async def create_reservation_services_bulk(items: list[ReservationService], ordered: bool, *, actor_id: str, is_admin: bool) -> dict:
+    check_size(items)
+    report = BulkReport(len(items), ordered)
+    actor = None if is_admin else actor_oid(actor_id)
+
+    docs: dict[int, dict] = {}
+    for i, item in enumerate(items):
+        if not (ObjectId.is_valid(item.id_reservation) and ObjectId.is_valid(item.id_service_offering)):
+            report.fail(i, 400, "id_reservation e id_service_offering deben ser ObjectId válidos")
+            continue
+        doc = to_db("reservation_service", item.model_dump(exclude={"id"}))
+        doc["_id"] = ObjectId()
+        docs[i] = doc
+
+    # Validación de referencias con una consulta por colección
+    rids = list({doc["id_reservation"] for doc in docs.values()})
+    sids = list({doc["id_service_offering"] for doc in docs.values()})
+    owners, found_sids, current_links = await asyncio.gather(
+        _reservation_owners(rids),
+        existing("service_offering", sids),
+        coll.find({"id_reservation": {"$in": rids}}).to_list(),
+    )
+    existing_links: dict[ObjectId, list[dict]] = {}
+    for link in current_links:
+        existing_links.setdefault(link["id_reservation"], []).append(link)
+
+    groups: dict[ObjectId, list[int]] = {}
+    for i, doc in docs.items():
+        if doc["id_reservation"] not in owners:
+            report.fail(i, 404, "La reservación no existe")
+        elif actor is not None and owners[doc["id_reservation"]] != actor:
+            report.fail(i, 403, LINK_FORBIDDEN_DETAIL)
+        elif doc["id_service_offering"] not in found_sids:
+            report.fail(i, 404, "El servicio no existe")
+        else:
+            groups.setdefault(doc["id_reservation"], []).append(i)
+
+    # Horario del proveedor: una verificación por reservación con todos sus vínculos nuevos
+    synced = set()
+    for rid, indexes in groups.items():
+        first = report.first_failure()
+        if ordered and first is not None and first < indexes[0]:
+            break
+        try:
+            await sync_reservation(rid, links=[*existing_links.get(rid, []), *(docs[i] for i in indexes)])
+            synced.add(rid)
+        except HTTPException as e:
+            for i in indexes:
+                report.fail(i, e.status_code, e.detail)
+
+    pending = [(i, docs[i]) for rid in synced for i in groups[rid]]
+    await insert_reported(coll, sorted(pending, key=lambda p: p[0]), report)
+
+    # Reservaciones con vínculos que al final no se guardaron: devolver sus bloques al estado real
+    for rid in synced:
+        if any(report.failed(i) or report.items[i]["id"] is None for i in groups[rid]):
+            await sync_reservation(rid)
+    return report.result()
+
+async def update_reservation_services_bulk(items: list[ReservationService], ordered: bool, *, actor_id: str, is_admin: bool) -> dict:
+    check_size(items)
+    report = BulkReport(len(items), ordered)
+    actor = None if is_admin else actor_oid(actor_id)
+
+    changes: dict[int, tuple[ObjectId, dict]] = {}
+    for i, item in enumerate(items):
+        if not (item.id and ObjectId.is_valid(item.id)):
+            report.fail(i, 400, "ID inválido")
+        elif not (ObjectId.is_valid(item.id_reservation) and ObjectId.is_valid(item.id_service_offering)):
+            report.fail(i, 400, "id_reservation e id_service_offering deben ser ObjectId válidos")
+        else:
+            changes[i] = (ObjectId(item.id), to_db("reservation_service", item.model_dump(exclude={"id", "created_at"})))
+
+    # Vínculos actuales, dueños de sus reservaciones (actuales y nuevas) y servicios: una consulta por colección
+    current = {doc["_id"]: doc for doc in await coll.find({"_id": {"$in": [oid for oid, _ in changes.values()]}}).to_list()}
+    rids = {doc["id_reservation"] for doc in current.values()} | {change["id_reservation"] for _, change in changes.values()}
+    owners, found_sids, links = await asyncio.gather(
+        _reservation_owners(rids),
+        existing("service_offering", [change["id_service_offering"] for _, change in changes.values()]),
+        coll.find({"id_reservation": {"$in": list(rids)}}).to_list(),
+    )
+    # Vínculos de cada reservación con los cambios aceptados hasta ahora en el lote
+    state: dict[ObjectId, dict[ObjectId, dict]] = {rid: {} for rid in rids}
+    for link in links:
+        state[link["id_reservation"]][link["_id"]] = link
+
+    pending, touched = [], set()
+    for i, (oid, change) in changes.items():
+        first = report.first_failure()
+        if ordered and first is not None and first < i:
+            break
+        before = current.get(oid)
+        rid = change["id_reservation"]
+        if not before:
+            report.fail(i, 404, "No encontrado")
+            continue
+        if rid not in owners:
+            report.fail(i, 404, "La reservación no existe")
+            continue
+        # la reservación actual del vínculo y la nueva deben ser del actor
+        if actor is not None and {owners.get(before["id_reservation"]), owners[rid]} != {actor}:
+            report.fail(i, 403, LINK_FORBIDDEN_DETAIL)
+            continue
+        if change["id_service_offering"] not in found_sids:
+            report.fail(i, 404, "El servicio no existe")
+            continue
+        after = {**before, **change}
+        try:
+            # Ocupa los bloques nuevos antes de escribir (409 si chocan); si cambió de
+            # reservación, libera los de la anterior
+            await sync_reservation(rid, links=[*(l for l in state[rid].values() if l["_id"] != oid), after])
+            if before["id_reservation"] != rid:
+                await sync_reservation(before["id_reservation"], links=[l for l in state[before["id_reservation"]].values() if l["_id"] != oid])
+        except HTTPException as e:
+            report.fail(i, e.status_code, e.detail)
+            continue
+        state[before["id_reservation"]].pop(oid, None)
+        state[rid][oid] = current[oid] = after
+        touched.update({rid, before["id_reservation"]})
+        pending.append((i, oid, UpdateOne({"_id": oid}, {"$set": change})))
+
+    not_written = await bulk_write_reported(coll, pending, report)
+    if not_written:
+        # Bloques de vuelta al estado guardado
+        for rid in touched:
+            await sync_reservation(rid)
+    return report.result()
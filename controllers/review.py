@@ -2,82 +2,151 @@ import os
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from models.review import Review
-from utils.mongodb import get_collection
+from utils.mongodb import get_async_mongo_client, lazy_collection
+from utils.pagination import PageParams, paginate_find
+from utils.streaming import ndjson_lines
+from utils.references import to_db
+from utils.serialization import Projection
+from utils.ownership import actor_oid, check_owner, guarded_write
+from utils.loaders import exists
+from utils.rating_stats import apply_delta, stats_listing, to_public
+from utils.cache import get_cache
+from utils.http_cache import bump_version
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 
 load_dotenv()
 
 URI = os.getenv("URI")
-coll = get_collection("reviews")
-services_coll = get_collection("service_offering")
+coll = lazy_collection("reviews")
+# Lecturas: solo los campos de Review, sin re-validar (utils/serialization.py)
+projection = Projection(Review, "reviews")
+
+async def _rating_changed():
+    # Los listados de servicios incluyen el promedio (caché compartida + ETags)
+    await get_cache().invalidate_tags("service_rating_stats")
+    await bump_version("service_rating_stats")
+
+async def _in_transaction(write):
+    """Reseña y su $inc en service_rating_stats: todo o nada."""
+    async with get_async_mongo_client().start_session() as session:
+        return await session.with_transaction(write)
 
 # Crear una reseña
-async def create_review(review: Review) -> Review:
+async def create_review(review: Review, *, actor_id: str, is_admin: bool) -> Review:
     try:
+        # Solo a nombre propio (un admin puede crear para cualquiera)
+        author = ObjectId(review.id_usuario) if ObjectId.is_valid(review.id_usuario) else None
+        check_owner(author, None if is_admin else actor_oid(actor_id), "No puedes publicar reseñas a nombre de otro usuario")
+
         # Validar que el servicio al que se refiere la reseña existe
         service_id = review.id_service_offering
         if not ObjectId.is_valid(service_id):
             raise HTTPException(status_code=400, detail="ID de servicio inválido")
 
-        service = services_coll.find_one({"_id": ObjectId(service_id)})
-        if not service:
+        if not await exists("service_offering", ObjectId(service_id)):
             raise HTTPException(status_code=404, detail="El servicio no existe")
 
-        review_dict = review.model_dump(exclude={"id"})
+        review_dict = to_db("reviews", review.model_dump(exclude={"id"}))
         review_dict["created_at"] = datetime.utcnow()
 
-        result = coll.insert_one(review_dict)
-        review.id = str(result.inserted_id)
+        review_dict["_id"] = ObjectId()  # fijo: with_transaction puede reintentar write()
+
+        async def write(session):
+            await coll.insert_one(review_dict, session=session)
+            await apply_delta(review_dict["id_service_offering"], review_dict["rating"], 1, session=session)
+
+        await _in_transaction(write)
+        await _rating_changed()
+        review.id = str(review_dict["_id"])
         return review
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear reseña: {str(e)}")
 
 # Obtener todas las reseñas
-async def get_all_reviews() -> list[Review]:
+async def get_all_reviews(page: PageParams) -> dict:
     try:
-        docs = coll.find()
-        reviews = []
-        for doc in docs:
-            doc["id"] = str(doc["_id"])
-            reviews.append(Review(**doc))
-        return reviews
+        docs, next_cursor = await paginate_find(coll, {}, page, projection.fields)
+        return {"items": projection.build_many(docs), "next": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener reseñas: {str(e)}")
 
+# Exportar todas las reseñas (NDJSON en streaming)
+def export_reviews(batch_size: int):
+    return ndjson_lines(coll, batch_size=batch_size)
+
 # Obtener una reseña por ID
-async def get_review_by_id(id: str) -> Review:
+async def get_review_by_id(id: str) -> dict:
     try:
-        doc = coll.find_one({"_id": ObjectId(id)})
+        doc = await coll.find_one({"_id": ObjectId(id)}, projection.fields)
         if not doc:
             raise HTTPException(status_code=404, detail="Reseña no encontrada")
-        doc["id"] = str(doc["_id"])
-        return Review(**doc)
+        return projection.build(doc)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al buscar reseña: {str(e)}")
 
 # Actualizar reseña
-async def update_review(id: str, review: Review) -> Review:
+async def update_review(id: str, review: Review, *, actor_id: str, is_admin: bool) -> Review:
     try:
-        existing = coll.find_one({"_id": ObjectId(id)})
-        if not existing:
-            raise HTTPException(status_code=404, detail="Reseña no encontrada")
+        update_data = to_db("reviews", review.model_dump(exclude={"id"}))
+        # Solo el autor (id_usuario) o un admin, y sin reasignarla a otro usuario
+        actor = None if is_admin else actor_oid(actor_id)
+        check_owner(update_data["id_usuario"], actor, "No puedes asignar la reseña a otro usuario")
+        new = (update_data["id_service_offering"], update_data["rating"])
 
-        update_data = review.model_dump(exclude={"id"})
-        coll.update_one({"_id": ObjectId(id)}, {"$set": update_data})
+        async def write(session):
+            # BEFORE: calificación y servicio anteriores para corregir los agregados.
+            # El autor va en el filtro (utils/ownership.py): 404/403 si no coincide
+            existing = await guarded_write(
+                coll, "find_one_and_update", ObjectId(id), {"$set": update_data},
+                owner_field="id_usuario", actor=actor, not_found="Reseña no encontrada",
+                return_document=ReturnDocument.BEFORE, session=session,
+            )
+            old = (existing.get("id_service_offering"), existing.get("rating"))
+            if old == new:
+                return False
+            if isinstance(old[0], ObjectId) and old[1] is not None:
+                await apply_delta(old[0], old[1], -1, session=session)
+            await apply_delta(new[0], new[1], 1, session=session)
+            return True
+
+        if await _in_transaction(write):
+            await _rating_changed()
         review.id = id
         return review
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al actualizar reseña: {str(e)}")
 
 # Eliminar reseña
 async def delete_review(id: str):
     try:
-        result = coll.delete_one({"_id": ObjectId(id)})
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Reseña no encontrada")
+        async def write(session):
+            deleted = await coll.find_one_and_delete({"_id": ObjectId(id)}, session=session)
+            if not deleted:
+                raise HTTPException(status_code=404, detail="Reseña no encontrada")
+            if isinstance(deleted.get("id_service_offering"), ObjectId) and deleted.get("rating") is not None:
+                await apply_delta(deleted["id_service_offering"], deleted["rating"], -1, session=session)
+                return True
+            return False
+
+        if await _in_transaction(write):
+            await _rating_changed()
         return {"message": "Reseña eliminada correctamente"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al eliminar reseña: {str(e)}")
 
-
+# Estadísticas por servicio (materializadas en service_rating_stats, ver utils/rating_stats.py)
+async def get_review_stats_by_service(page: PageParams) -> dict:
+    try:
+        docs, next_cursor = await paginate_find(stats_listing, {"count": {"$gt": 0}}, page, name="reviews.stats_by_service")
+        items = [{"id_service_offering": str(doc["_id"]), **to_public(doc)} for doc in docs]
+        return {"items": items, "next": next_cursor}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
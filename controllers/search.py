@@ -0,0 +1,88 @@
+# controllers/search.py
+import os
+from typing import Optional
+
+from bson import ObjectId
+
+from controllers.profession_catalog import profession_catalog
+from models.search import SearchType
+from utils.cache import get_cache
+from utils.mongodb import lazy_collection
+from utils.query_profiler import run_find
+from utils.search import exact_filter, prefix_filter, query_terms, score
+
+# Candidatos por colección = limit * SEARCH_CANDIDATE_FACTOR (acota el trabajo por consulta)
+SEARCH_CANDIDATE_FACTOR = int(os.getenv("SEARCH_CANDIDATE_FACTOR", 3))
+
+# kind -> (colección, campo de texto, proyección)
+_SOURCES = {
+    "profession": ("profession", "name", {"name": 1, "search_tokens": 1}),
+    "service_offering": (
+        "service_offering", "description",
+        {"description": 1, "id_profession": 1, "profession_name": 1, "search_tokens": 1},
+    ),
+}
+# Primario / secundario (secondaryPreferred) de cada colección
+_COLLECTIONS = {
+    kind: {False: lazy_collection(name), True: lazy_collection(name, listing=True)}
+    for kind, (name, _, _) in _SOURCES.items()
+}
+
+
+async def _candidates(kind: str, terms: list[str], limit: int, listing: bool) -> list[dict]:
+    """Primero documentos con todas las palabras exactas; si faltan, completa por prefijo."""
+    _, _, projection = _SOURCES[kind]
+    coll = _COLLECTIONS[kind][listing]
+    docs = await run_find(
+        coll, {"active": True, **exact_filter(terms)}, projection,
+        name=f"search.{kind}.exact", limit=limit,
+    )
+    if len(docs) < limit:
+        seen = [d["_id"] for d in docs]
+        docs += await run_find(
+            coll, {"active": True, "_id": {"$nin": seen}, **prefix_filter(terms)}, projection,
+            name=f"search.{kind}.prefix", limit=limit - len(docs),
+        )
+    return docs
+
+
+async def _hits(kind: str, terms: list[str], limit: int, listing: bool) -> list[dict]:
+    _, field, _ = _SOURCES[kind]
+    docs = await _candidates(kind, terms, limit * SEARCH_CANDIDATE_FACTOR, listing)
+    # profession_name viene copiado en el servicio (utils/profession_sync.py); el catálogo
+    # solo hace falta para servicios anteriores al backfill
+    legacy = kind == "service_offering" and any("profession_name" not in doc for doc in docs)
+    professions = await profession_catalog.by_id() if legacy else {}
+    hits = []
+    for doc in docs:
+        hit = {
+            "type": kind,
+            "id": str(doc["_id"]),
+            "text": doc.get(field, ""),
+            "score": score(doc.get("search_tokens"), terms),
+        }
+        if kind == "service_offering" and "profession_name" in doc:
+            hit["profession_name"] = doc["profession_name"]
+        elif kind == "service_offering":
+            prof = professions.get(doc.get("id_profession")) if isinstance(doc.get("id_profession"), ObjectId) else None
+            hit["profession_name"] = prof.get("name") if prof else None
+        hits.append(hit)
+    return hits
+
+
+async def search(q: str, type: Optional[SearchType], limit: int) -> dict:
+    terms = query_terms(q)
+    if not terms:
+        return {"query": q, "items": []}
+
+    async def load(listing: bool):
+        # Secundario solo si no hubo escrituras desde la última carga (utils/cache.py)
+        kinds = [type] if type else list(_SOURCES)
+        hits = [hit for kind in kinds for hit in await _hits(kind, terms, limit, listing)]
+        # Más relevante primero; a igual relevancia, el texto más corto (más específico)
+        hits.sort(key=lambda h: (-h["score"], len(h["text"])))
+        return hits[:limit]
+
+    key = f"search:{type or 'all'}:{' '.join(terms)}:{limit}"
+    items = await get_cache().get_or_load_listing(key, load, tags=("profession", "service_offering"))
+    return {"query": q, "items": items}
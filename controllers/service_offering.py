@@ -1,13 +1,26 @@
 from fastapi import HTTPException
 from bson import ObjectId
-from utils.mongodb import get_collection
+from pymongo import ReturnDocument
+from utils.mongodb import lazy_collection
+from utils.query_profiler import run_aggregate
+from utils.pagination import PageParams, keyset_stages, make_page
+from utils.streaming import ndjson_lines
 from models.service_offering import ServiceOffering
-
-col = get_collection("service_offering")
-prof_col = get_collection("profession")
+from controllers.profession_catalog import profession_catalog
+from utils.http_cache import bump_version
+from utils.cache import get_cache
+from utils.search import search_tokens
+from utils.rating_stats import stats_for, to_public
+from utils.ownership import guarded_write
+from utils.profession_sync import denormalized
+
+col = lazy_collection("service_offering")
+col_listing = lazy_collection("service_offering", listing=True)  # lecturas de listados (secondaryPreferred)
+professions = lazy_collection("profession")
 
 # -----------------------------
 # Pipelines embebidos
+# (profession_name está copiado en cada servicio, sin $lookup: ver utils/profession_sync.py)
 # -----------------------------
 def _project_stage():
     return {
@@ -15,16 +28,16 @@ def _project_stage():
             "_id": 0,
             "id": {"$toString": "$_id"},
             "id_profession": {"$toString": "$id_profession"},
-            "profession_name": "$profession.name",
             "description": 1,
             "estimated_price": 1,
             "estimated_duration": 1,
             "active": 1,
             "created_by": {"$toString": "$created_by"},
+            "profession_name": 1,
         }
     }
 
-def _list_pipeline(*, active_only: bool = True, owner_id: str | None = None):
+def _list_pipeline(*, active_only: bool = True, owner_id: str | None = None, page: PageParams | None = None):
     match: dict = {}
     if active_only:
         match["active"] = True
@@ -36,32 +49,22 @@ def _list_pipeline(*, active_only: bool = True, owner_id: str | None = None):
 
     return [
         {"$match": match},
-        {
-            "$lookup": {
-                "from": "profession",
-                "localField": "id_profession",
-                "foreignField": "_id",
-                "as": "profession",
-            }
-        },
-        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
+        *(keyset_stages(page) if page else []),
         _project_stage(),
     ]
 
-def _by_id_pipeline(service_id: str):
-    return [
-        {"$match": {"_id": ObjectId(service_id)}},
-        {
-            "$lookup": {
-                "from": "profession",
-                "localField": "id_profession",
-                "foreignField": "_id",
-                "as": "profession",
-            }
-        },
-        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
-        _project_stage(),
-    ]
+def _to_public(doc: dict) -> dict:
+    """Misma forma que _project_stage, a partir del documento ya escrito."""
+    return {
+        "id": str(doc["_id"]),
+        "id_profession": str(doc["id_profession"]),
+        "description": doc.get("description"),
+        "estimated_price": doc.get("estimated_price"),
+        "estimated_duration": doc.get("estimated_duration"),
+        "active": doc.get("active"),
+        "created_by": str(doc["created_by"]),
+        "profession_name": doc.get("profession_name"),
+    }
 
 
 # -----------------------------
@@ -73,89 +76,125 @@ def _ensure_objectid(s: str, name: str = "id") -> ObjectId:
     except Exception:
         raise HTTPException(status_code=400, detail=f"Invalid {name}")
 
-def _get_by_id_agg_str(service_id: str) -> dict:
-    """Devuelve 1 service offering con lookup y proyección usando aggregate."""
-    pipe = _by_id_pipeline(service_id)
-    docs = list(col.aggregate(pipe))
-    if not docs:
-        raise HTTPException(status_code=404, detail="Service not found")
-    return docs[0]
+async def _active_profession(pid: ObjectId) -> dict:
+    """
+    Profesión leída del primario, no del catálogo: lo que se copia al servicio
+    (denormalized) no puede venir de una copia que aún no vio un renombre.
+    """
+    prof = await professions.find_one({"_id": pid}, projection={"name": 1, "active": 1})
+    if not prof or not prof.get("active"):
+        raise HTTPException(status_code=404, detail="Profession not found or inactive")
+    return prof
+
+async def _attach_profession_names(docs: list[dict]) -> list[dict]:
+    """Solo para servicios escritos antes de desnormalizar (python -m utils.profession_sync --backfill)."""
+    legacy = [doc for doc in docs if "profession_name" not in doc]
+    if not legacy:
+        return docs
+    professions = await profession_catalog.by_id()
+    for doc in legacy:
+        pid = doc.get("id_profession")
+        prof = professions.get(ObjectId(pid)) if ObjectId.is_valid(pid) else None
+        if prof is None and pid:
+            prof = await profession_catalog.get(pid)  # creada en otro worker tras la última carga
+        doc["profession_name"] = prof.get("name") if prof else None
+    return docs
+
+async def _attach_ratings(docs: list[dict], *, listing: bool = True) -> list[dict]:
+    """rating_count / rating_avg precalculados (una lectura por _id para toda la página)."""
+    stats = await stats_for([ObjectId(doc["id"]) for doc in docs], listing=listing)
+    for doc in docs:
+        public = to_public(stats.get(ObjectId(doc["id"])))
+        doc["rating_count"] = public["count"]
+        doc["rating_avg"] = public["mean"]
+    return docs
+
+async def _invalidate():
+    # Caché compartida (listados de servicios y conteos por profesión) + ETags
+    await get_cache().invalidate_tags("service_offering")
+    await bump_version("service_offering")
+
+# Escrituras de dueño: created_by en el filtro (utils/ownership.py)
+OWNER = {"owner_field": "created_by", "not_found": "Service not found", "forbidden": "Not owner of this service"}
 
 
 # -----------------------------
 # Endpoints (lógica)
 # -----------------------------
-async def list_services_active():
-    """Mantiene tu firma original pero ahora usa aggregate + lookup."""
-    pipe = _list_pipeline(active_only=True)
-    return list(col.aggregate(pipe))
+async def list_services_active(page: PageParams):
+    """Servicios activos paginados por cursor (índice active_1__id_1), con profession_name copiado."""
+    async def load(listing: bool):
+        # Secundario solo si no hubo escrituras desde la última carga (utils/cache.py)
+        pipe = _list_pipeline(active_only=True, page=page)
+        source = col_listing if listing else col
+        docs, next_cursor = make_page(await run_aggregate(source, pipe, name="service_offering._list_pipeline"), page, id_field="id")
+        docs = await _attach_ratings(await _attach_profession_names(docs), listing=listing)
+        return {"items": docs, "next": next_cursor}
+
+    # El rating sale de service_rating_stats. Los cambios de profesión llegan como cambios de
+    # service_offering cuando termina su propagación (utils/profession_sync.py)
+    key = f"service_offering:list:{page.after}:{page.limit}"
+    return await get_cache().get_or_load_listing(key, load, tags=("service_offering", "service_rating_stats"))
+
+def export_services(batch_size: int):
+    """Todos los service offerings (activos e inactivos) como NDJSON en streaming."""
+    return ndjson_lines(col, batch_size=batch_size)
 
 async def create_service(service: ServiceOffering, *, actor_id: str):
     # validar profesión
     pid = _ensure_objectid(service.id_profession, "id_profession")
-
-    if not prof_col.find_one({"_id": pid, "active": True}):
-        raise HTTPException(status_code=404, detail="Profession not found or inactive")
+    prof = await _active_profession(pid)
 
     # dueño
     owner = _ensure_objectid(actor_id, "actor id")
 
-    res = col.insert_one({
+    doc = {
         "id_profession": pid,
         "description": service.description,
         "estimated_price": service.estimated_price,
         "estimated_duration": service.estimated_duration,
         "active": service.active,
         "created_by": owner,
-    })
+        "search_tokens": search_tokens(service.description),
+        **denormalized(prof),
+    }
+    await col.insert_one(doc)  # asigna doc["_id"]
+    await _invalidate()
 
-    # devolver ya con lookup/proyección
-    return _get_by_id_agg_str(str(res.inserted_id))
+    # respuesta armada con lo insertado (sin releer)
+    return _to_public(doc)
 
 # mantenemos firma con is_admin para no romper rutas, pero NO se usa (solo dueño puede)
 async def update_service(id: str, service: ServiceOffering, *, actor_id: str, is_admin: bool):
     _id = _ensure_objectid(id, "id")
     pid = _ensure_objectid(service.id_profession, "id_profession")
-
-    if not prof_col.find_one({"_id": pid, "active": True}):
-        raise HTTPException(status_code=404, detail="Profession not found or inactive")
-
-    current = col.find_one({"_id": _id})
-    if not current:
-        raise HTTPException(status_code=404, detail="Service not found")
+    prof = await _active_profession(pid)
 
     actor = _ensure_objectid(actor_id, "actor id")
-    if current.get("created_by") != actor:
-        raise HTTPException(status_code=403, detail="Not owner of this service")
-
-    col.update_one({"_id": _id}, {"$set": {
-        "id_profession": pid,
-        "description": service.description,
-        "estimated_price": service.estimated_price,
-        "estimated_duration": service.estimated_duration,
-        "active": service.active,
-    }})
 
-    return _get_by_id_agg_str(id)
+    # El dueño va en el filtro: verificación, escritura y lectura del resultado en un comando
+    updated = await guarded_write(
+        col, "find_one_and_update", _id,
+        {"$set": {
+            "id_profession": pid,
+            "description": service.description,
+            "estimated_price": service.estimated_price,
+            "estimated_duration": service.estimated_duration,
+            "active": service.active,
+            "search_tokens": search_tokens(service.description),
+            **denormalized(prof),
+        }},
+        actor=actor, return_document=ReturnDocument.AFTER, **OWNER,
+    )
+    await _invalidate()
+
+    return _to_public(updated)
 
 # mantenemos firma con is_admin para no romper rutas, pero NO se usa (solo dueño puede)
 async def delete_service(id: str, *, actor_id: str, is_admin: bool):
     _id = _ensure_objectid(id, "id")
-
-    current = col.find_one({"_id": _id})
-    if not current:
-        raise HTTPException(status_code=404, detail="Service not found")
-
     actor = _ensure_objectid(actor_id, "actor id")
-    if current.get("created_by") != actor:
-        raise HTTPException(status_code=403, detail="Not owner of this service")
 
-    col.update_one({"_id": _id}, {"$set": {"active": False}})
+    await guarded_write(col, "update_one", _id, {"$set": {"active": False}}, actor=actor, **OWNER)
+    await _invalidate()
     return {"ok": True}
-
-
-
-
-
-
-
@@ -1,19 +1,20 @@
 # controllers/users.py
 import os
 import json
+import asyncio
 import logging
-import firebase_admin
-import requests
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
-from firebase_admin import credentials, auth as firebase_auth
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 
 from models.users import User
 from models.login import Login
 
 from utils.security import create_jwt_token
-from utils.mongodb import get_collection
+from utils.mongodb import get_async_collection
+from utils.http_client import FIREBASE_AUTH_URL, post_json
 
 load_dotenv()
 
@@ -23,6 +24,11 @@ logger = logging.getLogger(__name__)
 
 def initialize_firebase():
     """Inicializa Firebase una sola vez, desde BASE64 o archivo local."""
+    # Import diferido: firebase_admin (y google.auth) pesan en el arranque y
+    # solo se necesitan al registrar usuarios.
+    import firebase_admin
+    from firebase_admin import credentials
+
     if firebase_admin._apps:
         return
     try:
@@ -42,25 +48,79 @@ def initialize_firebase():
         raise HTTPException(status_code=500, detail=f"Firebase configuration error: {str(e)}")
 
 
-initialize_firebase()
+def _firebase_auth():
+    """Módulo firebase_admin.auth, inicializando Firebase en el primer uso."""
+    initialize_firebase()
+    from firebase_admin import auth as firebase_auth
+    return firebase_auth
 
 
-async def create_user(user: User) -> User:
-    coll = get_collection("users")
-    if coll.find_one({"email": user.email}):
-        raise HTTPException(status_code=409, detail="Email ya registrado en la base de datos")
+# El Admin SDK de Firebase es bloqueante: sus llamadas corren en un pool
+# de hilos acotado (FIREBASE_MAX_WORKERS) para no frenar el event loop.
+FIREBASE_MAX_WORKERS = int(os.getenv("FIREBASE_MAX_WORKERS", 8))
+_firebase_executor: ThreadPoolExecutor | None = None
+
+
+def _get_firebase_executor() -> ThreadPoolExecutor:
+    global _firebase_executor
+    if _firebase_executor is None:
+        _firebase_executor = ThreadPoolExecutor(max_workers=FIREBASE_MAX_WORKERS, thread_name_prefix="firebase")
+    return _firebase_executor
 
-    fb_user = None
+
+async def _run_firebase(method: str, *args, **kwargs):
+    """Ejecuta firebase_admin.auth.<method> en el pool (la inicialización también ocurre ahí)."""
+    def call():
+        return getattr(_firebase_auth(), method)(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_firebase_executor(), call)
+
+
+async def _get_firebase_user_by_email(email: str):
     try:
-        fb_user = firebase_auth.get_user_by_email(user.email)
+        fb_user = await _run_firebase("get_user_by_email", email)
         logger.info("Email ya existe en Firebase, se reutilizará el UID.")
+        return fb_user
     except Exception:
-        fb_user = None
+        return None
+
+
+def _delete_firebase_user_in_background(uid: str) -> None:
+    """Compensación: borra el usuario de Firebase sin retener la respuesta al cliente."""
+    def _log_result(fut):
+        if fut.exception() is not None:
+            logger.warning(f"[FIREBASE] no se pudo borrar el usuario {uid}: {fut.exception()!r}")
+
+    _get_firebase_executor().submit(lambda: _firebase_auth().delete_user(uid)).add_done_callback(_log_result)
+
+
+def shutdown_firebase_executor() -> None:
+    """
+    Espera a que terminen las compensaciones pendientes (llamar al apagar la app).
+    Bloquea: desde código async, con asyncio.to_thread.
+    """
+    global _firebase_executor
+    if _firebase_executor is not None:
+        _firebase_executor.shutdown(wait=True)
+        _firebase_executor = None
+
+
+async def create_user(user: User) -> User:
+    coll = get_async_collection("users")
+    # Verificación en Mongo y búsqueda en Firebase en paralelo
+    existing, fb_user = await asyncio.gather(
+        coll.find_one({"email": user.email}, {"_id": 1}),
+        _get_firebase_user_by_email(user.email),
+    )
+    if existing:
+        raise HTTPException(status_code=409, detail="Email ya registrado en la base de datos")
 
     created_in_firebase = False
     try:
         if not fb_user:
-            fb_user = firebase_auth.create_user(
+            fb_user = await _run_firebase(
+                "create_user",
                 email=user.email,
                 password=user.password,
             )
@@ -81,17 +141,16 @@ async def create_user(user: User) -> User:
         user_dict.setdefault("active", True)
         user_dict.setdefault("admin", False)
 
-        inserted = coll.insert_one(user_dict)
+        inserted = await coll.insert_one(user_dict)
         new_user.id = str(inserted.inserted_id)
         new_user.password = "*********"
 
         return new_user
     except Exception as e:
         if created_in_firebase and fb_user is not None:
-            try:
-                firebase_auth.delete_user(fb_user.uid)
-            except Exception:
-                pass
+            _delete_firebase_user_in_background(fb_user.uid)
+        if isinstance(e, DuplicateKeyError):  # índice único users.email (registro concurrente)
+            raise HTTPException(status_code=409, detail="Email ya registrado en la base de datos")
         logger.error(f"Error creating user in MongoDB: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -101,11 +160,11 @@ async def login(user: Login) -> dict:
     if not api_key:
         raise HTTPException(status_code=500, detail="FIREBASE_API_KEY no configurada")
 
-    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
+    url = f"{FIREBASE_AUTH_URL}/v1/accounts:signInWithPassword"
     payload = {"email": user.email, "password": user.password, "returnSecureToken": True}
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = await post_json(url, payload, params={"key": api_key})
         response_data = response.json()
     except Exception as e:
         logger.error("Error calling Firebase Identity", exc_info=True)
@@ -114,8 +173,8 @@ async def login(user: Login) -> dict:
     if "error" in response_data:
         raise HTTPException(status_code=400, detail="Error al autenticar usuario")
 
-    coll = get_collection("users")
-    user_info = coll.find_one({"email": user.email})
+    coll = get_async_collection("users")
+    user_info = await coll.find_one({"email": user.email})
     if not user_info:
         raise HTTPException(status_code=404, detail="Usuario no encontrado en la base de datos")
 
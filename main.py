@@ -1,12 +1,14 @@
 # main.py
 import os
+import asyncio
 import uvicorn
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Response
 from dotenv import load_dotenv
 
 # Controladores y modelos (login/registro)
-from controllers.users import create_user, login
+from controllers.users import create_user, login, shutdown_firebase_executor
 from models.users import User
 from models.login import Login
 
@@ -17,9 +19,20 @@ import routes.service_offering as service_offering_routes
 import routes.review as review_routes
 import routes.service_review as service_review_routes
 import routes.public_profession as public_profession_routes
+import routes.search as search_routes
+import routes.reservation_service as reservation_service_routes
+import routes.availability as availability_routes
 
 # MongoDB
-from utils.mongodb import t_connection
+from utils.mongodb import t_connection, get_async_mongo_client, close_mongo_clients
+from utils.indexes import ensure_indexes, ensure_required_indexes, index_drift
+from utils.http_client import close_http_client
+from utils.cache import close_cache
+from utils.mongo_monitoring import pool_checkout_listener
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.security import validateadmin
+from utils.loaders import LoaderScopeMiddleware
+from utils.profession_sync import resume_pending
 
 # Swagger
 from fastapi.openapi.utils import get_openapi
@@ -29,7 +42,52 @@ from fastapi.middleware.cors import CORSMiddleware
 
 load_dotenv()
 
-app = FastAPI()
+# ============================
+# Arranque / apagado
+# ============================
+async def _bootstrap_indexes():
+    try:
+        await ensure_indexes()
+        drift = await index_drift()
+        if drift:
+            logger.warning(f"Drift de índices en MongoDB: {drift}")
+    except Exception as e:
+        logger.error(f"No se pudieron verificar los índices: {e}")
+
+async def _warm_up():
+    # Abre el pool de Mongo antes de la primera petición
+    try:
+        await get_async_mongo_client().admin.command("ping")
+    except Exception as e:
+        logger.error(f"MongoDB no disponible al arrancar: {e}")
+        return
+    # Índices declarados en utils/indexes.py (desactivar con MONGO_ENSURE_INDEXES=0)
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "0":
+        await _bootstrap_indexes()
+    # Propagaciones de profesión que quedaron a medias (utils/profession_sync.py)
+    try:
+        await resume_pending()
+    except Exception as e:
+        logger.error(f"No se pudieron retomar las propagaciones de profesión: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nada pesado al importar: Mongo y Firebase se inicializan de forma diferida.
+    # Excepción: sin el índice único de reservation_slots se aceptarían reservas
+    # solapadas, así que se crea antes de servir y si falla no se arranca.
+    await ensure_required_indexes()
+    # El resto del warm-up corre en segundo plano para no retrasar el health check.
+    task = asyncio.create_task(_warm_up())
+    yield
+    if not task.done():
+        task.cancel()
+    await close_http_client()
+    await close_cache()
+    # Espera las compensaciones pendientes de Firebase sin bloquear el event loop
+    await asyncio.to_thread(shutdown_firebase_executor)
+    await close_mongo_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 # ============================
 # CORS
@@ -42,6 +100,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ============================
+# Métricas (latencia por ruta, status, en curso)
+# ============================
+app.add_middleware(MetricsMiddleware)
+
+# ============================
+# Verificación de referencias agrupada por petición (utils/loaders.py)
+# ============================
+app.add_middleware(LoaderScopeMiddleware)
+
 # ============================
 # Routers
 # ============================
@@ -51,6 +119,9 @@ app.include_router(service_offering_routes.router)
 app.include_router(review_routes.router)
 app.include_router(service_review_routes.router)
 app.include_router(public_profession_routes.router)
+app.include_router(search_routes.router)
+app.include_router(reservation_service_routes.router)
+app.include_router(availability_routes.router)
 
 # ============================
 # Personalización OpenAPI
@@ -117,6 +188,17 @@ def readiness_check():
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Detalle operativo (tamaños y esperas del pool): solo admins
+@app.get("/metrics/mongo-pool", dependencies=[Depends(validateadmin)])
+def mongo_pool_metrics():
+    # Espera para obtener conexión del pool (si sube, el cuello de botella es el pool, no el servidor)
+    return pool_checkout_listener.snapshot()
+
 # ============================
 # Endpoints de usuarios (públicos)
 # ============================
@@ -0,0 +1,30 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+from models.reservation import Reservation
+from models.reservation_service import ReservationService
+
+class BulkItemResult(BaseModel):
+    index: int = Field(description="Posición del elemento en el arreglo recibido")
+    status: int = Field(description="Código HTTP del elemento (201/200 ok, 4xx/5xx error, 424 no procesado)")
+    id: Optional[str] = Field(default=None, description="ID creado o actualizado")
+    detail: Optional[str] = Field(default=None, description="Motivo del error")
+
+class BulkResult(BaseModel):
+    ordered: bool = Field(description="Si true, el lote se detuvo en el primer error")
+    succeeded: int = Field(description="Elementos escritos")
+    failed: int = Field(description="Elementos con error o no procesados")
+    items: list[BulkItemResult] = Field(default_factory=list, description="Resultado por elemento, en el orden recibido")
+
+class ServiceLine(BaseModel):
+    id_service_offering: str = Field(..., description="ID del servicio ofrecido")
+    quantity: int = Field(default=1, gt=0, description="Cantidad del servicio reservado")
+    notes: Optional[str] = Field(default=None, description="Notas adicionales")
+
+class ReservationWithServices(BaseModel):
+    reservation: Reservation = Field(description="Reservación a crear")
+    services: list[ServiceLine] = Field(default_factory=list, description="Servicios de la reservación, en orden")
+
+class ReservationWithServicesOut(BaseModel):
+    reservation: Reservation
+    services: list[ReservationService]
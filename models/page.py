@@ -0,0 +1,8 @@
+from typing import Generic, Optional, TypeVar
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: list[T] = Field(default_factory=list, description="Elementos de la página")
+    next: Optional[str] = Field(default=None, description="Cursor para pedir la siguiente página (null si no hay más)")
@@ -0,0 +1,15 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+SearchType = Literal["profession", "service_offering"]
+
+class SearchHit(BaseModel):
+    type: SearchType = Field(description="Colección del resultado")
+    id: str = Field(description="ID de MongoDB")
+    text: str = Field(description="Nombre de la profesión o descripción del servicio")
+    score: float = Field(description="Relevancia entre 0 y 1 (1 = todas las palabras exactas)")
+    profession_name: Optional[str] = Field(default=None, description="Profesión del servicio (solo service_offering)")
+
+class SearchResults(BaseModel):
+    query: str = Field(description="Consulta recibida")
+    items: list[SearchHit] = Field(default_factory=list, description="Resultados ordenados por relevancia")
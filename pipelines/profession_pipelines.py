@@ -1,20 +1,22 @@
 from bson import ObjectId
 
+from utils.search import prefix_filter, query_terms
+
 def get_profession_with_service_count_pipeline() -> list:
     """
     Lista todas las profesiones con número de servicios asociados.
+    id_profession es ObjectId (ver utils/references.py): el lookup usa el índice id_profession_1.
     """
     return [
-        {"$addFields": {"id": {"$toString": "$_id"}}},
         {"$lookup": {
             "from": "service_offering",
-            "localField": "id",
+            "localField": "_id",
             "foreignField": "id_profession",
             "as": "services"
         }},
         {"$group": {
             "_id": {
-                "id": "$id",
+                "id": {"$toString": "$_id"},
                 "name": "$name",
                 "active": "$active"
             },
@@ -29,30 +31,38 @@ def get_profession_with_service_count_pipeline() -> list:
         }}
     ]
 
-def get_all_professions_pipeline(skip: int = 0, limit: int = 10, include_inactive: bool = False) -> list:
+def get_all_professions_pipeline(limit: int = 10, include_inactive: bool = False,
+                                 after: ObjectId | None = None) -> list:
     """
-    Devuelve todas las profesiones con control de estado y paginación.
+    Devuelve las profesiones con control de estado y paginación por cursor (_id > after).
     """
     match_stage = {} if include_inactive else {"active": True}
+    if after is not None:
+        match_stage["_id"] = {"$gt": after}
     return [
         {"$match": match_stage},
+        {"$sort": {"_id": 1}},
+        {"$limit": limit},
         {"$project": {
             "_id": 0,
             "id": {"$toString": "$_id"},
             "name": "$name",
             "active": "$active"
-        }},
-        {"$skip": skip},
-        {"$limit": limit}
+        }}
     ]
 
 def search_professions_pipeline(search_term: str, skip: int = 0, limit: int = 10) -> list:
     """
-    Busca profesiones por nombre (case-insensitive).
+    Busca profesiones por prefijo de palabra, sin mayúsculas ni acentos
+    ("electr" -> "Electricista"). Usa search_tokens (ver utils/search.py):
+    el término se escapa y el regex va anclado, así que recorre el índice.
     """
+    terms = query_terms(search_term)
+    if not terms:
+        return [{"$match": {"_id": None}}]
     return [
         {"$match": {
-            "name": {"$regex": search_term, "$options": "i"},
+            **prefix_filter(terms),
             "active": True
         }},
         {"$project": {
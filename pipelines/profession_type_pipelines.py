@@ -7,10 +7,9 @@ def validate_profession_is_assigned_pipeline(id: str) -> list:
     """
     return [
         {"$match": {"_id": ObjectId(id)}},
-        {"$addFields": {"id": {"$toString": "$_id"}}},
         {"$lookup": {
             "from": "service_offering",
-            "localField": "id",
+            "localField": "_id",
             "foreignField": "id_profession",
             "as": "services"
         }},
@@ -1,53 +1,40 @@
 from bson import ObjectId
 
+
+def _public_project_stage() -> dict:
+    # profession sale de los campos desnormalizados (utils/profession_sync.py), sin $lookup
+    return {"$project": {
+        "_id": 0,
+        "id": {"$toString": "$_id"},
+        "id_profession": {"$toString": "$id_profession"},
+        "profession": {
+            "id": {"$toString": "$id_profession"},
+            "name": "$profession_name",
+            "active": "$profession_active",
+        },
+        "description": 1,
+        "estimated_price": 1,
+        "estimated_duration": 1,
+        "active": 1
+    }}
+
+
 def list_services_pipeline(*, include_inactive: bool = False,
                            only_active_profession: bool = False) -> list:
     """
     Lista servicios con su profesión relacionada.
     - include_inactive: incluye servicios inactivos si True.
     - only_active_profession: filtra también profesiones inactivas si True.
-    Soporta id_profession guardado como ObjectId o como string.
+    Usa profession_name/profession_active guardados en el servicio
+    (python -m utils.profession_sync --backfill para datos anteriores).
     """
-    match_stage = {"$match": {}} if include_inactive else {"$match": {"active": True}}
-
-    # Lookup que compara como string para evitar problemas de tipo
-    lookup_pipeline = [
-        {"$match": {
-            "$expr": {
-                "$eq": [
-                    {"$toString": "$_id"},
-                    {"$toString": "$$pid"}
-                ]
-            }
-        }},
-        {"$project": {"_id": 1, "name": 1, "active": 1}}
-    ]
+    match = {} if include_inactive else {"active": True}
     if only_active_profession:
-        lookup_pipeline.insert(1, {"$match": {"active": True}})
+        match["profession_active"] = True
 
     return [
-        match_stage,
-        {"$lookup": {
-            "from": "profession",
-            "let": {"pid": "$id_profession"},
-            "pipeline": lookup_pipeline,
-            "as": "profession"
-        }},
-        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
-        {"$project": {
-            "_id": 0,
-            "id": {"$toString": "$_id"},
-            "id_profession": {"$toString": "$id_profession"},
-            "profession": {
-                "id": {"$toString": "$profession._id"},
-                "name": "$profession.name",
-                "active": "$profession.active",
-            },
-            "description": 1,
-            "estimated_price": 1,
-            "estimated_duration": 1,
-            "active": 1
-        }},
+        {"$match": match},
+        _public_project_stage(),
         {"$sort": {"profession.name": 1, "description": 1}}
     ]
 
@@ -55,41 +42,9 @@ def list_services_pipeline(*, include_inactive: bool = False,
 def service_by_id_pipeline(service_id: str) -> list:
     """
     Obtiene un servicio por id con su profesión relacionada.
-    Soporta id_profession como ObjectId o string.
+    Usa profession_name/profession_active guardados en el servicio.
     """
     return [
         {"$match": {"_id": ObjectId(service_id)}},
-        {"$lookup": {
-            "from": "profession",
-            "let": {"pid": "$id_profession"},
-            "pipeline": [
-                {"$match": {
-                    "$expr": {
-                        "$eq": [
-                            {"$toString": "$_id"},
-                            {"$toString": "$$pid"}
-                        ]
-                    }
-                }},
-                {"$project": {"_id": 1, "name": 1, "active": 1}}
-            ],
-            "as": "profession"
-        }},
-        {"$unwind": {"path": "$profession", "preserveNullAndEmptyArrays": True}},
-        {"$project": {
-            "_id": 0,
-            "id": {"$toString": "$_id"},
-            "id_profession": {"$toString": "$id_profession"},
-            "profession": {
-                "id": {"$toString": "$profession._id"},
-                "name": "$profession.name",
-                "active": "$profession.active",
-            },
-            "description": 1,
-            "estimated_price": 1,
-            "estimated_duration": 1,
-            "active": 1
-        }}
+        _public_project_stage(),
     ]
-
-
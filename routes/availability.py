@@ -0,0 +1,19 @@
+# routes/availability.py
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+
+from controllers import availability as controller
+from utils.security import validateuser
+
+router = APIRouter(tags=["Availability"])
+
+
+@router.get("/availability", dependencies=[Depends(validateuser)])
+async def availability_endpoint(
+    service_id: str = Query(..., description="Service offering a reservar (define proveedor y duración)"),
+    day: date = Query(..., alias="date", description="Primer día (YYYY-MM-DD, UTC)"),
+    days: int = Query(1, ge=1, le=7, description="1 = un día, 7 = una semana"),
+) -> dict:
+    """Horarios libres del proveedor del servicio: inicios posibles y bloques ocupados"""
+    return await controller.availability(service_id, day, days)
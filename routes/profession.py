@@ -1,8 +1,11 @@
 # routes/profession.py
-from fastapi import APIRouter, Request, Query
+from fastapi import APIRouter, Depends, Request, Query
 from models.profession import Profession
+from models.page import Page
 from controllers import profession as controller
-from utils.security import validateuser
+from utils.security import validateuser, validateadmin
+from utils.pagination import PageParams
+from utils.http_cache import conditional_get
 
 router = APIRouter(prefix="/profession", tags=["📌 Profession"])
 
@@ -10,8 +13,7 @@ router = APIRouter(prefix="/profession", tags=["📌 Profession"])
 # ============================
 # Crear una profesión
 # ============================
-@router.post("/", response_model=Profession)
-@validateuser
+@router.post("/", response_model=Profession, dependencies=[Depends(validateuser)])
 async def create_profession_endpoint(request: Request, profession: Profession) -> Profession:
     """Crear una nueva profesión"""
     return await controller.create_profession(profession, request)
@@ -20,21 +22,47 @@ async def create_profession_endpoint(request: Request, profession: Profession) -
 # ============================
 # Obtener todas las profesiones
 # ============================
-@router.get("/", response_model=list[dict])
-@validateuser
+@router.get("/", response_model=Page[dict], dependencies=[Depends(validateuser), Depends(conditional_get("profession"))])
 async def get_professions_endpoint(
     request: Request,
-    include_inactive: bool = Query(False, description="Incluir profesiones inactivas")
-) -> list[dict]:
-    """Obtener todas las profesiones (usa pipeline)"""
-    return await controller.get_all_professions(include_inactive, request)
+    include_inactive: bool = Query(False, description="Incluir profesiones inactivas"),
+    page: PageParams = Depends(),
+) -> Page[dict]:
+    """Obtener las profesiones paginadas por cursor (usa pipeline)"""
+    return await controller.get_all_professions(include_inactive, page, request)
+
+
+# ============================
+# Endpoint extra: profesiones con número de servicios (antes de /{profession_id})
+# ============================
+@router.get("/with-service-count", response_model=list[dict], dependencies=[Depends(validateuser), Depends(conditional_get("profession", "service_offering"))])
+async def professions_with_service_count_endpoint(request: Request) -> list[dict]:
+    """Lista las profesiones con el número de servicios asociados"""
+    return await controller.professions_with_service_count(request)
+
+
+# ============================
+# Estadísticas de la caché del catálogo (antes de /{profession_id})
+# ============================
+@router.get("/cache-stats", response_model=dict, dependencies=[Depends(validateadmin)])
+async def profession_cache_stats_endpoint(request: Request) -> dict:
+    """Hits/misses de la caché en memoria del catálogo de profesiones"""
+    return await controller.catalog_stats(request)
+
+
+# ============================
+# Propagación del nombre de profesión a sus servicios (antes de /{profession_id})
+# ============================
+@router.get("/sync-status", response_model=dict, dependencies=[Depends(validateadmin)])
+async def profession_sync_status_endpoint(request: Request) -> dict:
+    """Jobs de propagación pendientes y lag del último aplicado"""
+    return await controller.sync_status(request)
 
 
 # ============================
 # Obtener una profesión por ID
 # ============================
-@router.get("/{profession_id}", response_model=Profession)
-@validateuser
+@router.get("/{profession_id}", response_model=Profession, dependencies=[Depends(validateuser)])
 async def get_profession_by_id_endpoint(profession_id: str, request: Request) -> Profession:
     """Obtener una profesión por ID"""
     return await controller.get_profession_by_id(profession_id, request)
@@ -43,8 +71,7 @@ async def get_profession_by_id_endpoint(profession_id: str, request: Request) ->
 # ============================
 # Actualizar una profesión
 # ============================
-@router.put("/{profession_id}", response_model=Profession)
-@validateuser
+@router.put("/{profession_id}", response_model=Profession, dependencies=[Depends(validateuser)])
 async def update_profession_endpoint(
     request: Request,
     profession_id: str,
@@ -57,28 +84,16 @@ async def update_profession_endpoint(
 # ============================
 # Desactivar una profesión (soft-delete)
 # ============================
-@router.delete("/{profession_id}", response_model=dict)
-@validateuser
+@router.delete("/{profession_id}", response_model=dict, dependencies=[Depends(validateuser)])
 async def deactivate_profession_endpoint(request: Request, profession_id: str) -> dict:
 
     return await controller.delete_profession_safe(profession_id, request)
 
 
-# ============================
-# Endpoint extra: profesiones con número de servicios
-# ============================
-@router.get("/with-service-count", response_model=list[dict])
-@validateuser
-async def professions_with_service_count_endpoint(request: Request) -> list[dict]:
-    """Lista las profesiones con el número de servicios asociados"""
-    return await controller.professions_with_service_count(request)
-
-
 # ============================
 # Endpoint extra: búsqueda
 # ============================
-@router.get("/search/{term}", response_model=list[dict])
-@validateuser
+@router.get("/search/{term}", response_model=list[dict], dependencies=[Depends(validateuser)])
 async def search_professions_endpoint(
     term: str,
     skip: int = Query(0, ge=0),
@@ -92,8 +107,7 @@ async def search_professions_endpoint(
 # ============================
 # Endpoint extra: validar si está asignada
 # ============================
-@router.get("/validate-assigned/{profession_id}", response_model=dict)
-@validateuser
+@router.get("/validate-assigned/{profession_id}", response_model=dict, dependencies=[Depends(validateuser)])
 async def validate_profession_assigned_endpoint(profession_id: str, request: Request) -> dict:
     """Valida si la profesión tiene servicios asociados"""
     return await controller.validate_profession_is_assigned(profession_id, request)
@@ -1,8 +1,13 @@
 import os
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from typing import Optional, List
 from models.profession import Profession
-from utils.mongodb import get_collection
+from models.page import Page
+from utils.pagination import PageParams
+from utils.http_cache import check_etag
+from utils.search import normalize
+from utils.serialization import Projection, fast_response
+from controllers.profession_catalog import profession_catalog
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -10,34 +15,40 @@ load_dotenv()
 
 router = APIRouter(tags=["Public Profession"])
 
-# Obtener la colección directamente (sin pasar MONGO_URI)
-profession_coll = get_collection("profession")
+# Documentos del catálogo -> campos de Profession, sin re-validar
+projection = Projection(Profession, "profession")
 
-@router.get("/public/professions", response_model=List[Profession])
+@router.get("/public/professions", response_model=Page[Profession])
 async def get_public_professions(
+    request: Request,
+    response: Response,
     name: Optional[str] = Query(None, description="Buscar por nombre parcial de la profesión"),
-    category: Optional[str] = Query(None, description="Filtrar por categoría exacta")
+    category: Optional[str] = Query(None, description="Filtrar por categoría exacta"),
+    page: PageParams = Depends(),
 ):
     """
     Endpoint público para consultar profesiones por nombre y/o categoría.
-    No requiere autenticación.
+    No requiere autenticación. Se responde desde el catálogo en memoria.
     """
     try:
-        query = {}
-
-        if name:
-            query["name"] = {"$regex": name, "$options": "i"}
-
-        if category:
-            query["category"] = category
-
-        results = []
-        for doc in profession_coll.find(query):
-            doc["id"] = str(doc["_id"])
-            results.append(Profession(**doc))
-
-        return results
-
+        # Subcadena sin mayúsculas ni acentos ("medico" encuentra "Médico")
+        term = normalize(name) if name else None
+
+        def matches(doc: dict) -> bool:
+            if term and term not in normalize(str(doc.get("name", ""))):
+                return False
+            if category and doc.get("category") != category:
+                return False
+            return True
+
+        docs, next_cursor = await profession_catalog.page(page, matches)
+        # ETag del contenido que se está sirviendo (sin await desde page(): misma carga)
+        check_etag(request, response, {"profession": profession_catalog.fingerprint}, public=True)
+        # fast_response conserva el ETag / Cache-Control
+        return fast_response({"items": projection.build_many(docs), "next": next_cursor}, response)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener profesiones: {e}")
 
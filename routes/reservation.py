@@ -1,32 +1,89 @@
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from models.reservation import Reservation
+from models.page import Page
+from models.bulk import BulkResult, ReservationWithServices, ReservationWithServicesOut
 from controllers import reservation as reservation_controller
 from utils.security import validateuser, validateadmin
+from utils.pagination import PageParams
+from utils.streaming import DEFAULT_BATCH_SIZE, ndjson_response
+from utils.serialization import fast_response
 
 router = APIRouter(prefix="/reservations", tags=["Reservations"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-@validateuser
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(validateuser)])
 async def create_reservation_route(reservation: Reservation, request: Request):
-    return await reservation_controller.create_reservation(reservation)
+    # A nombre del usuario del token (un admin puede crear para cualquiera)
+    return await reservation_controller.create_reservation(
+        reservation,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
-@router.get("/", response_model=list[Reservation])
-@validateadmin
-async def get_all_reservations_route(request: Request):
-    return await reservation_controller.get_all_reservations()
+@router.get("/", response_model=Page[Reservation], dependencies=[Depends(validateadmin)])
+async def get_all_reservations_route(request: Request, page: PageParams = Depends()):
+    return fast_response(await reservation_controller.get_all_reservations(page))
 
-@router.get("/{id}", response_model=Reservation)
-@validateuser
+# Debe ir antes de /{id} para que "export" no se tome como ID
+@router.get("/export", summary="Exportar reservaciones (NDJSON en streaming)", dependencies=[Depends(validateadmin)])
+async def export_reservations_route(request: Request, batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000)):
+    return ndjson_response(reservation_controller.export_reservations(batch_size), "reservations")
+
+# Lotes y creación compuesta (antes de /{id})
+@router.post("/bulk", response_model=BulkResult, summary="Crear reservaciones en lote", dependencies=[Depends(validateuser)])
+async def create_reservations_bulk_route(
+    items: list[Reservation],
+    request: Request,
+    ordered: bool = Query(False, description="Detenerse en el primer error"),
+):
+    return await reservation_controller.create_reservations_bulk(
+        items,
+        ordered,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
+
+@router.put("/bulk", response_model=BulkResult, summary="Actualizar reservaciones en lote (cada elemento con id)", dependencies=[Depends(validateuser)])
+async def update_reservations_bulk_route(
+    items: list[Reservation],
+    request: Request,
+    ordered: bool = Query(False, description="Detenerse en el primer error"),
+):
+    return await reservation_controller.update_reservations_bulk(
+        items,
+        ordered,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
+
+@router.post(
+    "/with-services",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ReservationWithServicesOut,
+    summary="Crear una reservación con sus servicios (una transacción)",
+    dependencies=[Depends(validateuser)],
+)
+async def create_reservation_with_services_route(data: ReservationWithServices, request: Request):
+    return await reservation_controller.create_reservation_with_services(
+        data,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
+
+@router.get("/{id}", response_model=Reservation, dependencies=[Depends(validateuser)])
 async def get_reservation_by_id_route(id: str, request: Request):
-    return await reservation_controller.get_reservation_by_id(id)
+    return fast_response(await reservation_controller.get_reservation_by_id(id))
 
-@router.put("/{id}", response_model=Reservation)
-@validateuser
+@router.put("/{id}", response_model=Reservation, dependencies=[Depends(validateuser)])
 async def update_reservation_route(id: str, reservation: Reservation, request: Request):
-    return await reservation_controller.update_reservation(id, reservation)
+    # Solo el dueño de la reservación o un admin
+    return await reservation_controller.update_reservation(
+        id,
+        reservation,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
-@router.delete("/{id}")
-@validateadmin
+@router.delete("/{id}", dependencies=[Depends(validateadmin)])
 async def delete_reservation_route(id: str, request: Request):
     return await reservation_controller.delete_reservation(id)
 
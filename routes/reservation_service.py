@@ -1,31 +1,65 @@
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from models.reservation_service import ReservationService
+from models.page import Page
+from models.bulk import BulkResult
 from controllers import reservation_service as controller
 from utils.security import validateuser, validateadmin
+from utils.pagination import PageParams
 
 router = APIRouter(prefix="/reservation_services", tags=["Reservation Services"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-@validateuser
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(validateuser)])
 async def create_route(data: ReservationService, request: Request):
-    return await controller.create_reservation_service(data)
+    # Solo sobre reservaciones propias (un admin, sobre cualquiera)
+    return await controller.create_reservation_service(
+        data,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
-@router.get("/", response_model=list[ReservationService])
-@validateadmin
-async def get_all_route(request: Request):
-    return await controller.get_all_reservation_services()
+@router.post("/bulk", response_model=BulkResult, summary="Crear vínculos en lote", dependencies=[Depends(validateuser)])
+async def create_bulk_route(
+    items: list[ReservationService],
+    request: Request,
+    ordered: bool = Query(False, description="Detenerse en el primer error"),
+):
+    return await controller.create_reservation_services_bulk(
+        items,
+        ordered,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
-@router.get("/{id}", response_model=ReservationService)
-@validateuser
+@router.put("/bulk", response_model=BulkResult, summary="Actualizar vínculos en lote (cada elemento con id)", dependencies=[Depends(validateuser)])
+async def update_bulk_route(
+    items: list[ReservationService],
+    request: Request,
+    ordered: bool = Query(False, description="Detenerse en el primer error"),
+):
+    return await controller.update_reservation_services_bulk(
+        items,
+        ordered,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
+
+@router.get("/", response_model=Page[ReservationService], dependencies=[Depends(validateadmin)])
+async def get_all_route(request: Request, page: PageParams = Depends()):
+    return await controller.get_all_reservation_services(page)
+
+@router.get("/{id}", response_model=ReservationService, dependencies=[Depends(validateuser)])
 async def get_by_id_route(id: str, request: Request):
     return await controller.get_reservation_service_by_id(id)
 
-@router.put("/{id}", response_model=ReservationService)
-@validateuser
+@router.put("/{id}", response_model=ReservationService, dependencies=[Depends(validateuser)])
 async def update_route(id: str, data: ReservationService, request: Request):
-    return await controller.update_reservation_service(id, data)
+    return await controller.update_reservation_service(
+        id,
+        data,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
-@router.delete("/{id}")
-@validateadmin
+@router.delete("/{id}", dependencies=[Depends(validateadmin)])
 async def delete_route(id: str, request: Request):
     return await controller.delete_reservation_service(id)
@@ -1,56 +1,72 @@
-from fastapi import APIRouter, Request, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from models.review import Review
+from models.page import Page
 from controllers import review as controller
 from utils.security import validateuser, validateadmin
+from utils.pagination import PageParams
+from utils.streaming import DEFAULT_BATCH_SIZE, ndjson_response
+from utils.serialization import fast_response
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 # ============================
 # Crear una reseña
 # ============================
-@router.post("/", status_code=status.HTTP_201_CREATED)
-@validateuser
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(validateuser)])
 async def create_review_route(review: Review, request: Request):
-    return await controller.create_review(review)
+    # A nombre del usuario del token (un admin puede crear para cualquiera)
+    return await controller.create_review(
+        review,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
 # ============================
 # Obtener todas las reseñas (Solo admin)
 # ============================
-@router.get("/", response_model=list[Review])
-@validateadmin
-async def get_all_reviews_route(request: Request):
-    return await controller.get_all_reviews()
+@router.get("/", response_model=Page[Review], dependencies=[Depends(validateadmin)])
+async def get_all_reviews_route(request: Request, page: PageParams = Depends()):
+    return fast_response(await controller.get_all_reviews(page))
+
+# ============================
+# Exportar todas las reseñas (Solo admin, NDJSON en streaming)
+# Debe ir antes de /{id} para que "export" no se tome como ID
+# ============================
+@router.get("/export", dependencies=[Depends(validateadmin)])
+async def export_reviews_route(request: Request, batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000)):
+    return ndjson_response(controller.export_reviews(batch_size), "reviews")
+
+# ============================
+# Estadísticas de reviews por servicio (Solo admin)
+# Precalculadas en service_rating_stats; antes de /{id} para que no se tome como ID
+# ============================
+@router.get("/estadisticas", response_model=Page[dict], tags=["Reviews - Estadísticas"], dependencies=[Depends(validateadmin)])
+async def get_review_stats_route(request: Request, page: PageParams = Depends()):
+    return await controller.get_review_stats_by_service(page)
 
 # ============================
 # Obtener una reseña por ID
 # ============================
-@router.get("/{id}", response_model=Review)
-@validateuser
+@router.get("/{id}", response_model=Review, dependencies=[Depends(validateuser)])
 async def get_review_by_id_route(id: str, request: Request):
-    return await controller.get_review_by_id(id)
+    return fast_response(await controller.get_review_by_id(id))
 
 # ============================
 # Actualizar una reseña
 # ============================
-@router.put("/{id}", response_model=Review)
-@validateuser
+@router.put("/{id}", response_model=Review, dependencies=[Depends(validateuser)])
 async def update_review_route(id: str, review: Review, request: Request):
-    return await controller.update_review(id, review)
+    # Solo el autor de la reseña o un admin
+    return await controller.update_review(
+        id,
+        review,
+        actor_id=request.state.id,
+        is_admin=bool(getattr(request.state, "admin", False)),
+    )
 
 # ============================
 # Eliminar una reseña (Solo admin)
 # ============================
-@router.delete("/{id}")
-@validateadmin
+@router.delete("/{id}", dependencies=[Depends(validateadmin)])
 async def delete_review_route(id: str, request: Request):
     return await controller.delete_review(id)
-
-# ============================
-# Estadísticas de reviews (Pipeline $group)
-# ============================
-@router.get("/estadisticas", tags=["Reviews - Estadísticas"])
-@validateadmin
-async def get_review_stats_route(request: Request):
-    return await controller.get_review_stats_by_service()
-
-
@@ -0,0 +1,25 @@
+# routes/search.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from controllers import search as controller
+from models.search import SearchResults, SearchType
+from utils.http_cache import conditional_get
+from utils.security import validateuser
+
+router = APIRouter(tags=["Search"])
+
+
+@router.get(
+    "/search",
+    response_model=SearchResults,
+    dependencies=[Depends(validateuser), Depends(conditional_get("profession", "service_offering"))],
+)
+async def search_endpoint(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar (acepta prefijos: 'plom' -> Plomero)"),
+    type: Optional[SearchType] = Query(None, description="Restringir a profession o service_offering"),
+    limit: int = Query(10, ge=1, le=50),
+) -> SearchResults:
+    """Búsqueda por relevancia en nombres de profesiones y descripciones de servicios (sin acentos ni mayúsculas)"""
+    return await controller.search(q, type, limit)
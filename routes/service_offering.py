@@ -1,25 +1,33 @@
 # routes/service_offering.py
-from fastapi import APIRouter, Request, status, Path
+from fastapi import APIRouter, Depends, Query, Request, status, Path
 from models.service_offering import ServiceOffering
 from controllers import service_offering as controller
-from utils.security import validateuser
+from utils.security import validateuser, validateadmin
+from utils.pagination import PageParams
+from utils.http_cache import conditional_get
+from utils.streaming import DEFAULT_BATCH_SIZE, ndjson_response
 
 router = APIRouter(prefix="/service_offering", tags=["Service Offering"])
 
-@router.get("/", summary="Listar servicios activos (con profession_name)")
-@validateuser
-async def get_services(request: Request):
-    # Devuelve la lista enriquecida por pipeline (incluye profession_name)
-    return await controller.list_services_active()
+@router.get(
+    "/",
+    summary="Listar servicios activos (con profession_name)",
+    dependencies=[Depends(validateuser), Depends(conditional_get("service_offering", "service_rating_stats"))],
+)
+async def get_services(request: Request, page: PageParams = Depends()):
+    # Devuelve la lista enriquecida por pipeline (incluye profession_name), paginada por cursor
+    return await controller.list_services_active(page)
 
-@router.post("/", status_code=status.HTTP_201_CREATED, summary="Crear servicio")
-@validateuser
+@router.get("/export", summary="Exportar todos los servicios (NDJSON en streaming, solo admin)", dependencies=[Depends(validateadmin)])
+async def export_services(request: Request, batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000)):
+    return ndjson_response(controller.export_services(batch_size), "service_offering")
+
+@router.post("/", status_code=status.HTTP_201_CREATED, summary="Crear servicio", dependencies=[Depends(validateuser)])
 async def create_service(service: ServiceOffering, request: Request):
     # Crea y devuelve el servicio ya pasado por pipeline
     return await controller.create_service(service, actor_id=request.state.id)
 
-@router.put("/{id}", summary="Actualizar servicio")
-@validateuser
+@router.put("/{id}", summary="Actualizar servicio", dependencies=[Depends(validateuser)])
 async def update_service(
     id: str = Path(..., description="ID del servicio"),
     service: ServiceOffering = None,
@@ -33,8 +41,7 @@ async def update_service(
         is_admin=bool(getattr(request.state, "admin", False)),
     )
 
-@router.delete("/{id}", summary="Desactivar servicio (soft delete)")
-@validateuser
+@router.delete("/{id}", summary="Desactivar servicio (soft delete)", dependencies=[Depends(validateuser)])
 async def delete_service(id: str, request: Request):
     # Soft delete: active=False (mantiene integridad)
     return await controller.delete_service(
@@ -1,26 +1,25 @@
-from fastapi import APIRouter, status, Request
+from fastapi import APIRouter, Depends, status, Request
 from models.service_review import ServiceReview
+from models.page import Page
 from controllers import service_review as controller
 from utils.security import validateuser
+from utils.pagination import PageParams
+from utils.serialization import fast_response
 
 router = APIRouter(prefix="/service_reviews", tags=["ServiceReview"])
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-@validateuser
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(validateuser)])
 async def create(service_review: ServiceReview, request: Request):
     return await controller.create_service_review(service_review)
 
-@router.get("/", response_model=list[ServiceReview])
-@validateuser
-async def get_all(request: Request):
-    return await controller.get_all_service_reviews()
+@router.get("/", response_model=Page[ServiceReview], dependencies=[Depends(validateuser)])
+async def get_all(request: Request, page: PageParams = Depends()):
+    return fast_response(await controller.get_all_service_reviews(page))
 
-@router.get("/{review_id}", response_model=ServiceReview)
-@validateuser
+@router.get("/{review_id}", response_model=ServiceReview, dependencies=[Depends(validateuser)])
 async def get_by_id(review_id: str, request: Request):
-    return await controller.get_service_review_by_id(review_id)
+    return fast_response(await controller.get_service_review_by_id(review_id))
 
-@router.delete("/{review_id}")
-@validateuser
+@router.delete("/{review_id}", dependencies=[Depends(validateuser)])
 async def delete_by_id(review_id: str, request: Request):
     return await controller.delete_service_review(review_id)
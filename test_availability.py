@@ -0,0 +1,115 @@
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+
+from controllers import availability
+from controllers.availability import SLOT_MINUTES, _merge, slots_between
+
+
+def test_slots_cover_partial_blocks():
+    start = datetime(2030, 1, 1, 10, 5)
+    slots = slots_between(start, start + timedelta(minutes=SLOT_MINUTES))
+    assert slots[0] == datetime(2030, 1, 1, 10, 0)
+    assert len(slots) == 2  # 10:05 + 15 min toca dos bloques
+
+def test_slots_accept_aware_datetimes():
+    aware = datetime(2030, 1, 1, 6, 0, tzinfo=timezone(timedelta(hours=-4)))
+    assert slots_between(aware, aware + timedelta(minutes=1)) == [datetime(2030, 1, 1, 10, 0)]
+
+def test_merge_contiguous_slots():
+    step = timedelta(minutes=SLOT_MINUTES)
+    t = datetime(2030, 1, 1, 10, 0)
+    merged = _merge([t, t + step, t + 3 * step])
+    assert merged == [
+        {"start": t, "end": t + 2 * step},
+        {"start": t + 3 * step, "end": t + 4 * step},
+    ]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeServices:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None, session=None):
+        return FakeCursor(self.docs)
+
+
+class FakeSlots:
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.inserted = []
+        self.index_checks = 0
+
+    async def index_information(self):
+        self.index_checks += 1
+        return self.indexes
+
+    def find(self, query, projection=None, session=None):
+        return FakeCursor([])
+
+    async def insert_many(self, docs, ordered=True, session=None):
+        self.inserted += docs
+
+
+@pytest.fixture
+def reservation(monkeypatch):
+    provider, service_id = ObjectId(), ObjectId()
+    services = FakeServices([{"_id": service_id, "created_by": provider, "estimated_duration": 30}])
+    monkeypatch.setattr(availability, "services_coll", services)
+    monkeypatch.setattr(availability, "_slot_index_ok", False)
+    res = {"_id": ObjectId(), "reservation_date": datetime(2030, 1, 1, 10, 0), "status": "pending"}
+    links = [{"_id": ObjectId(), "id_reservation": res["_id"], "id_service_offering": service_id, "quantity": 1}]
+
+    def sync(slots):
+        monkeypatch.setattr(availability, "slots_coll", slots)
+        return asyncio.run(availability.sync_reservation(res["_id"], reservation=res, links=links))
+
+    return sync
+
+def test_writes_are_refused_without_the_unique_slot_index(reservation):
+    for indexes in ({}, {"provider_1_slot_1": {"key": [("provider", 1), ("slot", 1)]}}):  # falta o no es único
+        slots = FakeSlots(indexes)
+        with pytest.raises(HTTPException) as exc:
+            reservation(slots)
+        assert exc.value.status_code == 503 and slots.inserted == []
+
+def test_slot_index_is_checked_once(reservation):
+    slots = FakeSlots({"provider_1_slot_1": {"key": [("provider", 1), ("slot", 1)], "unique": True}})
+    reservation(slots)
+    reservation(slots)
+    assert len(slots.inserted) == 4 and slots.index_checks == 1
+
+def test_startup_fails_without_the_slot_index(monkeypatch):
+    import main
+
+    async def failing():
+        raise ConnectionError("sin permisos para createIndexes")
+
+    async def never(*args, **kwargs):
+        raise AssertionError("no debería arrancar el warm-up")
+
+    monkeypatch.setattr(main, "ensure_required_indexes", failing)
+    monkeypatch.setattr(main, "_warm_up", never)
+
+    async def scenario():
+        async with main.lifespan(FastAPI()):
+            pass
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(scenario())
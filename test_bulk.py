@@ -0,0 +1,56 @@
+import asyncio
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from utils.bulk import BulkReport, insert_reported
+
+
+class FakeCollection:
+    """insert_many que rechaza por clave duplicada los _id de `taken`."""
+
+    def __init__(self, taken: set):
+        self.taken = taken
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered, session=None):
+        errors = []
+        for pos, doc in enumerate(docs):
+            if doc["_id"] in self.taken:
+                errors.append({"index": pos, "code": 11000, "errmsg": "E11000 duplicate key"})
+                if ordered:
+                    break
+                continue
+            self.inserted.append(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def _run(ordered: bool, invalid: int | None = None) -> tuple[dict, FakeCollection]:
+    docs = [{"_id": ObjectId()} for _ in range(4)]
+    coll = FakeCollection(taken={docs[2]["_id"]})
+    report = BulkReport(len(docs), ordered)
+    if invalid is not None:
+        report.fail(invalid, 400, "inválido")
+    asyncio.run(insert_reported(coll, list(enumerate(docs)), report))
+    return report.result(), coll
+
+def _statuses(result: dict) -> list[int]:
+    return [item["status"] for item in result["items"]]
+
+def test_unordered_reports_each_item():
+    result, coll = _run(ordered=False, invalid=1)
+    assert _statuses(result) == [201, 400, 409, 201]
+    assert result["succeeded"] == 2 and result["failed"] == 2
+    assert len(coll.inserted) == 2
+
+def test_ordered_stops_at_write_error():
+    result, coll = _run(ordered=True)
+    assert _statuses(result) == [201, 201, 409, 424]
+    assert len(coll.inserted) == 2
+
+def test_ordered_validation_error_skips_rest():
+    # el índice 1 falla en la validación: solo se escribe el 0
+    result, coll = _run(ordered=True, invalid=1)
+    assert _statuses(result) == [201, 400, 424, 424]
+    assert len(coll.inserted) == 1
@@ -0,0 +1,191 @@
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from controllers import profession as profession_controller
+from controllers import profession_catalog as catalog_module
+from routes import public_profession
+from utils.cache import MemoryCache
+
+
+def test_tag_invalidation():
+    async def scenario():
+        cache = MemoryCache()
+        await cache.set("a", {"x": 1}, tags=("profession",))
+        await cache.set("b", {"x": 2}, tags=("service_offering",))
+        await cache.invalidate_tags("profession")
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(scenario()) == (None, {"x": 2})
+
+def test_load_racing_with_invalidation_is_not_cached():
+    async def scenario():
+        cache = MemoryCache()
+
+        async def slow_loader():
+            await asyncio.sleep(0.01)
+            return ["viejo"]
+
+        task = asyncio.create_task(cache.get_or_load("k", slow_loader, tags=("profession",)))
+        await asyncio.sleep(0)
+        await cache.invalidate_tags("profession")
+        assert await task == ["viejo"]
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
+
+def test_lru_eviction_and_copies():
+    oid = ObjectId()
+
+    async def scenario():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", [{"_id": oid}])
+        await cache.set("b", 1)
+        (await cache.get("a"))[0]["_id"] = None  # modificar la copia no altera la entrada
+        await cache.set("c", 2)  # expulsa "b" ("a" se usó más recientemente)
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(scenario()) == ([{"_id": oid}], None)
+
+class CountingCache(MemoryCache):
+    def __init__(self):
+        super().__init__()
+        self.version_checks = 0
+
+    async def tag_versions(self, tags):
+        self.version_checks += 1
+        return await super().tag_versions(tags)
+
+def test_catalog_checks_tag_version_at_most_once_per_interval(monkeypatch):
+    cache = CountingCache()
+    monkeypatch.setattr(catalog_module, "get_cache", lambda: cache)
+    oid = ObjectId()
+
+    async def scenario():
+        catalog = catalog_module.ProfessionCatalog(ttl_seconds=60, check_seconds=60)
+
+        async def load(listing):
+            return [{"_id": oid, "name": "Plomero"}]
+
+        catalog._load = load
+        await catalog.get(oid)
+        first_load = cache.version_checks
+        for _ in range(19):
+            assert (await catalog.get(oid))["name"] == "Plomero"
+        in_memory = cache.version_checks - first_load
+        # al vencer el intervalo vuelve a consultar la versión (una vez)
+        catalog.check_interval = 0
+        await catalog.by_id()
+        return in_memory, cache.version_checks - first_load - in_memory
+
+    in_memory, after_interval = asyncio.run(scenario())
+    assert in_memory == 0
+    assert after_interval == 1
+
+def test_listing_loader_reads_primary_after_a_write():
+    async def scenario():
+        cache = MemoryCache()
+        calls = []
+
+        async def loader(listing):
+            calls.append(listing)
+            return {"listing": listing}
+
+        await cache.get_or_load_listing("k", loader, tags=("profession",))  # primera carga
+        await cache.delete("k")  # vence el TTL sin escrituras
+        await cache.get_or_load_listing("k", loader, tags=("profession",))
+        await cache.invalidate_tags("profession")  # escritura
+        await cache.get_or_load_listing("k", loader, tags=("profession",))
+        return calls
+
+    assert asyncio.run(scenario()) == [False, True, False]
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return [dict(d) for d in self.docs]
+
+class FakeAggregateCollection:
+    name = "profession"
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = 0
+
+    async def aggregate(self, pipeline, **kwargs):
+        self.calls += 1
+        return FakeCursor(self.docs)
+
+def test_post_write_listing_is_not_cached_stale(monkeypatch):
+    cache = MemoryCache()
+    primary = FakeAggregateCollection([{"name": "Plomero", "services": 1}])
+    secondary = FakeAggregateCollection([{"name": "Plomero", "services": 1}])
+    monkeypatch.setattr(profession_controller, "get_cache", lambda: cache)
+    monkeypatch.setattr(profession_controller, "coll", primary)
+    monkeypatch.setattr(profession_controller, "coll_listing", secondary)
+
+    async def scenario():
+        await profession_controller.professions_with_service_count(None)
+        await cache.delete("profession:with_service_count")  # TTL vencido: del secundario
+        await profession_controller.professions_with_service_count(None)
+        assert secondary.calls == 1
+
+        # Escritura en el primario; el secundario todavía no la replicó
+        primary.docs = [{"name": "Plomería", "services": 1}]
+        await cache.invalidate_tags("profession")
+        after_write = await profession_controller.professions_with_service_count(None)
+        cached = await profession_controller.professions_with_service_count(None)
+        return after_write, cached
+
+    after_write, cached = asyncio.run(scenario())
+    assert after_write == cached == [{"name": "Plomería", "services": 1}]
+    assert secondary.calls == 1
+
+def test_public_etag_changes_with_the_served_catalog(monkeypatch):
+    cache = MemoryCache()
+    monkeypatch.setattr(catalog_module, "get_cache", lambda: cache)
+    db = [{"_id": ObjectId(), "name": "Plomero", "active": True}]
+
+    def worker():
+        catalog = catalog_module.ProfessionCatalog(ttl_seconds=60, check_seconds=60)
+
+        async def load(listing):
+            return [dict(d) for d in db]
+
+        catalog._load = load
+        return catalog
+
+    writer, reader = worker(), worker()
+    app = FastAPI()
+    app.include_router(public_profession.router)
+    client = TestClient(app)
+
+    def get(catalog, etag=None):
+        monkeypatch.setattr(public_profession, "profession_catalog", catalog)
+        return client.get("/public/professions", headers={"If-None-Match": etag} if etag else {})
+
+    old = get(reader)
+    assert get(writer).headers["etag"] == old.headers["etag"]  # mismos datos, mismo ETag
+
+    # El writer renombra e invalida; el reader sigue con su copia (dentro del intervalo)
+    db[0]["name"] = "Fontanero"
+    asyncio.run(writer.invalidate())
+    new = get(writer)
+    assert new.json()["items"][0]["name"] == "Fontanero" and new.headers["etag"] != old.headers["etag"]
+    stale = get(reader)
+    assert stale.json() == old.json() and stale.headers["etag"] == old.headers["etag"]
+    assert get(reader, new.headers["etag"]).status_code == 200  # nunca 304 con el cuerpo viejo
+
+    # Al vencer el intervalo el reader recarga: cuerpo y ETag nuevos a la vez
+    reader.check_interval = 0
+    fresh = get(reader, old.headers["etag"])
+    assert fresh.status_code == 200 and fresh.json() == new.json() and fresh.headers["etag"] == new.headers["etag"]
+    assert get(reader, new.headers["etag"]).status_code == 304
@@ -0,0 +1,218 @@
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+import controllers.profession as profession_controller
+import controllers.service_offering as service_controller
+import routes.profession as profession_routes
+import routes.service_offering as service_routes
+from controllers.profession_catalog import ProfessionCatalog
+from models.service_offering import ServiceOffering
+from routes import public_profession
+from utils import cache as cache_module
+from utils import http_cache
+from utils.cache import MemoryCache
+from utils.http_cache import etag_matches
+from utils.security import validateuser
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    """Lo mínimo de AsyncCollection que usan http_cache y los controladores probados."""
+
+    def __init__(self, docs=None):
+        self.docs = {doc["_id"]: doc for doc in docs or []}
+
+    def _match(self, doc, query):
+        for key, cond in query.items():
+            if isinstance(cond, dict) and "$in" in cond:
+                if doc.get(key) not in cond["$in"]:
+                    return False
+            elif isinstance(cond, dict) and "$ne" in cond:
+                if doc.get(key) == cond["$ne"]:
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    def find(self, query):
+        return FakeCursor([d for d in self.docs.values() if self._match(d, query)])
+
+    async def find_one(self, query, **kwargs):
+        return next((dict(d) for d in self.docs.values() if self._match(d, query)), None)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs[doc["_id"]] = dict(doc)  # como Mongo: el llamador puede modificar el suyo
+        return type("InsertOneResult", (), {"inserted_id": doc["_id"]})
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        doc = await self.find_one(query)
+        if doc is None:
+            if not upsert:
+                return
+            doc = dict(query)
+        for key, value in update.get("$set", {}).items():
+            doc[key] = value
+        for key, value in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + value
+        self.docs[doc["_id"]] = doc
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        await self.update_one(query, update)
+        return await self.find_one(query)
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    fake = FakeCollection()
+    monkeypatch.setattr(http_cache, "_versions", fake)
+    return fake
+
+
+@pytest.fixture
+def professions(monkeypatch):
+    """Colección de profesiones de la que leen el controlador y el catálogo público."""
+    fake = FakeCollection()
+    catalog = ProfessionCatalog(ttl_seconds=60, check_seconds=0)
+
+    async def load(listing):
+        return [dict(d) for d in fake.docs.values()]
+
+    catalog._load = load
+    monkeypatch.setattr(cache_module, "_cache", MemoryCache())
+    monkeypatch.setattr(profession_controller, "coll", fake)
+    for module in (profession_controller, service_controller, public_profession):
+        monkeypatch.setattr(module, "profession_catalog", catalog)
+    return fake
+
+
+@pytest.fixture
+def client(versions, professions, monkeypatch):
+    """Routers reales (mismas dependencias conditional_get que producción), sin JWT."""
+    async def empty_page(*args, **kwargs):
+        return {"items": [], "next": None}
+
+    monkeypatch.setattr(profession_controller, "get_all_professions", empty_page)
+    monkeypatch.setattr(service_controller, "list_services_active", empty_page)
+
+    async def fake_user(request: Request):
+        request.state.id = str(ObjectId())
+        request.state.admin = False
+
+    app = FastAPI()
+    for router in (profession_routes.router, service_routes.router, public_profession.router):
+        app.include_router(router)
+    app.dependency_overrides[validateuser] = fake_user
+    return TestClient(app)
+
+
+def test_if_none_match_returns_304(client):
+    r = client.get("/profession/")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "private, no-cache"
+
+    r = client.get("/profession/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+def test_etag_depends_on_query_string(client):
+    a = client.get("/profession/?include_inactive=true").headers["etag"]
+    b = client.get("/profession/").headers["etag"]
+    assert a != b
+
+def test_public_endpoint_is_cacheable(client):
+    r = client.get("/public/professions")
+    assert r.headers["cache-control"].startswith("public, max-age=")
+
+def test_etag_matches():
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+def test_create_profession_invalidates_etag(client):
+    etag = client.get("/profession/").headers["etag"]
+    public_etag = client.get("/public/professions").headers["etag"]
+    service_etag = client.get("/service_offering/").headers["etag"]
+
+    assert client.post("/profession/", json={"name": "Plomero"}).status_code == 200
+
+    r = client.get("/profession/", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    # el ETag público es el hash del catálogo servido: cambia junto con el cuerpo
+    r = client.get("/public/professions", headers={"If-None-Match": public_etag})
+    assert r.status_code == 200 and [p["name"] for p in r.json()["items"]] == ["Plomero"]
+    assert client.get("/public/professions", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    # una profesión nueva no tiene servicios: la lista de servicios sigue vigente
+    # (los renombres le llegan como cambios de service_offering, ver utils/profession_sync.py)
+    r = client.get("/service_offering/", headers={"If-None-Match": service_etag})
+    assert r.status_code == 304
+
+def test_update_service_invalidates_etag(client, monkeypatch):
+    owner, prof_id, service_id = ObjectId(), ObjectId(), ObjectId()
+    services = FakeCollection([{"_id": service_id, "id_profession": prof_id, "created_by": owner, "active": True}])
+    monkeypatch.setattr(service_controller, "col", services)
+
+    monkeypatch.setattr(service_controller, "professions", FakeCollection([{"_id": prof_id, "name": "Plomero", "active": True}]))
+
+    profession_etag = client.get("/profession/").headers["etag"]
+    etag = client.get("/service_offering/").headers["etag"]
+    assert client.get("/service_offering/", headers={"If-None-Match": etag}).status_code == 304
+
+    service = ServiceOffering(id_profession=str(prof_id), description="Arreglo", estimated_price=10, estimated_duration=30)
+    updated = asyncio.run(service_controller.update_service(str(service_id), service, actor_id=str(owner), is_admin=False))
+    assert updated["profession_name"] == "Plomero" and updated["description"] == "Arreglo"
+
+    r = client.get("/service_offering/", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    # las profesiones no dependen de service_offering
+    assert client.get("/profession/", headers={"If-None-Match": profession_etag}).status_code == 304
+
+def test_update_service_by_non_owner_is_rejected(client, monkeypatch):
+    owner, prof_id, service_id = ObjectId(), ObjectId(), ObjectId()
+    services = FakeCollection([{"_id": service_id, "id_profession": prof_id, "created_by": owner, "active": True}])
+    monkeypatch.setattr(service_controller, "col", services)
+
+    monkeypatch.setattr(service_controller, "professions", FakeCollection([{"_id": prof_id, "name": "Plomero", "active": True}]))
+    etag = client.get("/service_offering/").headers["etag"]
+
+    service = ServiceOffering(id_profession=str(prof_id), description="Arreglo", estimated_price=10, estimated_duration=30)
+    for target, status in ((service_id, 403), (ObjectId(), 404)):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(service_controller.update_service(str(target), service, actor_id=str(ObjectId()), is_admin=False))
+        assert exc.value.status_code == status
+
+    assert services.docs[service_id]["created_by"] == owner and "description" not in services.docs[service_id]
+    assert client.get("/service_offering/", headers={"If-None-Match": etag}).status_code == 304
+
+def test_service_copies_the_profession_from_the_primary(client, professions, monkeypatch):
+    prof_id, owner = ObjectId(), ObjectId()
+    professions.docs[prof_id] = {"_id": prof_id, "name": "Plomero", "active": True}
+    monkeypatch.setattr(service_controller, "professions", professions)
+    monkeypatch.setattr(service_controller, "col", FakeCollection())
+    asyncio.run(service_controller.profession_catalog.get(prof_id))  # el catálogo queda con "Plomero"
+
+    # renombrada en otro worker: este catálogo todavía no lo sabe
+    professions.docs[prof_id] = {**professions.docs[prof_id], "name": "Fontanero"}
+    assert asyncio.run(service_controller.profession_catalog.get(prof_id))["name"] == "Plomero"
+
+    service = ServiceOffering(id_profession=str(prof_id), description="Arreglo", estimated_price=10, estimated_duration=30)
+    created = asyncio.run(service_controller.create_service(service, actor_id=str(owner)))
+    assert created["profession_name"] == "Fontanero"
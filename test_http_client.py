@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils import http_client
+
+
+def _client_with(handler, monkeypatch):
+    calls = []
+
+    def recording(request):
+        calls.append(request)
+        return handler(len(calls), request)
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(recording)))
+    return calls
+
+
+def _post():
+    return asyncio.run(http_client.post_json("https://auth.test/v1/accounts:signInWithPassword", {"email": "a@b.co"}))
+
+
+@pytest.mark.parametrize("error", [httpx.ConnectError, httpx.ReadTimeout])
+def test_transient_error_is_retried(monkeypatch, error):
+    monkeypatch.setattr(http_client, "HTTP_RETRIES", 1)
+
+    def handler(attempt, request):
+        if attempt == 1:
+            raise error("falla transitoria", request=request)
+        return httpx.Response(200, json={"idToken": "x"})
+
+    calls = _client_with(handler, monkeypatch)
+    assert _post().json() == {"idToken": "x"}
+    assert len(calls) == 2
+    assert calls[0].read() == calls[1].read()  # mismo cuerpo en el reintento
+
+def test_gives_up_after_retries(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_RETRIES", 2)
+
+    def handler(attempt, request):
+        raise httpx.ConnectError("sin red", request=request)
+
+    calls = _client_with(handler, monkeypatch)
+    with pytest.raises(httpx.ConnectError):
+        _post()
+    assert len(calls) == 3
+
+def test_http_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_RETRIES", 3)
+    calls = _client_with(lambda attempt, request: httpx.Response(400, json={"error": {"message": "INVALID_PASSWORD"}}), monkeypatch)
+    assert _post().status_code == 400
+    assert len(calls) == 1
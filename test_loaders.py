@@ -0,0 +1,63 @@
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+from bson import ObjectId
+
+from utils.loaders import BatchLoader
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, ids, fail=False):
+        self.ids = set(ids)
+        self.fail = fail
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query["_id"]["$in"])
+        if self.fail:
+            raise ConnectionError("sin conexión")
+        return FakeCursor([{"_id": _id} for _id in query["_id"]["$in"] if _id in self.ids])
+
+
+def test_same_tick_lookups_share_one_query():
+    a, b, missing = ObjectId(), ObjectId(), ObjectId()
+    coll = FakeCollection([a, b])
+
+    async def scenario():
+        loader = BatchLoader(coll)
+        results = await asyncio.gather(loader.exists(a), loader.exists(missing), loader.exists(b), loader.exists(a))
+        # ya memorizados: no vuelve a consultar
+        again = await loader.existing([a, missing])
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert results == [True, False, True, True]
+    assert again == {a}
+    assert len(coll.queries) == 1 and sorted(coll.queries[0]) == sorted([a, missing, b])
+
+def test_errors_are_not_memoized():
+    _id = ObjectId()
+    coll = FakeCollection([_id], fail=True)
+
+    async def scenario():
+        loader = BatchLoader(coll)
+        try:
+            await loader.exists(_id)
+        except ConnectionError:
+            pass
+        coll.fail = False
+        return await loader.exists(_id)
+
+    assert asyncio.run(scenario()) is True
+    assert len(coll.queries) == 2
@@ -0,0 +1,61 @@
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from utils.mongodb import POOL_PRESETS, _ENV_OPTIONS, pool_settings
+from utils import security
+from utils.security import create_jwt_token
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("MONGO_PROFILE", *_ENV_OPTIONS):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_default_profile_is_production():
+    assert pool_settings() == POOL_PRESETS["production"]
+
+def test_development_preset_drops_empty_compressors(monkeypatch):
+    monkeypatch.setenv("MONGO_PROFILE", "development")
+    settings = pool_settings()
+    assert "compressors" not in settings
+    assert settings["maxPoolSize"] == POOL_PRESETS["development"]["maxPoolSize"]
+
+def test_env_overrides_are_cast_and_empty_values_ignored(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "250")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "750")
+    monkeypatch.setenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "")
+    settings = pool_settings()
+    assert settings["maxPoolSize"] == 250 and settings["waitQueueTimeoutMS"] == 750
+    assert settings["readPreference"] == "secondaryPreferred"
+    assert settings["minPoolSize"] == POOL_PRESETS["production"]["minPoolSize"]
+
+def test_string_override(monkeypatch):
+    monkeypatch.setenv("MONGO_COMPRESSORS", "snappy")
+    assert pool_settings()["compressors"] == "snappy"
+
+@pytest.mark.parametrize("name, value", [("MONGO_PROFILE", "staging"), ("MONGO_MAX_POOL_SIZE", "cien")])
+def test_invalid_values_fail_fast(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError):
+        pool_settings()
+
+def test_pool_metrics_require_admin(monkeypatch):
+    import main
+
+    monkeypatch.setattr(security, "SECRET_KEY", "test-secret-key-de-al-menos-32-bytes")
+    client = TestClient(main.app)
+
+    def token(admin):
+        return create_jwt_token(id="u1", firstname="a", lastname="b", email="a@b.co", active=True, admin=admin)
+
+    assert client.get("/metrics/mongo-pool").status_code == 401
+    assert client.get("/metrics/mongo-pool", headers={"Authorization": f"Bearer {token(False)}"}).status_code == 403
+    r = client.get("/metrics/mongo-pool", headers={"Authorization": f"Bearer {token(True)}"})
+    assert r.status_code == 200 and isinstance(r.json(), dict)
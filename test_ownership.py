@@ -0,0 +1,237 @@
+import asyncio
+import os
+from datetime import datetime
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from controllers import reservation as reservation_controller
+from controllers import reservation_service as link_controller
+from controllers import review as review_controller
+from models.reservation import Reservation
+from models.reservation_service import ReservationService
+from models.review import Review
+from utils.ownership import check_owner, guarded_write, owned_by
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.lookups = 0
+
+    def _find(self, query):
+        return next((d for d in self.docs.values() if all(d.get(k) == v for k, v in query.items())), None)
+
+    async def find_one(self, query, projection=None, session=None):
+        self.lookups += 1
+        return self._find(query)
+
+    async def find_one_and_update(self, query, update, session=None):
+        doc = self._find(query)
+        if doc is not None:
+            doc.update(update["$set"])
+        return doc
+
+
+def _write(coll, _id, actor):
+    return asyncio.run(guarded_write(
+        coll, "find_one_and_update", _id, {"$set": {"note": "x"}},
+        owner_field="id_user", actor=actor, not_found="No existe",
+    ))
+
+def test_owner_writes_without_extra_lookup():
+    owner, _id = ObjectId(), ObjectId()
+    coll = FakeCollection([{"_id": _id, "id_user": owner}])
+    assert _write(coll, _id, owner)["note"] == "x"
+    assert coll.lookups == 0
+
+@pytest.mark.parametrize("existing, status", [(True, 403), (False, 404)])
+def test_miss_is_explained_with_one_lookup(existing, status):
+    _id = ObjectId()
+    coll = FakeCollection([{"_id": _id, "id_user": ObjectId()}] if existing else [])
+    with pytest.raises(HTTPException) as exc:
+        _write(coll, _id, ObjectId())
+    assert exc.value.status_code == status
+    assert coll.lookups == 1
+    assert all("note" not in doc for doc in coll.docs.values())
+
+def test_admin_skips_owner_condition():
+    _id = ObjectId()
+    assert owned_by(_id, "id_user", None) == {"_id": _id}
+
+def test_check_owner():
+    actor = ObjectId()
+    check_owner(actor, actor)
+    check_owner(ObjectId(), None)  # admin
+    with pytest.raises(HTTPException) as exc:
+        check_owner(ObjectId(), actor)
+    assert exc.value.status_code == 403
+
+
+async def _no_db(*args, **kwargs):
+    raise AssertionError("no debería consultar la base")
+
+def test_create_on_behalf_of_another_user_is_rejected(monkeypatch):
+    monkeypatch.setattr(reservation_controller, "exists", _no_db)
+    monkeypatch.setattr(review_controller, "exists", _no_db)
+    actor, other = str(ObjectId()), str(ObjectId())
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(reservation_controller.create_reservation(
+            Reservation(id_user=other, reservation_date=datetime(2030, 1, 1)), actor_id=actor, is_admin=False))
+    assert exc.value.status_code == 403
+
+    review = Review(id_usuario=other, id_service_offering=str(ObjectId()), opinion="bien", rating=4)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(review_controller.create_review(review, actor_id=actor, is_admin=False))
+    assert exc.value.status_code == 403
+
+
+class FakeInsertCollection:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered, session=None):
+        self.inserted += docs
+
+def test_bulk_create_rejects_items_of_other_users(monkeypatch):
+    actor, other = ObjectId(), ObjectId()
+    coll = FakeInsertCollection()
+
+    async def users(collection, ids):
+        return set(ids)
+
+    monkeypatch.setattr(reservation_controller, "existing", users)
+    monkeypatch.setattr(reservation_controller, "collection", coll)
+    items = [Reservation(id_user=str(uid), reservation_date=datetime(2030, 1, 1)) for uid in (actor, other, actor)]
+    result = asyncio.run(reservation_controller.create_reservations_bulk(items, False, actor_id=str(actor), is_admin=False))
+
+    assert [item["status"] for item in result["items"]] == [201, 403, 201]
+    assert [doc["id_user"] for doc in coll.inserted] == [actor, actor]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeLinks:
+    """reservation_service / reservations: find por $in, find_one por _id, escrituras registradas."""
+
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.writes = []
+
+    def find(self, query, projection=None):
+        key, cond = next(iter(query.items()))
+        values = cond["$in"] if isinstance(cond, dict) else [cond]
+        return FakeCursor([d for d in self.docs.values() if d.get(key) in values])
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    async def insert_one(self, doc):
+        self.writes.append(doc)
+
+    async def insert_many(self, docs, ordered, session=None):
+        self.writes += docs
+
+    async def bulk_write(self, ops, ordered, session=None):
+        self.writes += [op._filter["_id"] for op in ops]
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        self.writes.append(update)
+        return {**self.docs[query["_id"]], **update["$set"]}
+
+
+@pytest.fixture
+def links(monkeypatch):
+    actor, other = ObjectId(), ObjectId()
+    mine, theirs = ObjectId(), ObjectId()
+    reservations = FakeLinks([{"_id": mine, "id_user": actor}, {"_id": theirs, "id_user": other}])
+    coll = FakeLinks()
+
+    async def found(collection, ids):
+        return set(ids)
+
+    async def one_found(collection, _id):
+        return True
+
+    async def no_sync(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(link_controller, "reservations", reservations)
+    monkeypatch.setattr(link_controller, "coll", coll)
+    monkeypatch.setattr(link_controller, "existing", found)
+    monkeypatch.setattr(link_controller, "exists", one_found)
+    monkeypatch.setattr(link_controller, "sync_reservation", no_sync)
+    return str(actor), mine, theirs, coll
+
+
+def _link(rid):
+    return ReservationService(id_reservation=str(rid), id_service_offering=str(ObjectId()), quantity=1)
+
+@pytest.mark.parametrize("is_admin", [False, True])
+def test_link_to_another_users_reservation_is_rejected(links, is_admin):
+    actor, mine, theirs, coll = links
+    asyncio.run(link_controller.create_reservation_service(_link(mine), actor_id=actor, is_admin=is_admin))
+    if is_admin:
+        asyncio.run(link_controller.create_reservation_service(_link(theirs), actor_id=actor, is_admin=True))
+    else:
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(link_controller.create_reservation_service(_link(theirs), actor_id=actor, is_admin=False))
+        assert exc.value.status_code == 403
+    assert [doc["id_reservation"] for doc in coll.writes] == ([mine, theirs] if is_admin else [mine])
+
+def test_bulk_links_report_other_users_reservations(links):
+    actor, mine, theirs, coll = links
+    items = [_link(mine), _link(theirs), _link(ObjectId())]
+    result = asyncio.run(link_controller.create_reservation_services_bulk(items, False, actor_id=actor, is_admin=False))
+    assert [item["status"] for item in result["items"]] == [201, 403, 404]
+    assert [doc["id_reservation"] for doc in coll.writes] == [mine]
+
+def test_link_cannot_be_moved_from_or_to_another_users_reservation(links):
+    actor, mine, theirs, coll = links
+    own_link, their_link = ObjectId(), ObjectId()
+    for _id, rid in ((own_link, mine), (their_link, theirs)):
+        coll.docs[_id] = {"_id": _id, "id_reservation": rid, "id_service_offering": ObjectId()}
+
+    for _id, target in ((own_link, theirs), (their_link, mine)):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(link_controller.update_reservation_service(str(_id), _link(target), actor_id=actor, is_admin=False))
+        assert exc.value.status_code == 403
+    assert coll.writes == []
+
+    updated = asyncio.run(link_controller.update_reservation_service(str(own_link), _link(mine), actor_id=actor, is_admin=False))
+    assert updated.id_reservation == str(mine)
+
+def test_bulk_link_update_checks_each_item(links, monkeypatch):
+    actor, mine, theirs, coll = links
+    own, own_too, their_link = ObjectId(), ObjectId(), ObjectId()
+    for _id, rid in ((own, mine), (own_too, mine), (their_link, theirs)):
+        coll.docs[_id] = {"_id": _id, "id_reservation": rid, "id_service_offering": ObjectId(), "quantity": 1}
+    synced = []
+
+    async def record_sync(rid, links=None, **kwargs):
+        synced.append(sorted((link["_id"], link["quantity"]) for link in links))
+
+    monkeypatch.setattr(link_controller, "sync_reservation", record_sync)
+
+    def item(_id, rid, quantity=2):
+        return ReservationService(id=str(_id), id_reservation=str(rid), id_service_offering=str(ObjectId()), quantity=quantity)
+
+    items = [item(own, mine), item(their_link, theirs), item(own, theirs), item(ObjectId(), mine), item(own_too, mine, 3)]
+    items.append(ReservationService(id="x", id_reservation=str(mine), id_service_offering=str(ObjectId()), quantity=1))
+    result = asyncio.run(link_controller.update_reservation_services_bulk(items, False, actor_id=actor, is_admin=False))
+
+    assert [item["status"] for item in result["items"]] == [200, 403, 403, 404, 200, 400]
+    assert coll.writes == [own, own_too]
+    # el segundo cambio sobre la misma reservación ve el primero (aún sin escribir)
+    assert synced == [sorted([(own, 2), (own_too, 1)]), sorted([(own, 2), (own_too, 3)])]
@@ -0,0 +1,32 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from utils.pagination import PageParams, decode_cursor, encode_cursor, keyset_filter, make_page
+
+
+def test_cursor_roundtrip():
+    oid = ObjectId()
+    assert decode_cursor(encode_cursor(oid)) == oid
+    assert decode_cursor(encode_cursor(str(oid))) == oid
+    assert decode_cursor(None) is None
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("no-es-un-cursor")
+    assert e.value.status_code == 400
+
+def test_make_page_trims_extra_document():
+    docs = [{"_id": ObjectId()} for _ in range(3)]
+    page = PageParams(cursor=None, limit=2)
+    items, next_cursor = make_page(docs, page)
+    assert len(items) == 2
+    assert decode_cursor(next_cursor) == docs[1]["_id"]
+
+    items, next_cursor = make_page(docs[:2], page)
+    assert len(items) == 2 and next_cursor is None
+
+def test_keyset_filter():
+    oid = ObjectId()
+    page = PageParams(cursor=encode_cursor(oid), limit=10)
+    assert keyset_filter({"active": True}, page) == {"active": True, "_id": {"$gt": oid}}
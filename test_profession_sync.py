@@ -0,0 +1,147 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from bson import ObjectId
+from pymongo.results import UpdateResult
+
+from utils import profession_sync
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict) and "$ne" in cond:
+            if doc.get(key) == cond["$ne"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.on_update = None  # hook para simular escrituras concurrentes
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs.values() if _matches(d, query)), None)
+
+    async def update_one(self, query, update, upsert=False):
+        if self.on_update:
+            hook, self.on_update = self.on_update, None
+            await hook()
+        doc = next((d for d in self.docs.values() if _matches(d, query)), None)
+        if doc is None and upsert:
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+        if doc is None:
+            return UpdateResult({"n": 0, "nModified": 0}, True)
+        doc.update(update["$set"])
+        return UpdateResult({"n": 1, "nModified": 1}, True)
+
+    async def update_many(self, query, update):
+        hits = [d for d in self.docs.values() if _matches(d, query)]
+        for doc in hits:
+            doc.update(update["$set"])
+        return UpdateResult({"n": len(hits), "nModified": len(hits)}, True)
+
+
+@pytest.fixture
+def colls(monkeypatch):
+    pid, other = ObjectId(), ObjectId()
+    services = FakeCollection([
+        {"_id": ObjectId(), "id_profession": pid, "profession_name": "Plomero", "profession_active": True},
+        {"_id": ObjectId(), "id_profession": pid},  # anterior a la desnormalización
+        {"_id": ObjectId(), "id_profession": pid, "profession_name": "Plomería", "profession_active": True},
+        {"_id": ObjectId(), "id_profession": other, "profession_name": "Electricista", "profession_active": True},
+    ])
+    jobs = FakeCollection()
+    invalidated = []
+
+    async def fake_changed():
+        invalidated.append(True)
+
+    monkeypatch.setattr(profession_sync, "services_coll", services)
+    monkeypatch.setattr(profession_sync, "jobs_coll", jobs)
+    monkeypatch.setattr(profession_sync, "_services_changed", fake_changed)
+    return pid, services, jobs, invalidated
+
+
+def _names(services, pid):
+    return sorted(d.get("profession_name") for d in services.docs.values() if d["id_profession"] == pid)
+
+
+def test_run_updates_only_stale_services_and_records_lag(colls):
+    pid, services, jobs, invalidated = colls
+
+    async def scenario():
+        await profession_sync.enqueue({"_id": pid, "name": "Plomería", "active": True})
+        await asyncio.gather(*profession_sync._tasks)
+
+    asyncio.run(scenario())
+    assert _names(services, pid) == ["Plomería"] * 3
+    job = jobs.docs[pid]
+    assert job["done"] and job["modified"] == 2 and job["lag_seconds"] >= 0
+    assert invalidated == [True]
+    # otra profesión intacta
+    assert sum(d.get("profession_name") == "Electricista" for d in services.docs.values()) == 1
+    # ya aplicado: no hay nada pendiente
+    assert asyncio.run(profession_sync.run(pid)) is None
+
+
+def test_change_during_run_is_reapplied(colls):
+    pid, services, jobs, _ = colls
+    jobs.docs[pid] = {"_id": pid, "profession_name": "Plomería", "profession_active": True,
+                      "requested_at": datetime.utcnow() - timedelta(seconds=1), "done": False}
+
+    async def renamed_meanwhile():
+        jobs.docs[pid].update({"profession_name": "Fontanería", "profession_active": False, "requested_at": datetime.utcnow()})
+
+    # el cambio llega entre el update_many y el cierre del job
+    jobs.on_update = renamed_meanwhile
+    result = asyncio.run(profession_sync.run(pid))
+
+    assert result["modified"] == 5  # 2 con el primer nombre + 3 con el segundo
+    assert _names(services, pid) == ["Fontanería"] * 3
+    assert all(d["profession_active"] is False for d in services.docs.values() if d["id_profession"] == pid)
+    assert jobs.docs[pid]["done"]
+
+
+@pytest.mark.parametrize("failures, expected", [(2, {"modified": 0, "lag_seconds": 0.0}), (10, None)])
+def test_background_task_retries_and_never_raises(monkeypatch, caplog, failures, expected):
+    calls = []
+
+    async def flaky_run(profession_id):
+        calls.append(profession_id)
+        if len(calls) <= failures:
+            raise ConnectionError("sin conexión")
+        return {"modified": 0, "lag_seconds": 0.0}
+
+    monkeypatch.setattr(profession_sync, "run", flaky_run)
+    monkeypatch.setattr(profession_sync, "SYNC_RETRY_DELAY", 0)
+    result = asyncio.run(profession_sync._run_with_retries(ObjectId()))
+
+    assert result == expected
+    assert len(calls) == min(failures + 1, profession_sync.SYNC_RETRIES + 1)
+    assert any(r.levelname == "ERROR" for r in caplog.records) == (expected is None)
+
+
+def test_job_deleted_during_run_is_not_indexed(colls):
+    pid, services, jobs, invalidated = colls
+    jobs.docs[pid] = {"_id": pid, "profession_name": "Plomería", "profession_active": True,
+                      "requested_at": datetime.utcnow(), "done": False}
+
+    async def deleted_meanwhile():
+        del jobs.docs[pid]
+
+    jobs.on_update = deleted_meanwhile
+    result = asyncio.run(profession_sync.run(pid))
+    assert result["modified"] == 2 and pid not in jobs.docs
+    # lo aplicado queda y los listados se invalidan igual
+    assert _names(services, pid) == ["Plomería"] * 3 and invalidated == [True]
@@ -0,0 +1,48 @@
+import json
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+from utils.query_profiler import redact, redact_pipeline
+
+SECRET = "juan@example.com"
+
+
+def test_match_literals_are_hidden():
+    assert redact({"email": SECRET, "age": {"$gt": 30}, "ref": "$other"}) == {"email": "?", "age": {"$gt": "?"}, "ref": "$other"}
+
+def test_lookup_sub_pipeline_and_expressions_are_redacted():
+    pipeline = [
+        {"$match": {"active": True}},
+        {"$lookup": {
+            "from": "users",
+            "let": {"uid": "$id_user", "tag": {"$literal": SECRET}},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [{"$eq": ["$_id", "$$uid"]}, {"$eq": ["$email", SECRET]}]}}},
+                {"$project": {"name": 1, "_id": 0}},
+            ],
+            "as": "user",
+        }},
+        {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+        {"$addFields": {"vip": {"$cond": [{"$eq": ["$user.email", SECRET]}, "sí", "no"]}}},
+        {"$set": {"label": {"$literal": SECRET}}},
+        {"$group": {"_id": "$user.name", "n": {"$sum": 1}, "hits": {"$sum": {"$cond": [{"$eq": ["$status", SECRET]}, 1, 0]}}}},
+        {"$project": {"id": {"$toString": "$_id"}, "n": 1, "note": {"$concat": ["$_id", SECRET]}}},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": [{"k": SECRET}, "$$ROOT"]}}},
+        {"$facet": {"a": [{"$match": {"email": SECRET}}]}},
+        {"$unionWith": {"coll": "archived", "pipeline": [{"$match": {"email": SECRET}}]}},
+        {"$sort": {"n": -1}},
+    ]
+    shape = redact_pipeline(pipeline)
+    assert SECRET not in json.dumps(shape)
+
+    lookup = shape[1]["$lookup"]
+    assert (lookup["from"], lookup["as"]) == ("users", "user")
+    assert lookup["let"] == {"uid": "$id_user", "tag": {"$literal": "?"}}
+    assert lookup["pipeline"][0] == {"$match": {"$expr": {"$and": [{"$eq": ["$_id", "$$uid"]}, {"$eq": ["$email", "?"]}]}}}
+    # inclusión/exclusión y rutas de campo se conservan
+    assert lookup["pipeline"][1] == {"$project": {"name": 1, "_id": 0}}
+    assert shape[6]["$project"]["id"] == {"$toString": "$_id"} and shape[6]["$project"]["n"] == 1
+    assert shape[2] == pipeline[2] and shape[-1] == {"$sort": {"n": -1}}
+    assert shape[9]["$unionWith"]["coll"] == "archived"
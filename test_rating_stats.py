@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from controllers import review as review_controller
+from models.review import Review
+from utils import rating_stats
+from utils.rating_stats import bucket, to_public
+
+
+def test_bucket_rounds_to_stars():
+    assert [bucket(r) for r in (0, 0.4, 0.5, 4.4, 4.5, 5)] == ["0", "0", "1", "4", "5", "5"]
+
+def test_to_public_fills_histogram_and_mean():
+    out = to_public({"count": 2, "sum": 7.5, "histogram": {"4": 1, "4.0": 0, "3": 1}})
+    assert out["mean"] == 3.75
+    assert out["histogram"] == {"0": 0, "1": 0, "2": 0, "3": 1, "4": 1, "5": 0}
+    assert to_public(None) == {"count": 0, "mean": None, "histogram": {b: 0 for b in "012345"}}
+
+
+class FakeSession:
+    """Aplica las escrituras de la transacción solo si write() termina sin error."""
+
+    def __init__(self, store):
+        self.store = store
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, write):
+        self.pending = []
+        result = await write(self)
+        self.store.extend(self.pending)
+        return result
+
+
+class FakeClient:
+    def __init__(self, store):
+        self.store = store
+
+    def start_session(self):
+        return FakeSession(self.store)
+
+
+class FakeCollection:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+
+    async def insert_one(self, doc, session):
+        session.pending.append((self.name, doc["_id"]))
+
+    async def update_one(self, query, update, upsert, session):
+        if self.fail:
+            raise ConnectionError("sin conexión")
+        session.pending.append((self.name, query["_id"]))
+
+
+@pytest.fixture
+def review_env(monkeypatch):
+    store, changed = [], []
+
+    async def found(collection, _id):
+        return True
+
+    async def rating_changed():
+        changed.append(True)
+
+    monkeypatch.setattr(review_controller, "get_async_mongo_client", lambda: FakeClient(store))
+    monkeypatch.setattr(review_controller, "coll", FakeCollection("reviews"))
+    monkeypatch.setattr(review_controller, "exists", found)
+    monkeypatch.setattr(review_controller, "_rating_changed", rating_changed)
+    return store, changed
+
+
+def _review():
+    return Review(id_usuario=str(ObjectId()), id_service_offering=str(ObjectId()), opinion="bien", rating=4)
+
+
+def test_review_and_stats_are_written_together(review_env, monkeypatch):
+    store, changed = review_env
+    monkeypatch.setattr(rating_stats, "stats_coll", FakeCollection(rating_stats.STATS_COLLECTION))
+    review = _review()
+    review = asyncio.run(review_controller.create_review(review, actor_id=review.id_usuario, is_admin=False))
+    assert [name for name, _ in store] == ["reviews", rating_stats.STATS_COLLECTION]
+    assert store[0][1] == ObjectId(review.id)
+    assert changed == [True]
+
+
+def test_failed_stats_update_rolls_back_the_review(review_env, monkeypatch):
+    store, changed = review_env
+    monkeypatch.setattr(rating_stats, "stats_coll", FakeCollection(rating_stats.STATS_COLLECTION, fail=True))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(review_controller.create_review(_review(), actor_id=None, is_admin=True))
+    assert exc.value.status_code == 500
+    assert store == [] and changed == []
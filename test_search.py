@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+from bson import ObjectId
+
+from controllers import search as search_controller
+from utils.search import normalize, prefix_filter, query_terms, score, search_tokens
+
+
+def test_tokens_fold_case_and_accents():
+    assert search_tokens("Reparación de PC, reparación") == ["de", "pc", "reparacion"]
+    assert normalize("Ñandú MÉDICO") == "ñandu medico"
+
+def test_prefix_filter_escapes_user_input():
+    assert query_terms("a.*( b") == ["a", "b"]
+    regexes = [c["search_tokens"]["$regex"] for c in prefix_filter(["c++"])["$and"]]
+    assert regexes == ["^c\\+\\+"]
+
+def test_score_prefers_exact_words():
+    tokens = search_tokens("Plomero a domicilio")
+    assert score(tokens, ["plomero"]) == 1.0
+    assert score(tokens, ["plom"]) == 0.5
+    assert score(tokens, ["plomero", "gas"]) == 0.5
+
+def test_service_hits_use_denormalized_profession_name(monkeypatch):
+    legacy_prof = ObjectId()
+    docs = [
+        {"_id": ObjectId(), "description": "Plomería", "id_profession": ObjectId(), "profession_name": "Plomero"},
+        {"_id": ObjectId(), "description": "Plomería vieja", "id_profession": legacy_prof},  # sin backfill
+    ]
+    catalog_reads = []
+
+    async def candidates(kind, terms, limit, listing):
+        return [dict(d) for d in docs[:limit]]
+
+    async def by_id():
+        catalog_reads.append(True)
+        return {legacy_prof: {"name": "Fontanero"}}
+
+    monkeypatch.setattr(search_controller, "_candidates", candidates)
+    monkeypatch.setattr(search_controller.profession_catalog, "by_id", by_id)
+
+    hits = asyncio.run(search_controller._hits("service_offering", ["plomeria"], 2, True))
+    assert [h["profession_name"] for h in hits] == ["Plomero", "Fontanero"]
+    assert len(catalog_reads) == 1
+
+    docs.pop()  # todos desnormalizados: sin lectura del catálogo
+    asyncio.run(search_controller._hits("service_offering", ["plomeria"], 2, True))
+    assert len(catalog_reads) == 1
@@ -0,0 +1,66 @@
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key-de-al-menos-32-bytes")
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from utils import security
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(security, "SECRET_KEY", "test-secret-key-de-al-menos-32-bytes")
+    monkeypatch.setattr(security, "_token_cache", security.OrderedDict())
+    return security._token_cache
+
+
+def _token(exp_in: float = 3600, key: str = "test-secret-key-de-al-menos-32-bytes", **claims) -> str:
+    return jwt.encode({"id": "u1", "active": True, **claims, "exp": int(time.time() + exp_in)}, key, algorithm="HS256")
+
+
+def test_verified_token_is_served_from_cache(monkeypatch):
+    token = _token()
+    assert security._decode_token_cached(token)["id"] == "u1"
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("no debería verificar otra vez")
+
+    monkeypatch.setattr(security.jwt, "decode", no_decode)
+    assert security._decode_token_cached(token)["id"] == "u1"
+
+def test_cached_token_expires_at_exp(fresh_cache):
+    token = _token(exp_in=1)
+    security._decode_token_cached(token)
+    assert len(fresh_cache) == 1
+    time.sleep(1.2)
+    with pytest.raises(HTTPException) as exc:
+        security._decode_token_cached(token)
+    assert exc.value.status_code == 401 and exc.value.detail == "Token expirado"
+    assert len(fresh_cache) == 0
+
+def test_lru_evicts_least_recently_used(monkeypatch, fresh_cache):
+    monkeypatch.setattr(security, "JWT_CACHE_SIZE", 2)
+    a, b, c = (_token(id=name) for name in "abc")
+    security._decode_token_cached(a)
+    security._decode_token_cached(b)
+    security._decode_token_cached(a)  # a pasa a ser el más reciente
+    security._decode_token_cached(c)  # sale b
+
+    cached = {payload["id"] for payload in fresh_cache.values()}
+    assert cached == {"a", "c"}
+
+@pytest.mark.parametrize("token", [
+    "no-es-un-jwt",
+    _token(key="otra-clave-distinta-de-al-menos-32-bytes"),
+    _token()[:-2] + "xx",  # firma alterada
+    _token(exp_in=-10),
+])
+def test_invalid_tokens_are_rejected_and_not_cached(fresh_cache, token):
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            security._decode_token_cached(token)
+        assert exc.value.status_code == 401
+    assert len(fresh_cache) == 0
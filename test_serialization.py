@@ -0,0 +1,47 @@
+import json
+import os
+from datetime import datetime
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+from bson import ObjectId
+from fastapi import Response
+
+from models.reservation import Reservation
+from models.review import Review
+from utils.serialization import Projection, fast_response
+
+
+def test_build_matches_pydantic_output():
+    doc = {
+        "_id": ObjectId(),
+        "id_usuario": ObjectId(),
+        "id_service_offering": ObjectId(),
+        "opinion": "Muy bien",
+        "rating": 4,
+        "created_at": datetime(2030, 1, 1, 10, 0, 0, 123000),
+        "search_tokens": ["bien", "muy"],
+    }
+    original = dict(doc)
+    projection = Projection(Review, "reviews")
+    expected = Review(**{**doc, "id": str(doc["_id"]), "id_usuario": str(doc["id_usuario"]),
+                         "id_service_offering": str(doc["id_service_offering"])}).model_dump(mode="json")
+
+    assert json.loads(fast_response(projection.build(doc)).body) == expected
+    assert "search_tokens" not in projection.fields
+    assert doc == original
+
+def test_missing_fields_take_model_defaults():
+    doc = {"_id": ObjectId(), "id_user": ObjectId(), "reservation_date": datetime(2030, 1, 1), "created_at": datetime(2026, 1, 1)}
+    out = Projection(Reservation, "reservations").build(doc)
+    assert out["status"] == "pending" and out["notes"] is None
+    assert out["id_user"] == str(doc["id_user"])
+
+def test_fast_response_keeps_dependency_headers():
+    response = Response()
+    response.headers["ETag"] = '"abc"'
+    out = fast_response({"items": []}, response)
+    assert out.headers["etag"] == '"abc"'
+    assert out.headers["content-type"] == "application/json"
+    assert out.body == b'{"items":[]}'
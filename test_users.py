@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "test")
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from controllers import users
+from models.users import User
+
+
+class FakeFirebaseAuth:
+    """firebase_admin.auth mínimo; las llamadas corren en el pool de hilos."""
+
+    def __init__(self, existing_uid=None):
+        self.existing_uid = existing_uid
+        self.lookup_started = threading.Event()
+        self.deleted = []
+
+    def get_user_by_email(self, email):
+        self.lookup_started.set()
+        if self.existing_uid is None:
+            raise LookupError("usuario no encontrado")
+        return type("UserRecord", (), {"uid": self.existing_uid})
+
+    def create_user(self, email, password):
+        return type("UserRecord", (), {"uid": "nuevo-uid"})
+
+    def delete_user(self, uid):
+        self.deleted.append(uid)
+
+
+class FakeUsers:
+    def __init__(self, firebase, insert_error=None):
+        self.firebase = firebase
+        self.insert_error = insert_error
+        self.saw_parallel_lookup = False
+
+    async def find_one(self, query, projection=None):
+        # Si las búsquedas fueran secuenciales, Firebase no arrancaría mientras esperamos aquí
+        for _ in range(200):
+            if self.firebase.lookup_started.is_set():
+                self.saw_parallel_lookup = True
+                break
+            await asyncio.sleep(0.005)
+        return None
+
+    async def insert_one(self, doc):
+        if self.insert_error:
+            raise self.insert_error
+        return type("InsertOneResult", (), {"inserted_id": ObjectId()})
+
+
+@pytest.fixture
+def env(monkeypatch):
+    def make(existing_uid=None, insert_error=None):
+        firebase = FakeFirebaseAuth(existing_uid)
+        coll = FakeUsers(firebase, insert_error)
+        monkeypatch.setattr(users, "_firebase_auth", lambda: firebase)
+        monkeypatch.setattr(users, "get_async_collection", lambda name: coll)
+        return firebase, coll
+
+    yield make
+    users.shutdown_firebase_executor()
+
+
+def _user():
+    return User(name="Ana", lastname="Pérez", email="ana@example.com", password="Secreta123!")
+
+
+def test_mongo_and_firebase_lookups_run_concurrently(env):
+    firebase, coll = env()
+    created = asyncio.run(users.create_user(_user()))
+    assert coll.saw_parallel_lookup
+    assert created.password == "*********" and created.id
+    assert firebase.deleted == []
+
+@pytest.mark.parametrize("error, status", [(ConnectionError("mongo caído"), 500), (DuplicateKeyError("E11000"), 409)])
+def test_failed_insert_deletes_the_new_firebase_user_in_background(env, error, status):
+    firebase, _ = env(insert_error=error)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(users.create_user(_user()))
+    assert exc.value.status_code == status
+    users.shutdown_firebase_executor()  # espera la compensación
+    assert firebase.deleted == ["nuevo-uid"]
+
+def test_existing_firebase_user_is_not_deleted(env):
+    firebase, _ = env(existing_uid="ya-existia", insert_error=ConnectionError("mongo caído"))
+    with pytest.raises(HTTPException):
+        asyncio.run(users.create_user(_user()))
+    users.shutdown_firebase_executor()
+    assert firebase.deleted == []
+
+def test_lifespan_shutdown_does_not_block_the_event_loop(env, monkeypatch):
+    import main
+
+    async def noop(*args, **kwargs):
+        pass
+
+    for name in ("ensure_required_indexes", "_warm_up", "close_http_client", "close_cache", "close_mongo_clients"):
+        monkeypatch.setattr(main, name, noop)
+    firebase, _ = env()
+    release, released = threading.Event(), []
+    firebase.delete_user = lambda uid: released.append(release.wait(1))
+
+    async def scenario():
+        async with main.lifespan(main.app):
+            users._delete_firebase_user_in_background("lento")  # compensación pendiente al apagar
+            # solo se dispara si el loop sigue libre mientras el apagado espera
+            asyncio.get_running_loop().call_later(0.05, release.set)
+
+    asyncio.run(scenario())
+    assert released == [True]
@@ -0,0 +1,111 @@
+"""
+Endpoints por lote: validación en una pasada y escritura con insert_many /
+bulk_write, con resultado por elemento.
+
+- ordered=True: se detiene en el primer error; los elementos siguientes
+  quedan con status 424 (no procesados), igual que insert_many(ordered=True).
+- ordered=False: escribe todo lo válido y reporta cada error por separado.
+
+BULK_MAX_ITEMS limita el tamaño de cada lote (default 100).
+"""
+import os
+from typing import Optional
+
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 100))
+
+SKIPPED_DETAIL = "No procesado: falló un elemento anterior (ordered=true)"
+
+
+def check_size(items: list) -> None:
+    if not items:
+        raise HTTPException(status_code=400, detail="El lote está vacío")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Máximo {BULK_MAX_ITEMS} elementos por lote")
+
+
+class BulkReport:
+    def __init__(self, size: int, ordered: bool):
+        self.ordered = ordered
+        self.items: list[dict] = [{"index": i, "status": 0, "id": None, "detail": None} for i in range(size)]
+
+    def ok(self, index: int, id, status: int = 201) -> None:
+        self.items[index].update(status=status, id=str(id))
+
+    def fail(self, index: int, status: int, detail: str) -> None:
+        self.items[index].update(status=status, detail=detail)
+
+    def failed(self, index: int) -> bool:
+        return self.items[index]["status"] >= 400
+
+    def first_failure(self) -> Optional[int]:
+        return next((item["index"] for item in self.items if item["status"] >= 400), None)
+
+    def writable(self, pending: list[tuple]) -> list[tuple]:
+        """Elementos válidos que se deben escribir (en ordered, solo los previos al primer error)."""
+        pending = [p for p in pending if not self.failed(p[0])]
+        first = self.first_failure()
+        if self.ordered and first is not None:
+            pending = [p for p in pending if p[0] < first]
+        return pending
+
+    def apply_write_errors(self, pending: list[tuple], error: BulkWriteError) -> set[int]:
+        """Marca los errores de un BulkWriteError (índices relativos a pending). Devuelve los índices fallidos."""
+        failed = set()
+        for write_error in error.details.get("writeErrors", []):
+            index = pending[write_error["index"]][0]
+            status = 409 if write_error.get("code") == 11000 else 500
+            self.fail(index, status, write_error.get("errmsg", "Error de escritura"))
+            failed.add(index)
+        return failed
+
+    def result(self) -> dict:
+        for item in self.items:
+            if item["status"] == 0:  # nunca se escribió (ordered tras un error)
+                item.update(status=424, detail=SKIPPED_DETAIL)
+        succeeded = sum(1 for item in self.items if item["status"] < 400)
+        return {
+            "ordered": self.ordered,
+            "succeeded": succeeded,
+            "failed": len(self.items) - succeeded,
+            "items": self.items,
+        }
+
+
+async def _write_reported(write, pending: list[tuple], report: BulkReport, ok_status: int) -> set[int]:
+    """pending: (índice, _id, documento u operación)."""
+    pending = report.writable(pending)
+    if not pending:
+        return set()
+    not_written: set[int] = set()
+    try:
+        await write([op for _, _, op in pending])
+    except BulkWriteError as e:
+        not_written = report.apply_write_errors(pending, e)
+        if report.ordered and not_written:
+            # con ordered=True Mongo no escribe nada después del primer error
+            first = min(not_written)
+            not_written |= {i for i, _, _ in pending if i > first}
+    for i, _id, _ in pending:
+        if i not in not_written:
+            report.ok(i, _id, ok_status)
+    return not_written
+
+
+async def insert_reported(coll, pending: list[tuple[int, dict]], report: BulkReport, *, session=None) -> set[int]:
+    """
+    insert_many de los (índice, documento) pendientes, con _id ya asignado.
+    Registra ok/error por elemento y devuelve los índices que NO se insertaron.
+    """
+    async def write(docs):
+        await coll.insert_many(docs, ordered=report.ordered, session=session)
+    return await _write_reported(write, [(i, doc["_id"], doc) for i, doc in pending], report, 201)
+
+
+async def bulk_write_reported(coll, pending: list[tuple], report: BulkReport, *, session=None) -> set[int]:
+    """bulk_write de (índice, _id, UpdateOne/ReplaceOne). Igual que insert_reported."""
+    async def write(ops):
+        await coll.bulk_write(ops, ordered=report.ordered, session=session)
+    return await _write_reported(write, pending, report, 200)
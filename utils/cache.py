@@ -0,0 +1,281 @@
+"""
+Caché compartida para lecturas (read-through) con invalidación por tags.
+
+Backends (según CACHE_URL):
+- vacío o "memory://": LRU en el proceso (un caché por worker; útil en
+  desarrollo y con un solo worker).
+- "redis://host:6379/0": cualquier servidor con protocolo Redis. Todos los
+  workers comparten las entradas calientes y las invalidaciones.
+
+Invalidación por tags: cada tag tiene un contador de versión. Una entrada
+guarda las versiones de sus tags al momento de empezar a cargarla y se
+descarta al leerla si alguna cambió, así que invalidate_tags() es un INCR por
+tag y una carga que corrió en paralelo con una escritura nunca deja datos
+viejos en la caché.
+
+Los valores se guardan como BSON (conserva ObjectId y datetime) y se
+devuelven como copia: el llamador puede modificarlos. None no se cachea.
+
+Lecturas de secundarios: get_or_load_listing() es para loaders que leen de
+colecciones listing=True (secondaryPreferred). Si las versiones de los tags
+cambiaron desde la última carga de esa clave en este proceso (hubo una
+escritura, o nunca se cargó), el loader lee del primario: un secundario
+atrasado dejaría la página vieja guardada bajo la versión nueva durante todo
+el TTL, con un ETag nuevo. Si solo venció el TTL, puede leer del secundario.
+
+Configuración por entorno:
+- CACHE_URL: ver arriba
+- CACHE_TTL: segundos por defecto de cada entrada (default 60)
+- CACHE_MAX_ENTRIES: tamaño del LRU en memoria (default 1024)
+- CACHE_PREFIX: prefijo de las claves en Redis (default "servicios:")
+"""
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import bson
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", 60))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "servicios:")
+
+
+class CacheBackend(ABC):
+    """get/set/delete + tags. Las subclases solo implementan el almacenamiento."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # clave -> versiones de tags de su última carga (get_or_load_listing)
+        self._loaded_versions: OrderedDict[str, list[int]] = OrderedDict()
+
+    @abstractmethod
+    async def _get_raw(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    async def _set_raw(self, key: str, data: bytes, ttl: int) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+    @abstractmethod
+    async def tag_versions(self, tags: Iterable[str]) -> list[int]: ...
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+    async def tag_version(self, tag: str) -> int:
+        return (await self.tag_versions([tag]))[0]
+
+    async def get(self, key: str) -> Any:
+        data = await self._get_raw(key)
+        if data is not None:
+            entry = bson.decode(data)
+            tags = entry["t"]
+            if not tags or await self.tag_versions(tags) == list(tags.values()):
+                self.hits += 1
+                return entry["v"]
+        self.misses += 1
+        return None
+
+    async def set(
+        self, key: str, value: Any, *, ttl: int = CACHE_TTL,
+        tags: tuple[str, ...] = (), versions: Optional[list[int]] = None,
+    ) -> None:
+        if value is None:
+            return
+        if versions is None:
+            versions = await self.tag_versions(tags)
+        await self._set_raw(key, bson.encode({"v": value, "t": dict(zip(tags, versions))}), ttl)
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Any]], *,
+        ttl: int = CACHE_TTL, tags: tuple[str, ...] = (),
+    ) -> Any:
+        """Read-through: devuelve la entrada o ejecuta loader() y la guarda."""
+        value = await self.get(key)
+        if value is not None:
+            return value
+        versions = await self.tag_versions(tags)  # antes de cargar (ver docstring del módulo)
+        value = await loader()
+        await self.set(key, value, ttl=ttl, tags=tags, versions=versions)
+        return value
+
+    async def get_or_load_listing(
+        self, key: str, loader: Callable[[bool], Awaitable[Any]], *,
+        ttl: int = CACHE_TTL, tags: tuple[str, ...] = (),
+    ) -> Any:
+        """
+        Como get_or_load, pero loader(listing) decide la colección: listing=True
+        solo cuando los tags no cambiaron desde la última carga (ver docstring del módulo).
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+        versions = await self.tag_versions(tags)
+        listing = self._loaded_versions.get(key) == versions
+        value = await loader(listing)
+        await self.set(key, value, ttl=ttl, tags=tags, versions=versions)
+        self._loaded_versions[key] = versions
+        self._loaded_versions.move_to_end(key)
+        while len(self._loaded_versions) > CACHE_MAX_ENTRIES:
+            self._loaded_versions.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """LRU acotado por número de entradas, con TTL por entrada."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._tags: dict[str, int] = {}
+
+    async def _get_raw(self, key: str) -> Optional[bytes]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, data = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    async def _set_raw(self, key: str, data: bytes, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def tag_versions(self, tags: Iterable[str]) -> list[int]:
+        return [self._tags.get(tag, 0) for tag in tags]
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            self._tags[tag] = self._tags.get(tag, 0) + 1
+
+    def stats(self) -> dict:
+        return {**super().stats(), "size": len(self._entries), "max_entries": self.max_entries}
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend Redis (redis.asyncio). Si el servidor no responde, las lecturas
+    cuentan como miss y las escrituras se omiten: la caché nunca tumba una
+    petición. Una invalidación fallida queda acotada por el TTL.
+    """
+
+    def __init__(self, url: str, prefix: str = CACHE_PREFIX):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL apunta a Redis pero el paquete 'redis' no está instalado") from e
+        self._errors = (redis.RedisError, OSError)
+        self._redis = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.prefix = prefix
+        self.errors = 0
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _failed(self, op: str, e: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"Caché Redis no disponible ({op}): {e}")
+
+    async def _get_raw(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._redis.get(self.prefix + key)
+        except self._errors as e:
+            self._failed("get", e)
+            return None
+
+    async def _set_raw(self, key: str, data: bytes, ttl: int) -> None:
+        try:
+            await self._redis.set(self.prefix + key, data, ex=ttl)
+        except self._errors as e:
+            self._failed("set", e)
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self._redis.delete(*(self.prefix + k for k in keys))
+        except self._errors as e:
+            self._failed("delete", e)
+
+    async def tag_versions(self, tags: Iterable[str]) -> list[int]:
+        tags = list(tags)
+        if not tags:
+            return []
+        try:
+            values = await self._redis.mget([self._tag_key(t) for t in tags])
+        except self._errors as e:
+            self._failed("tag_versions", e)
+            return [-1] * len(tags)  # nunca coincide con una entrada guardada: miss
+        return [int(v) if v is not None else 0 for v in values]
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag))
+                await pipe.execute()
+        except self._errors as e:
+            logger.error(f"No se pudieron invalidar los tags {tags} en Redis: {e}")
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "errors": self.errors}
+
+
+_cache: Optional[CacheBackend] = None
+
+
+def get_cache() -> CacheBackend:
+    global _cache
+    if _cache is None:
+        url = os.getenv("CACHE_URL", "")
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            _cache = RedisCache(url)
+        elif url in ("", "memory://"):
+            _cache = MemoryCache()
+        else:
+            raise ValueError(f"CACHE_URL no soportada: {url}")
+    return _cache
+
+
+async def close_cache() -> None:
+    """Cierra el backend (lifespan de la app)."""
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+        _cache = None
@@ -0,0 +1,85 @@
+"""
+Caché HTTP de respuestas (ETag / If-None-Match) para los endpoints de catálogo.
+
+Cada colección tiene un contador de versión en `collection_versions` que las
+escrituras incrementan con bump_version(). El ETag de una respuesta es un hash
+de la ruta, el query string y las versiones de las colecciones de las que
+depende, así que se calcula con una lectura por _id sin ejecutar la consulta
+ni serializar el resultado. Si coincide con If-None-Match se responde 304.
+
+El contador vive en Mongo (no en memoria) para que todos los workers vean la
+misma versión tras una escritura. Las respuestas armadas desde una copia en
+memoria (catálogo de profesiones) usan check_etag con un hash de esa copia.
+
+Cache-Control:
+- endpoints públicos: "public, max-age=HTTP_CACHE_MAX_AGE" (default 60 s),
+  cacheables por CDN y navegador.
+- endpoints autenticados: "private, no-cache" (el navegador revalida con el
+  ETag en cada uso; un CDN compartido no los guarda).
+"""
+import hashlib
+import os
+
+from fastapi import HTTPException, Request, Response
+
+from utils.mongodb import lazy_collection
+
+VERSIONS_COLLECTION = "collection_versions"
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 60))
+
+_versions = lazy_collection(VERSIONS_COLLECTION)
+
+
+async def bump_version(*collections: str) -> None:
+    """Invalida los ETags de las respuestas que dependen de estas colecciones."""
+    for name in collections:
+        await _versions.update_one({"_id": name}, {"$inc": {"v": 1}}, upsert=True)
+
+
+async def current_versions(collections: tuple[str, ...]) -> dict[str, int]:
+    docs = await _versions.find({"_id": {"$in": list(collections)}}).to_list()
+    found = {doc["_id"]: doc.get("v", 0) for doc in docs}
+    return {name: found.get(name, 0) for name in collections}
+
+
+def make_etag(request: Request, versions: dict[str, int]) -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    key = f"{request.url.path}?{query}|" + ",".join(f"{k}:{v}" for k, v in sorted(versions.items()))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/ y acepta '*'."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def check_etag(request: Request, response: Response, versions: dict, *, public: bool = False) -> None:
+    """
+    Agrega ETag y Cache-Control a la respuesta y corta con 304 Not Modified si
+    el cliente ya tiene esta versión. versions: lo que identifica el contenido.
+    """
+    etag = make_etag(request, versions)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}" if public else "private, no-cache"}
+    if not public:
+        headers["Vary"] = "Authorization"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def conditional_get(*collections: str, public: bool = False):
+    """
+    Dependencia para rutas GET: ETag según las versiones de las colecciones en
+    collection_versions (ver check_etag). Declararla después de validateuser
+    para no responder 304 sin autenticar.
+    """
+    async def dependency(request: Request, response: Response) -> None:
+        check_etag(request, response, await current_versions(collections), public=public)
+
+    return dependency
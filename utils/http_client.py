@@ -0,0 +1,57 @@
+"""
+Cliente HTTP asíncrono compartido (keep-alive + pool de conexiones) para
+llamadas salientes, p. ej. Firebase Identity Toolkit en /login.
+
+Configuración por entorno:
+- FIREBASE_AUTH_URL: base del Identity Toolkit (apuntar a un stub local para tests/benchmarks)
+- HTTP_POOL_SIZE: conexiones máximas del pool (default 20)
+- HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT: segundos por intento (default 3 / 5)
+- HTTP_RETRIES: reintentos ante errores de conexión o timeout (default 1)
+"""
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FIREBASE_AUTH_URL = os.getenv("FIREBASE_AUTH_URL", "https://identitytoolkit.googleapis.com").rstrip("/")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 1))
+
+_TIMEOUT = httpx.Timeout(
+    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", 3)),
+    read=float(os.getenv("HTTP_READ_TIMEOUT", 5)),
+    write=5.0,
+    pool=5.0,
+)
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def post_json(url: str, payload: dict, **kwargs) -> httpx.Response:
+    """POST con reintentos solo ante fallos de red (cada intento con su propio timeout)."""
+    client = get_http_client()
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            return await client.post(url, json=payload, **kwargs)
+        except (httpx.TimeoutException, httpx.NetworkError):
+            if attempt == HTTP_RETRIES:
+                raise
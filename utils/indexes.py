@@ -0,0 +1,146 @@
+"""
+Registro declarativo de los índices de los que dependen los controladores.
+
+- Al arrancar la app (lifespan en main.py) se crean de forma idempotente.
+  Los de REQUIRED_INDEXES se crean antes de aceptar peticiones y, si fallan,
+  la app no arranca (aunque MONGO_ENSURE_INDEXES=0).
+- Por CLI:
+    python -m utils.indexes           # crea los índices que falten
+    python -m utils.indexes --check   # solo reporta diferencias (exit 1 si hay)
+"""
+import argparse
+import asyncio
+import logging
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.collation import Collation
+
+from utils.mongodb import get_async_collection
+
+logger = logging.getLogger(__name__)
+
+# Colación case-insensitive (es): "plomero" == "Plomero", pero respeta acentos
+# igual que el regex con $options "i" que se usaba antes.
+PROFESSION_NAME_COLLATION = Collation(locale="es", strength=2)
+
+# Único (provider, slot): es lo que rechaza reservas solapadas (controllers/availability.py)
+SLOT_INDEX = "provider_1_slot_1"
+
+INDEXES: dict[str, list[IndexModel]] = {
+    # /login y /users buscan por email
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+    ],
+    # list_services_active filtra por active (y opcionalmente created_by)
+    "service_offering": [
+        IndexModel([("active", ASCENDING), ("created_by", ASCENDING)], name="active_1_created_by_1"),
+        # Listado paginado: {active: true, _id > cursor} ordenado por _id, sin ordenar en memoria
+        IndexModel([("active", ASCENDING), ("_id", ASCENDING)], name="active_1__id_1"),
+        # $lookup profession -> service_offering (conteo de servicios por profesión)
+        IndexModel([("id_profession", ASCENDING)], name="id_profession_1"),
+        # /search: tokens exactos y prefijos anclados (utils/search.py)
+        IndexModel([("active", ASCENDING), ("search_tokens", ASCENDING)], name="active_1_search_tokens_1"),
+    ],
+    "reservations": [
+        IndexModel([("id_user", ASCENDING), ("reservation_date", ASCENDING)], name="id_user_1_reservation_date_1"),
+    ],
+    # Vínculos de una reservación (cálculo de su intervalo)
+    "reservation_service": [
+        IndexModel([("id_reservation", ASCENDING)], name="id_reservation_1"),
+    ],
+    # Bloques ocupados por proveedor: el índice único rechaza reservas solapadas
+    # y sirve las consultas de /availability (ver controllers/availability.py)
+    "reservation_slots": [
+        IndexModel([("provider", ASCENDING), ("slot", ASCENDING)], name=SLOT_INDEX, unique=True),
+        IndexModel([("id_reservation", ASCENDING)], name="id_reservation_1"),
+    ],
+    "reviews": [
+        IndexModel([("id_service_offering", ASCENDING)], name="id_service_offering_1"),
+    ],
+    # create/update_profession validan duplicados por nombre sin importar mayúsculas
+    "profession": [
+        IndexModel([("name", ASCENDING)], name="name_ci", collation=PROFESSION_NAME_COLLATION),
+        # /search y /profession/search/{term}
+        IndexModel([("active", ASCENDING), ("search_tokens", ASCENDING)], name="active_1_search_tokens_1"),
+    ],
+}
+
+# Índices de los que depende la correctitud, no solo el rendimiento
+REQUIRED_INDEXES: dict[str, tuple[str, ...]] = {
+    "reservation_slots": (SLOT_INDEX,),
+}
+
+# Opciones que se comparan para detectar drift
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _normalize(spec: dict) -> dict:
+    out = {"key": list(dict(spec["key"]).items())}
+    for opt in _COMPARED_OPTIONS:
+        if spec.get(opt) is not None:
+            out[opt] = spec[opt]
+    collation = spec.get("collation")
+    if collation:
+        out["collation"] = {"locale": collation.get("locale"), "strength": collation.get("strength")}
+    return out
+
+
+async def index_drift() -> dict[str, dict[str, list]]:
+    """
+    Compara los índices declarados contra los existentes.
+    Devuelve {colección: {"missing": [...], "different": [...], "unexpected": [...]}}
+    solo para las colecciones con diferencias.
+    """
+    report: dict[str, dict[str, list]] = {}
+    for col_name, models in INDEXES.items():
+        existing = {}
+        async for spec in await get_async_collection(col_name).list_indexes():
+            if spec["name"] != "_id_":
+                existing[spec["name"]] = _normalize(spec)
+
+        declared = {m.document["name"]: _normalize(m.document) for m in models}
+        missing = [name for name in declared if name not in existing]
+        different = [name for name in declared if name in existing and existing[name] != declared[name]]
+        unexpected = [name for name in existing if name not in declared]
+        if missing or different or unexpected:
+            report[col_name] = {"missing": missing, "different": different, "unexpected": unexpected}
+    return report
+
+
+async def ensure_indexes() -> dict[str, list[str]]:
+    """Crea los índices declarados (idempotente). Los que fallen se registran pero no detienen el arranque."""
+    created: dict[str, list[str]] = {}
+    for col_name, models in INDEXES.items():
+        try:
+            created[col_name] = await get_async_collection(col_name).create_indexes(models)
+        except Exception as e:
+            logger.error(f"No se pudieron crear los índices de '{col_name}': {e}")
+    return created
+
+
+async def ensure_required_indexes() -> None:
+    """Crea los índices de REQUIRED_INDEXES. A diferencia de ensure_indexes, los errores se propagan."""
+    for col_name, names in REQUIRED_INDEXES.items():
+        models = [m for m in INDEXES[col_name] if m.document["name"] in names]
+        await get_async_collection(col_name).create_indexes(models)
+
+
+async def _main(check_only: bool) -> int:
+    if not check_only:
+        for col_name, names in (await ensure_indexes()).items():
+            print(f"{col_name}: {', '.join(names)}")
+    drift = await index_drift()
+    for col_name, diff in drift.items():
+        for kind, names in diff.items():
+            if names:
+                print(f"[drift] {col_name} {kind}: {', '.join(names)}")
+    if not drift:
+        print("Índices al día")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crea o verifica los índices de MongoDB")
+    parser.add_argument("--check", action="store_true", help="Solo reportar diferencias, no crear")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.check)))
@@ -0,0 +1,122 @@
+"""
+Verificación de referencias por lotes, con alcance de petición (estilo DataLoader).
+
+Cada create validaba sus referencias con un find_one por documento (usuario de
+la reservación, servicio de la reseña, ...); un endpoint por lote o compuesto
+multiplicaba esos round trips. Aquí:
+
+- exists(col, _id) / existing(col, ids) encolan los _id pedidos. Todo lo que
+  se pida a una colección en el mismo tick del event loop (p. ej. dentro de un
+  asyncio.gather) se resuelve con un solo find({"_id": {"$in": [...]}}).
+- El resultado queda memorizado hasta el final de la petición: pedir otra vez
+  el mismo _id no vuelve a Mongo.
+
+LoaderScopeMiddleware (main.py) crea un juego de loaders por petición. Fuera
+de una petición (scripts, tests) cada llamada usa un loader nuevo: agrupa,
+pero no memoriza.
+
+Es una verificación de existencia (proyección {_id: 1}): el resultado puede
+quedar viejo si otra petición borra el documento mientras tanto, igual que con
+el find_one de antes.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from bson import ObjectId
+
+from utils.mongodb import get_async_collection
+
+
+class BatchLoader:
+    """_id -> existe, con agrupación por tick y memoización."""
+
+    def __init__(self, coll):
+        self.coll = coll
+        self._results: dict[ObjectId, asyncio.Future] = {}
+        self._queue: list[ObjectId] = []
+        self._task: Optional[asyncio.Task] = None
+        self.queries = 0  # consultas enviadas a Mongo
+
+    def load(self, _id: ObjectId) -> asyncio.Future:
+        future = self._results.get(_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._results[_id] = loop.create_future()
+            self._queue.append(_id)
+            if len(self._queue) == 1:
+                # Se despacha cuando terminan las corrutinas listas en este tick
+                loop.call_soon(self._schedule)
+        return future
+
+    def _schedule(self) -> None:
+        self._task = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        ids, self._queue = self._queue, []
+        self.queries += 1
+        try:
+            docs = await self.coll.find({"_id": {"$in": ids}}, {"_id": 1}).to_list()
+        except Exception as e:
+            for _id in ids:
+                self._results.pop(_id).set_exception(e)  # no se memoriza un error
+            return
+        found = {doc["_id"] for doc in docs}
+        for _id in ids:
+            self._results[_id].set_result(_id in found)
+
+    async def exists(self, _id: ObjectId) -> bool:
+        return await self.load(_id)
+
+    async def existing(self, ids: Iterable[ObjectId]) -> set[ObjectId]:
+        ids = list(dict.fromkeys(ids))
+        results = await asyncio.gather(*(self.load(_id) for _id in ids))
+        return {_id for _id, ok in zip(ids, results) if ok}
+
+
+class Loaders:
+    """Un BatchLoader por colección (uno de estos por petición)."""
+
+    def __init__(self):
+        self._by_collection: dict[str, BatchLoader] = {}
+
+    def get(self, collection: str) -> BatchLoader:
+        loader = self._by_collection.get(collection)
+        if loader is None:
+            loader = self._by_collection[collection] = BatchLoader(get_async_collection(collection))
+        return loader
+
+
+_scope: ContextVar[Optional[Loaders]] = ContextVar("loaders", default=None)
+
+
+def loader(collection: str) -> BatchLoader:
+    scope = _scope.get()
+    if scope is None:
+        return BatchLoader(get_async_collection(collection))
+    return scope.get(collection)
+
+
+async def exists(collection: str, _id: ObjectId) -> bool:
+    return await loader(collection).exists(_id)
+
+
+async def existing(collection: str, ids: Iterable[ObjectId]) -> set[ObjectId]:
+    """Los _id de `ids` que existen en la colección."""
+    return await loader(collection).existing(ids)
+
+
+class LoaderScopeMiddleware:
+    """Middleware ASGI: loaders nuevos para cada petición HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _scope.set(Loaders())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope.reset(token)
@@ -0,0 +1,94 @@
+"""
+Métricas estilo Prometheus (expuestas en GET /metrics).
+
+- http_request_duration_seconds{method, route, status}: latencia por plantilla
+  de ruta (/reservations/{id}, no /reservations/64f...).
+- http_requests_total{method, route, status} y http_requests_in_progress{method}.
+- mongodb_command_duration_seconds{collection, command, operation}: lo registra
+  CommandLatencyListener (utils/mongo_monitoring.py). operation es el
+  comment del comando: los aggregate pasan el nombre de su pipeline.
+- mongodb_pool_checkout_wait_seconds: espera por una conexión del pool.
+- profession_sync_lag_seconds: desde el cambio de una profesión hasta que sus
+  servicios lo reflejan (utils/profession_sync.py).
+"""
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP",
+    ["method", "route", "status"], buckets=HTTP_LATENCY_BUCKETS,
+)
+http_requests_total = Counter(
+    "http_requests_total", "Peticiones HTTP por ruta y código de estado",
+    ["method", "route", "status"],
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso",
+    ["method"],
+)
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "Duración de los comandos de MongoDB",
+    ["collection", "command", "operation"], buckets=MONGO_LATENCY_BUCKETS,
+)
+mongo_command_failures = Counter(
+    "mongodb_command_failures_total", "Comandos de MongoDB fallidos",
+    ["collection", "command"],
+)
+mongo_pool_checkout_wait = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool",
+    buckets=MONGO_LATENCY_BUCKETS,
+)
+
+profession_sync_lag = Histogram(
+    "profession_sync_lag_seconds", "Lag de propagación de cambios de profesión a service_offering",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0, 600.0),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latencia, conteo por status e in-flight por plantilla de ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        # La plantilla de ruta solo se conoce después del routing, por eso el
+        # gauge de peticiones en curso va solo por método.
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = _route_template(scope)
+            code = str(status["code"])
+            http_request_duration.labels(method, route, code).observe(elapsed)
+            http_requests_total.labels(method, route, code).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,125 @@
+"""
+Listeners de monitoreo del driver de MongoDB.
+
+- PoolCheckoutListener mide cuánto espera cada operación para obtener una
+  conexión del pool, para distinguir latencia del pool vs. latencia del servidor.
+- CommandLatencyListener mide la duración de los comandos por colección.
+"""
+import itertools
+import threading
+
+from pymongo import monitoring
+
+from utils.metrics import mongo_command_duration, mongo_command_failures, mongo_pool_checkout_wait
+
+# Límites (segundos) de los buckets del histograma de espera
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolCheckoutListener(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = 0
+            self.checked_out = 0
+            self.failed = 0
+            self.wait_seconds_sum = 0.0
+            self.wait_seconds_max = 0.0
+            self.bucket_counts = [0] * (len(CHECKOUT_BUCKETS) + 1)  # último = +Inf
+
+    def _observe(self, duration: float) -> None:
+        mongo_pool_checkout_wait.observe(duration)
+        self.wait_seconds_sum += duration
+        self.wait_seconds_max = max(self.wait_seconds_max, duration)
+        for i, bound in enumerate(CHECKOUT_BUCKETS):
+            if duration <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.started += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self._observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failed += 1
+            self._observe(event.duration)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            completed = self.checked_out + self.failed
+            return {
+                "checkouts": self.checked_out,
+                "failed": self.failed,
+                "waiting": max(self.started - completed, 0),
+                "wait_ms_avg": round(self.wait_seconds_sum / completed * 1000, 3) if completed else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                # acumulado (estilo Prometheus): le_X = esperas <= X ms
+                "buckets_ms": dict(zip(
+                    [f"le_{bound * 1000:g}" for bound in CHECKOUT_BUCKETS] + ["le_inf"],
+                    itertools.accumulate(self.bucket_counts),
+                )),
+            }
+
+    # Eventos que no se usan
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+pool_checkout_listener = PoolCheckoutListener()
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Duración de cada comando por colección (find, aggregate, insert, ...)."""
+
+    # Comandos cuyo primer campo es el nombre de la colección
+    TRACKED = {
+        "find", "aggregate", "insert", "update", "delete", "findAndModify",
+        "count", "distinct", "getMore", "createIndexes", "listIndexes",
+    }
+
+    def __init__(self):
+        self._pending: dict[tuple, tuple[str, str]] = {}
+
+    def started(self, event):
+        if event.command_name not in self.TRACKED:
+            return
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        else:
+            collection = event.command.get(event.command_name, "")
+        operation = event.command.get("comment", "")
+        self._pending[(event.connection_id, event.request_id)] = (str(collection), str(operation))
+
+    def _finish(self, event, failed: bool):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, operation = pending
+        mongo_command_duration.labels(collection, event.command_name, operation).observe(event.duration_micros / 1e6)
+        if failed:
+            mongo_command_failures.labels(collection, event.command_name).inc()
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+command_latency_listener = CommandLatencyListener()
@@ -1,8 +1,10 @@
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient, ReadPreference
 from pymongo.server_api import ServerApi
 
+from utils.mongo_monitoring import command_latency_listener, pool_checkout_listener
+
 load_dotenv()
 
 # Try both variable names for compatibility
@@ -16,18 +18,81 @@ if not URI:
     raise ValueError("MongoDB URI not found. Set MONGO_URI or URI environment variable")
 
 
+# Presets del pool según MONGO_PROFILE (production por defecto).
+# Cada opción se puede sobreescribir con su variable de entorno (ver _ENV_OPTIONS).
+POOL_PRESETS = {
+    "production": {
+        "maxPoolSize": 100,
+        "minPoolSize": 10,
+        "maxIdleTimeMS": 300_000,
+        "waitQueueTimeoutMS": 2_000,
+        "compressors": "zlib",
+        "readPreference": "primary",
+        "serverSelectionTimeoutMS": 5_000,
+    },
+    "development": {
+        "maxPoolSize": 20,
+        "minPoolSize": 0,
+        "maxIdleTimeMS": 60_000,
+        "waitQueueTimeoutMS": 5_000,
+        "compressors": "",
+        "readPreference": "primary",
+        "serverSelectionTimeoutMS": 5_000,
+    },
+}
+
+_ENV_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+}
+
+# Read preference de los listados (list_services_active, catálogo de profesiones...)
+LISTING_READ_PREFERENCE = os.getenv("MONGO_LISTING_READ_PREFERENCE", "secondaryPreferred")
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+if LISTING_READ_PREFERENCE not in _READ_PREFERENCES:
+    raise ValueError(f"MONGO_LISTING_READ_PREFERENCE inválido. Opciones: {list(_READ_PREFERENCES)}")
+
 _client = None
+_async_client = None
+
+def pool_settings() -> dict:
+    """Preset de MONGO_PROFILE + overrides de entorno (valores vacíos se omiten)."""
+    profile = os.getenv("MONGO_PROFILE", "production")
+    if profile not in POOL_PRESETS:
+        raise ValueError(f"MONGO_PROFILE inválido: {profile}. Opciones: {list(POOL_PRESETS)}")
+    settings = dict(POOL_PRESETS[profile])
+    for env_name, (option, cast) in _ENV_OPTIONS.items():
+        value = os.getenv(env_name)
+        if value is not None and value != "":
+            settings[option] = cast(value)
+    return {k: v for k, v in settings.items() if v != ""}
+
+def _client_options() -> dict:
+    """Opciones compartidas por el cliente síncrono y el asíncrono."""
+    tls = os.getenv("MONGO_TLS", "1") != "0"  # MONGO_TLS=0 para un mongod local sin TLS
+    return {
+        "server_api": ServerApi("1"),
+        "tls": tls,
+        "tlsAllowInvalidCertificates": tls,
+        "event_listeners": [pool_checkout_listener, command_latency_listener],
+        **pool_settings(),
+    }
 
 def get_mongo_client():
     global _client
     if _client is None:
-        _client = MongoClient(
-            URI,
-            server_api=ServerApi("1"),
-            tls=True,
-            tlsAllowInvalidCertificates=True,
-            serverSelectionTimeoutMS=5000  # Timeout más corto
-        )
+        _client = MongoClient(URI, **_client_options())
     return _client
 
 def get_collection(col):
@@ -35,6 +100,50 @@ def get_collection(col):
     client = get_mongo_client()
     return client[DB][col]
 
+def get_async_mongo_client():
+    """Cliente asíncrono (no bloquea el event loop). Conecta en la primera operación."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(URI, **_client_options())
+    return _async_client
+
+def get_async_collection(col, *, listing: bool = False):
+    """
+    Obtiene una colección de MongoDB para usar con await dentro de los controladores.
+    listing=True usa MONGO_LISTING_READ_PREFERENCE (p. ej. secondaryPreferred) para
+    lecturas de listados que toleran un pequeño retraso de replicación.
+    """
+    client = get_async_mongo_client()
+    coll = client[DB][col]
+    if listing:
+        coll = coll.with_options(read_preference=_READ_PREFERENCES[LISTING_READ_PREFERENCE])
+    return coll
+
+class LazyAsyncCollection:
+    """
+    Handle de colección para declarar a nivel de módulo sin crear el cliente
+    al importar: el AsyncMongoClient se construye en la primera operación.
+    """
+    def __init__(self, col, *, listing: bool = False):
+        self.name = col
+        self.listing = listing
+
+    def __getattr__(self, attr):
+        return getattr(get_async_collection(self.name, listing=self.listing), attr)
+
+def lazy_collection(col, *, listing: bool = False):
+    return LazyAsyncCollection(col, listing=listing)
+
+async def close_mongo_clients():
+    """Cierra los clientes abiertos (lifespan de la app)."""
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
+
 def t_connection():
     try:
         client = get_mongo_client()
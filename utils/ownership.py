@@ -0,0 +1,81 @@
+"""
+Escrituras con verificación de dueño en el mismo comando.
+
+En vez de leer el documento, comparar el dueño en Python y escribir (dos
+round trips y una ventana en la que el documento puede cambiar), el dueño va
+en el filtro de la escritura: {_id, <campo dueño>: actor}. Si el filtro no
+encuentra nada, una sola consulta por _id distingue 404 (no existe) de 403
+(es de otro); esa consulta solo ocurre en el camino de error.
+
+    updated = await guarded_write(
+        coll, "find_one_and_update", _id, {"$set": changes},
+        owner_field="id_user", actor=actor,
+        not_found="Reservación no encontrada",
+        return_document=ReturnDocument.AFTER,
+    )
+
+actor=None omite la condición de dueño (admins).
+
+Al crear, check_owner() exige que el dueño del documento nuevo sea el actor:
+sin eso cualquiera podría crear a nombre de otro y el filtro de arriba no
+protegería nada.
+"""
+from typing import Any, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.results import DeleteResult, UpdateResult
+
+FORBIDDEN_DETAIL = "No tienes permiso para modificar este recurso"
+
+
+def actor_oid(actor_id: Optional[str]) -> ObjectId:
+    """id del token (request.state.id) como ObjectId."""
+    if not actor_id or not ObjectId.is_valid(actor_id):
+        raise HTTPException(status_code=401, detail="Token sin id de usuario válido")
+    return ObjectId(actor_id)
+
+
+def check_owner(owner: Any, actor: Optional[ObjectId], detail: str = FORBIDDEN_DETAIL) -> None:
+    """403 si el documento queda a nombre de alguien distinto del actor. actor=None (admin) no restringe."""
+    if actor is not None and owner != actor:
+        raise HTTPException(status_code=403, detail=detail)
+
+
+def owned_by(_id: ObjectId, owner_field: str, actor: Optional[ObjectId]) -> dict:
+    """Filtro {_id, dueño}. Sin actor (admin) solo filtra por _id."""
+    if actor is None:
+        return {"_id": _id}
+    return {"_id": _id, owner_field: actor}
+
+
+def _matched(result: Any) -> bool:
+    if isinstance(result, UpdateResult):
+        return result.matched_count > 0
+    if isinstance(result, DeleteResult):
+        return result.deleted_count > 0
+    return result is not None  # find_one_and_*: el documento o None
+
+
+async def miss_error(coll, _id: ObjectId, *, not_found: str, forbidden: str = FORBIDDEN_DETAIL, session=None) -> HTTPException:
+    """404 o 403 para una escritura filtrada por owned_by() que no encontró el documento."""
+    if await coll.find_one({"_id": _id}, projection={"_id": 1}, session=session):
+        return HTTPException(status_code=403, detail=forbidden)
+    return HTTPException(status_code=404, detail=not_found)
+
+
+async def guarded_write(
+    coll, op: str, _id: ObjectId, *args,
+    owner_field: str, actor: Optional[ObjectId],
+    not_found: str, forbidden: str = FORBIDDEN_DETAIL,
+    session=None, **kwargs,
+) -> Any:
+    """
+    Ejecuta coll.<op>(owned_by(...), *args, **kwargs) (update_one, delete_one,
+    find_one_and_update, find_one_and_delete, ...) y devuelve su resultado.
+    Lanza 404/403 si no coincidió ningún documento.
+    """
+    result = await getattr(coll, op)(owned_by(_id, owner_field, actor), *args, session=session, **kwargs)
+    if not _matched(result):
+        raise await miss_error(coll, _id, not_found=not_found, forbidden=forbidden, session=session)
+    return result
@@ -0,0 +1,79 @@
+"""
+Paginación por cursor (keyset sobre _id) compartida por los endpoints de listado.
+
+El cliente recibe {"items": [...], "next": "<token>"} y pide la siguiente
+página con ?cursor=<token>. A diferencia de skip/limit, cada página es un
+rango sobre el índice de _id, así que el costo no crece con la colección.
+"""
+import base64
+import binascii
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, Query
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(last_id) -> str:
+    """Token opaco a partir del _id (ObjectId o su hex) del último documento de la página."""
+    return base64.urlsafe_b64encode(ObjectId(str(last_id)).binary).decode("ascii")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[ObjectId]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii"))
+        if len(raw) != 12:
+            raise ValueError("longitud inválida")
+        return ObjectId(raw)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+class PageParams:
+    """Dependencia de FastAPI: ?cursor=&limit= validados."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Token 'next' de la página anterior"),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Tamaño de página"),
+    ):
+        self.after = decode_cursor(cursor)
+        self.limit = limit
+
+
+def keyset_filter(query: dict, page: PageParams) -> dict:
+    """Agrega la condición _id > cursor a un filtro de find/$match."""
+    if page.after is None:
+        return query
+    return {**query, "_id": {"$gt": page.after}}
+
+
+def keyset_stages(page: PageParams) -> list:
+    """Etapas para un aggregate: van justo después del $match inicial (antes de $lookup/$project)."""
+    stages = [{"$match": {"_id": {"$gt": page.after}}}] if page.after is not None else []
+    return stages + [{"$sort": {"_id": 1}}, {"$limit": page.limit + 1}]
+
+
+def make_page(docs: list, page: PageParams, id_field: str = "_id") -> tuple[list, Optional[str]]:
+    """Recorta el documento extra (limit + 1) y calcula el token de la página siguiente."""
+    if len(docs) <= page.limit:
+        return docs, None
+    docs = docs[:page.limit]
+    return docs, encode_cursor(docs[-1][id_field])
+
+
+async def paginate_find(coll, query: dict, page: PageParams, projection: Optional[dict] = None,
+                        *, name: Optional[str] = None) -> tuple[list, Optional[str]]:
+    """find() paginado por _id sobre una colección asíncrona (medido por el slow-query log)."""
+    # Import diferido: utils.mongodb exige las variables de entorno al importarse
+    from utils.query_profiler import run_find
+
+    docs = await run_find(
+        coll, keyset_filter(query, page), projection,
+        name=name or f"paginate_find.{coll.name}", sort=[("_id", 1)], limit=page.limit + 1,
+    )
+    return make_page(docs, page)
@@ -0,0 +1,189 @@
+"""
+Nombre y estado de la profesión desnormalizados en service_offering.
+
+Cada servicio guarda profession_name y profession_active, así que los
+listados leen una sola colección, sin $lookup ni consulta al catálogo.
+create/update de servicios los escriben desde el catálogo de profesiones.
+
+Cuando update_profession o delete_profession_safe cambian una profesión,
+enqueue() registra un job en `profession_sync_jobs` (uno por profesión, el
+último cambio gana) y lo corre en segundo plano: un update_many sobre
+service_offering por id_profession (índice id_profession_1) que solo toca los
+documentos con valores distintos, así que reintentarlo no cuesta nada.
+
+Lag = applied_at - requested_at de cada job. Queda en el job (lag_seconds), en
+el histograma profession_sync_lag_seconds de /metrics y en
+GET /profession/sync-status (pendientes y el más antiguo). Si una propagación
+falla se reintenta PROFESSION_SYNC_RETRIES veces (default 3) con espera
+creciente desde PROFESSION_SYNC_RETRY_DELAY segundos (default 1); si sigue
+fallando se registra como error y el job queda pendiente. Los pendientes se
+retoman al arrancar (resume_pending en el lifespan) o a mano con --resume.
+
+Datos existentes / reparación:
+    python -m utils.profession_sync --backfill   # desnormaliza todos los servicios
+    python -m utils.profession_sync --resume     # corre los jobs pendientes
+    python -m utils.profession_sync --status
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+
+from utils.cache import get_cache
+from utils.http_cache import bump_version
+from utils.metrics import profession_sync_lag
+from utils.mongodb import lazy_collection
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "profession_sync_jobs"
+SYNC_RETRIES = int(os.getenv("PROFESSION_SYNC_RETRIES", 3))
+SYNC_RETRY_DELAY = float(os.getenv("PROFESSION_SYNC_RETRY_DELAY", 1))
+
+jobs_coll = lazy_collection(JOBS_COLLECTION)
+services_coll = lazy_collection("service_offering")
+professions_coll = lazy_collection("profession")
+
+_tasks: set[asyncio.Task] = set()  # referencias para que no se recolecten a medio correr
+
+
+def denormalized(profession: Optional[dict]) -> dict:
+    """Campos que se copian de la profesión a cada servicio."""
+    profession = profession or {}
+    return {
+        "profession_name": profession.get("name"),
+        "profession_active": bool(profession.get("active", False)),
+    }
+
+
+async def _apply(profession_id: ObjectId, fields: dict) -> int:
+    res = await services_coll.update_many(
+        {"id_profession": profession_id, "$or": [{k: {"$ne": v}} for k, v in fields.items()]},
+        {"$set": fields},
+    )
+    return res.modified_count
+
+
+async def _services_changed() -> None:
+    # Listados de servicios (caché compartida + ETags)
+    await get_cache().invalidate_tags("service_offering")
+    await bump_version("service_offering")
+
+
+async def enqueue(profession: dict) -> None:
+    """Registra el estado nuevo de la profesión y lanza la propagación en segundo plano."""
+    await jobs_coll.update_one(
+        {"_id": profession["_id"]},
+        {"$set": {**denormalized(profession), "requested_at": datetime.utcnow(), "done": False}},
+        upsert=True,
+    )
+    task = asyncio.create_task(_run_with_retries(profession["_id"]))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def run(profession_id: ObjectId) -> Optional[dict]:
+    """Corre el job pendiente de la profesión. None si no había nada pendiente."""
+    job = await jobs_coll.find_one({"_id": profession_id, "done": False})
+    if not job:
+        return None
+    modified = 0
+    while True:
+        fields = {k: job[k] for k in ("profession_name", "profession_active")}
+        modified += await _apply(profession_id, fields)
+        applied_at = datetime.utcnow()
+        lag = (applied_at - job["requested_at"]).total_seconds()
+        # Se cierra solo si nadie pidió otro cambio mientras tanto; si no, se
+        # reaplica el último (su propia tarea puede haber corrido antes que esta)
+        marked = await jobs_coll.update_one(
+            {"_id": profession_id, "requested_at": job["requested_at"]},
+            {"$set": {"done": True, "applied_at": applied_at, "lag_seconds": lag, "modified": modified}},
+        )
+        if marked.matched_count:
+            break
+        job = await jobs_coll.find_one({"_id": profession_id})
+        if job is None:  # se borró el job mientras corría: no hay otro cambio que reaplicar
+            break
+
+    profession_sync_lag.observe(lag)
+    if modified:
+        await _services_changed()
+    logger.info(f"Profesión {profession_id}: {modified} servicios actualizados, lag {lag:.3f}s")
+    return {"modified": modified, "lag_seconds": lag}
+
+
+async def _run_with_retries(profession_id: ObjectId) -> Optional[dict]:
+    """Cuerpo de la tarea de enqueue(): reintenta run() y nunca deja una excepción sin recoger."""
+    for attempt in range(SYNC_RETRIES + 1):
+        try:
+            return await run(profession_id)
+        except Exception as e:
+            if attempt == SYNC_RETRIES:
+                logger.error(
+                    f"No se pudo propagar la profesión {profession_id} tras {attempt + 1} intentos: {e} "
+                    f"(el job queda pendiente: resume_pending / --resume)"
+                )
+                return None
+            delay = SYNC_RETRY_DELAY * 2 ** attempt
+            logger.warning(f"Propagación de la profesión {profession_id} falló ({e}); reintento en {delay:g}s")
+            await asyncio.sleep(delay)
+
+
+async def resume_pending() -> int:
+    """Corre los jobs que quedaron pendientes (p. ej. el proceso se reinició). Devuelve cuántos."""
+    pending = await jobs_coll.find({"done": False}, {"_id": 1}).to_list()
+    for job in pending:
+        try:
+            await run(job["_id"])
+        except Exception as e:
+            logger.error(f"No se pudo propagar la profesión {job['_id']}: {e}")
+    return len(pending)
+
+
+async def status() -> dict:
+    pending = await jobs_coll.find({"done": False}, {"requested_at": 1}).to_list()
+    last = await jobs_coll.find({"done": True}, {"applied_at": 1, "lag_seconds": 1}).sort("applied_at", -1).limit(1).to_list()
+    now = datetime.utcnow()
+    return {
+        "pending": len(pending),
+        "oldest_pending_seconds": round(max(((now - j["requested_at"]).total_seconds() for j in pending), default=0.0), 3),
+        "last_lag_seconds": last[0]["lag_seconds"] if last else None,
+        "last_applied_at": last[0]["applied_at"] if last else None,
+    }
+
+
+async def backfill() -> int:
+    """Desnormaliza todos los servicios desde profession. Devuelve cuántos cambiaron."""
+    modified = 0
+    async for profession in professions_coll.find({}, {"name": 1, "active": 1}):
+        modified += await _apply(profession["_id"], denormalized(profession))
+    # Servicios cuya profesión ya no existe
+    known = await professions_coll.distinct("_id")
+    res = await services_coll.update_many(
+        {"id_profession": {"$nin": known}, "profession_name": {"$ne": None}},
+        {"$set": denormalized(None)},
+    )
+    modified += res.modified_count
+    if modified:
+        await _services_changed()
+    return modified
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nombre de profesión desnormalizado en service_offering")
+    parser.add_argument("--backfill", action="store_true", help="Recalcular profession_name/profession_active en todos los servicios")
+    parser.add_argument("--resume", action="store_true", help="Correr los jobs pendientes")
+    parser.add_argument("--status", action="store_true", help="Jobs pendientes y último lag")
+    args = parser.parse_args()
+    if args.backfill:
+        print(f"{asyncio.run(backfill())} servicios actualizados")
+    elif args.resume:
+        print(f"{asyncio.run(resume_pending())} jobs pendientes procesados")
+    elif args.status:
+        print(asyncio.run(status()))
+    else:
+        parser.error("Indica --backfill, --resume o --status")
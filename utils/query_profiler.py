@@ -0,0 +1,195 @@
+"""
+Slow-query log para aggregate/find.
+
+run_aggregate / run_find ejecutan la consulta midiendo su duración. Si supera
+SLOW_QUERY_MS (default 200; 0 desactiva):
+- se registra en el log la forma de la consulta con los literales ocultos ("?"),
+- en segundo plano se corre explain("executionStats") y se guarda en la
+  colección capped `slow_queries` (SLOW_QUERY_LOG_BYTES), marcando si algún
+  stage del plan es COLLSCAN.
+
+Para no saturar el servidor, cada consulta (por nombre) se explica como
+máximo una vez cada SLOW_QUERY_EXPLAIN_COOLDOWN segundos.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from pymongo.errors import CollectionInvalid
+
+from utils.mongodb import get_async_collection
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", 16 * 1024 * 1024))
+SLOW_QUERY_EXPLAIN_COOLDOWN = float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN", 300))
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Stages que solo llevan rutas de campo y opciones, nunca valores del usuario
+_STRUCTURAL_STAGES = {"$sort", "$unwind", "$count"}
+# Claves de $lookup que son nombres (colección, campos), no expresiones
+_LOOKUP_NAMES = {"from", "localField", "foreignField", "as"}
+
+_last_explained: dict[str, float] = {}
+_background: set[asyncio.Task] = set()
+_capped_ready = False
+
+
+# -----------------------------
+# Redacción / inspección
+# -----------------------------
+def redact(value):
+    """Reemplaza literales por "?" conservando operadores y rutas de campo ($campo)."""
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def _redact_stage(name: str, spec):
+    """
+    Solo deja rutas de campo y operadores. Las expresiones de $project, $group,
+    $addFields, ... pueden llevar constantes ($eq, $literal, $cond) y los
+    sub-pipelines de $lookup/$facet/$unionWith sus propios $match.
+    """
+    if name in _STRUCTURAL_STAGES:
+        return spec
+    if name == "$project" and isinstance(spec, dict):
+        # 0/1/true/false son inclusión/exclusión (estructura); el resto, expresiones
+        return {k: v if isinstance(v, (bool, int)) and v in (0, 1) else redact(v) for k, v in spec.items()}
+    if name == "$lookup" and isinstance(spec, dict):
+        return {
+            k: v if k in _LOOKUP_NAMES else redact_pipeline(v) if k == "pipeline" else redact(v)
+            for k, v in spec.items()
+        }
+    if name == "$facet" and isinstance(spec, dict):
+        return {k: redact_pipeline(v) for k, v in spec.items()}
+    if name == "$unionWith" and isinstance(spec, dict):
+        return {k: redact_pipeline(v) if k == "pipeline" else v for k, v in spec.items()}
+    if name == "$unionWith":
+        return spec  # solo el nombre de la colección
+    return redact(spec)
+
+
+def redact_pipeline(pipeline: list) -> list:
+    return [{name: _redact_stage(name, spec) for name, spec in stage.items()} for stage in pipeline]
+
+
+def plan_stages(explain) -> list[str]:
+    """Todos los valores "stage" del plan (recorre queryPlanner, $cursor, shards, etc.)."""
+    found = []
+    if isinstance(explain, dict):
+        if isinstance(explain.get("stage"), str):
+            found.append(explain["stage"])
+        for v in explain.values():
+            found.extend(plan_stages(v))
+    elif isinstance(explain, list):
+        for v in explain:
+            found.extend(plan_stages(v))
+    return found
+
+
+def _storable(value):
+    """Las claves con '$' inicial o '.' no se pueden guardar en todas las versiones de MongoDB."""
+    if isinstance(value, dict):
+        return {k.replace(".", "_").lstrip("$") if k.startswith("$") or "." in k else k: _storable(v)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [_storable(v) for v in value]
+    return value
+
+
+# -----------------------------
+# Captura en segundo plano
+# -----------------------------
+async def _ensure_capped():
+    global _capped_ready
+    if _capped_ready:
+        return
+    try:
+        await get_async_collection(SLOW_QUERY_COLLECTION).database.create_collection(
+            SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_BYTES
+        )
+    except CollectionInvalid:
+        pass  # ya existe
+    _capped_ready = True
+
+
+async def _capture(kind: str, coll, name: str, explain_cmd: dict, shape, duration_ms: float):
+    try:
+        explain = await coll.database.command(
+            {"explain": explain_cmd, "verbosity": "executionStats"}
+        )
+        stages = plan_stages(explain)
+        collscan = "COLLSCAN" in stages
+        if collscan:
+            logger.warning(f"[slow-query] {name}: el plan usa COLLSCAN sobre '{coll.name}'")
+        await _ensure_capped()
+        await get_async_collection(SLOW_QUERY_COLLECTION).insert_one({
+            "ts": datetime.utcnow(),
+            "name": name,
+            "kind": kind,
+            "collection": coll.name,
+            "duration_ms": round(duration_ms, 2),
+            "shape": json.dumps(shape, default=str),
+            "stages": stages,
+            "collscan": collscan,
+            "explain": _storable(explain),
+        })
+    except Exception as e:
+        logger.warning(f"[slow-query] no se pudo capturar explain de {name}: {e}")
+
+
+def _on_slow(kind: str, coll, name: str, explain_cmd: dict, shape, duration_ms: float):
+    logger.warning(f"[slow-query] {name} ({kind} {coll.name}) {duration_ms:.1f} ms: {json.dumps(shape, default=str)}")
+    now = time.monotonic()
+    if now - _last_explained.get(name, -SLOW_QUERY_EXPLAIN_COOLDOWN) < SLOW_QUERY_EXPLAIN_COOLDOWN:
+        return
+    _last_explained[name] = now
+    task = asyncio.create_task(_capture(kind, coll, name, explain_cmd, shape, duration_ms))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# -----------------------------
+# API
+# -----------------------------
+async def run_aggregate(coll, pipeline: list, *, name: str, **kwargs) -> list:
+    """aggregate(...).to_list() medido. name identifica la consulta (log, métricas y explain)."""
+    start = time.perf_counter()
+    docs = await (await coll.aggregate(pipeline, comment=name, **kwargs)).to_list()
+    duration_ms = (time.perf_counter() - start) * 1000
+    if SLOW_QUERY_MS > 0 and duration_ms >= SLOW_QUERY_MS:
+        _on_slow("aggregate", coll, name, {"aggregate": coll.name, "pipeline": pipeline, "cursor": {}},
+                 redact_pipeline(pipeline), duration_ms)
+    return docs
+
+
+async def run_find(coll, filter: dict, projection: dict | None = None, *, name: str,
+                   sort: list | None = None, limit: int = 0) -> list:
+    """find(...).to_list() medido. Mismo comportamiento de slow-log que run_aggregate."""
+    start = time.perf_counter()
+    cursor = coll.find(filter, projection, comment=name)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    docs = await cursor.to_list()
+    duration_ms = (time.perf_counter() - start) * 1000
+    if SLOW_QUERY_MS > 0 and duration_ms >= SLOW_QUERY_MS:
+        explain_cmd = {"find": coll.name, "filter": filter}
+        if projection:
+            explain_cmd["projection"] = projection
+        if sort:
+            explain_cmd["sort"] = dict(sort)
+        if limit:
+            explain_cmd["limit"] = limit
+        _on_slow("find", coll, name, explain_cmd, {"filter": redact(filter), "sort": sort, "limit": limit}, duration_ms)
+    return docs
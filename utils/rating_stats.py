@@ -0,0 +1,105 @@
+"""
+Agregados de calificaciones por service offering, materializados en
+`service_rating_stats` (un documento por servicio):
+
+    {_id: <id del servicio>, count, sum, histogram: {"0": n, ..., "5": n}}
+
+create/update/delete de reseñas los mantienen con $inc (apply_delta), en la
+misma transacción que la escritura de la reseña, así que leer el promedio de
+un servicio es una lectura por _id en vez de un $group sobre reviews. El
+promedio se calcula al leer (sum / count).
+
+Si los agregados se desincronizan (escrituras a reviews fuera de la API), se
+reconstruyen desde reviews:
+    python -m utils.rating_stats --rebuild
+La reconstrucción reemplaza la colección con $out; las reseñas que se
+escriban mientras corre pueden quedar fuera, así que conviene correrla con
+poco tráfico.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from utils.mongodb import lazy_collection
+
+STATS_COLLECTION = "service_rating_stats"
+BUCKETS = tuple(str(b) for b in range(6))
+
+stats_coll = lazy_collection(STATS_COLLECTION)
+stats_listing = lazy_collection(STATS_COLLECTION, listing=True)
+
+
+def bucket(rating: float) -> str:
+    """Estrellas redondeadas (4.5 -> "5", 4.4 -> "4")."""
+    return str(min(5, max(0, int(rating + 0.5))))
+
+
+async def apply_delta(service_id: ObjectId, rating: float, sign: int, *, session=None) -> None:
+    """Suma (sign=1) o resta (sign=-1) una reseña a los agregados de su servicio."""
+    await stats_coll.update_one(
+        {"_id": service_id},
+        {
+            "$inc": {"count": sign, "sum": sign * rating, f"histogram.{bucket(rating)}": sign},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        upsert=True,
+        session=session,
+    )
+
+
+def to_public(doc: dict | None) -> dict:
+    """Formato de respuesta: count, mean (None sin reseñas) e histograma completo."""
+    doc = doc or {}
+    count = doc.get("count", 0)
+    histogram = doc.get("histogram") or {}
+    return {
+        "count": count,
+        "mean": round(doc["sum"] / count, 2) if count > 0 else None,
+        "histogram": {b: histogram.get(b, 0) for b in BUCKETS},
+    }
+
+
+async def stats_for(service_ids: list[ObjectId], *, listing: bool = True) -> dict[ObjectId, dict]:
+    """Agregados de varios servicios con una sola consulta por _id (listing=False: del primario)."""
+    if not service_ids:
+        return {}
+    docs = await (stats_listing if listing else stats_coll).find({"_id": {"$in": service_ids}}).to_list()
+    return {doc["_id"]: doc for doc in docs}
+
+
+def rebuild_pipeline() -> list:
+    rounded = {"$min": [5, {"$max": [0, {"$toInt": {"$floor": {"$add": ["$rating", 0.5]}}}]}]}
+    return [
+        {"$match": {"id_service_offering": {"$type": "objectId"}, "rating": {"$type": "number"}}},
+        {"$group": {
+            "_id": "$id_service_offering",
+            "count": {"$sum": 1},
+            "sum": {"$sum": "$rating"},
+            **{f"h{b}": {"$sum": {"$cond": [{"$eq": [rounded, int(b)]}, 1, 0]}} for b in BUCKETS},
+        }},
+        {"$project": {
+            "count": 1,
+            "sum": 1,
+            "histogram": {b: f"$h{b}" for b in BUCKETS},
+            "updated_at": "$$NOW",
+        }},
+        {"$out": STATS_COLLECTION},
+    ]
+
+
+async def rebuild() -> int:
+    """Recalcula todos los agregados desde reviews. Devuelve cuántos servicios tienen reseñas."""
+    reviews = lazy_collection("reviews")
+    await (await reviews.aggregate(rebuild_pipeline())).to_list()
+    return await stats_coll.count_documents({})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agregados de calificaciones por servicio")
+    parser.add_argument("--rebuild", action="store_true", help="Recalcular service_rating_stats desde reviews")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("Indica --rebuild")
+    print(f"{asyncio.run(rebuild())} servicios con reseñas")
@@ -0,0 +1,80 @@
+"""
+Referencias entre colecciones guardadas como ObjectId.
+
+Los $lookup comparan tipos estrictamente: un id_profession guardado como
+string nunca coincide con el _id (ObjectId) de profession, por eso los
+pipelines hacían {"$toString": ...} en ambos lados, lo que impide usar el
+índice de _id. Con todas las referencias como ObjectId los pipelines usan
+localField/foreignField directos.
+
+- to_db / from_db convierten los campos de referencia al escribir / leer
+  (los modelos Pydantic los exponen como string hex).
+- Migración única de datos existentes:
+    python -m utils.references --dry-run   # cuenta cuántos quedan como string
+    python -m utils.references             # los convierte a ObjectId
+"""
+import argparse
+import asyncio
+
+from bson import ObjectId
+
+from utils.mongodb import get_async_collection
+
+# colección -> campos que referencian el _id de otra colección
+REFERENCE_FIELDS: dict[str, tuple[str, ...]] = {
+    "service_offering": ("id_profession", "created_by"),
+    "reservations": ("id_user",),
+    "reservation_service": ("id_reservation", "id_service_offering"),
+    "reviews": ("id_usuario", "id_service_offering"),
+    "service_review": ("id_service", "id_reservation", "id_review"),
+}
+
+
+def to_db(collection: str, doc: dict) -> dict:
+    """Convierte (en una copia) los campos de referencia a ObjectId cuando son hex válidos."""
+    out = dict(doc)
+    for field in REFERENCE_FIELDS.get(collection, ()):
+        value = out.get(field)
+        if isinstance(value, str) and ObjectId.is_valid(value):
+            out[field] = ObjectId(value)
+    return out
+
+
+def from_db(collection: str, doc: dict) -> dict:
+    """Inverso de to_db: deja los campos de referencia como string para los modelos."""
+    for field in REFERENCE_FIELDS.get(collection, ()):
+        if isinstance(doc.get(field), ObjectId):
+            doc[field] = str(doc[field])
+    return doc
+
+
+async def migrate(dry_run: bool = False) -> dict[str, dict[str, int]]:
+    """
+    Convierte en el servidor (un update_many por campo) los strings hex a ObjectId.
+    Los valores que no son ObjectId válidos se dejan como están ($convert onError).
+    """
+    report: dict[str, dict[str, int]] = {}
+    for col_name, fields in REFERENCE_FIELDS.items():
+        coll = get_async_collection(col_name)
+        report[col_name] = {}
+        for field in fields:
+            query = {field: {"$type": "string"}}
+            if dry_run:
+                report[col_name][field] = await coll.count_documents(query)
+                continue
+            res = await coll.update_many(query, [{"$set": {
+                field: {"$convert": {"input": f"${field}", "to": "objectId", "onError": f"${field}"}}
+            }}])
+            report[col_name][field] = res.modified_count
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normaliza las referencias entre colecciones a ObjectId")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar los documentos con referencias string")
+    args = parser.parse_args()
+
+    label = "como string" if args.dry_run else "convertidos"
+    for col_name, fields in asyncio.run(migrate(dry_run=args.dry_run)).items():
+        for field, n in fields.items():
+            print(f"{col_name}.{field}: {n} {label}")
@@ -0,0 +1,107 @@
+"""
+Búsqueda por tokens normalizados (profesiones y service offerings).
+
+Cada documento guarda en `search_tokens` las palabras de su texto en minúsculas
+y sin acentos ("Reparación de PC" -> ["de", "pc", "reparacion"]), con un índice
+multikey (ver utils/indexes.py). Las consultas:
+- tokens exactos: {"search_tokens": {"$all": [...]}}
+- autocompletado: {"search_tokens": {"$regex": "^plom"}} con el término
+  escapado; un regex anclado al inicio recorre solo el rango del índice.
+Nunca se ejecuta un regex armado con texto del usuario sin escapar ni sin ancla,
+y cada consulta lleva límite, así que la latencia depende del límite y no del
+tamaño de la colección.
+
+Documentos existentes (antes de este campo):
+    python -m utils.search            # agrega search_tokens a los que no lo tienen
+    python -m utils.search --all      # los recalcula todos
+"""
+import argparse
+import asyncio
+import re
+import unicodedata
+
+from pymongo import UpdateOne
+
+SEARCH_MAX_TERMS = 5      # palabras de la consulta que se usan
+SEARCH_MAX_TOKENS = 64    # palabras indexadas por documento
+
+# colección -> campo de texto del que salen los tokens
+SEARCH_FIELDS = {
+    "profession": "name",
+    "service_offering": "description",
+}
+
+_WORD = re.compile(r"[a-z0-9ñ]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos (la ñ se conserva: "año" != "ano")."""
+    text = text.casefold().replace("ñ", "\0")
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return text.replace("\0", "ñ")
+
+
+def tokenize(text: str | None) -> list[str]:
+    return _WORD.findall(normalize(text or ""))
+
+
+def search_tokens(text: str | None) -> list[str]:
+    """Valor del campo search_tokens para un texto."""
+    return sorted(set(tokenize(text)))[:SEARCH_MAX_TOKENS]
+
+
+def query_terms(q: str) -> list[str]:
+    """Palabras de la consulta (sin repetir, en orden) que se usan para buscar."""
+    return list(dict.fromkeys(tokenize(q)))[:SEARCH_MAX_TERMS]
+
+
+def exact_filter(terms: list[str]) -> dict:
+    return {"search_tokens": {"$all": terms}}
+
+
+def prefix_filter(terms: list[str]) -> dict:
+    return {"$and": [{"search_tokens": {"$regex": "^" + re.escape(t)}} for t in terms]}
+
+
+def score(doc_tokens: list[str], terms: list[str]) -> float:
+    """Relevancia 0..1: 1 por palabra exacta, 0.5 por coincidencia de prefijo."""
+    if not terms:
+        return 0.0
+    tokens = set(doc_tokens or ())
+    total = 0.0
+    for term in terms:
+        if term in tokens:
+            total += 1.0
+        elif any(t.startswith(term) for t in tokens):
+            total += 0.5
+    return round(total / len(terms), 4)
+
+
+async def backfill(all_docs: bool = False, batch_size: int = 1000) -> dict[str, int]:
+    """Calcula search_tokens en los documentos existentes. Devuelve cuántos se actualizaron."""
+    # Import diferido: los pipelines importan este módulo y utils.mongodb exige el entorno
+    from utils.mongodb import get_async_collection
+
+    report = {}
+    for col_name, field in SEARCH_FIELDS.items():
+        coll = get_async_collection(col_name)
+        query = {} if all_docs else {"search_tokens": {"$exists": False}}
+        updated = 0
+        ops = []
+        async for doc in coll.find(query, {field: 1}):
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": search_tokens(doc.get(field))}}))
+            if len(ops) == batch_size:
+                updated += (await coll.bulk_write(ops, ordered=False)).modified_count
+                ops = []
+        if ops:
+            updated += (await coll.bulk_write(ops, ordered=False)).modified_count
+        report[col_name] = updated
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula search_tokens en profession y service_offering")
+    parser.add_argument("--all", action="store_true", help="Recalcular también los que ya tienen search_tokens")
+    args = parser.parse_args()
+    for col_name, n in asyncio.run(backfill(all_docs=args.all)).items():
+        print(f"{col_name}: {n} documentos actualizados")
@@ -1,13 +1,20 @@
 import os
 import jwt
+import time
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Request
-from functools import wraps
 from dotenv import load_dotenv
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")  # asegúrate que exista
 
+# Caché LRU de tokens ya verificados: sha256(token) -> payload.
+# Cada entrada vence en el "exp" del propio token.
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10_000))
+_token_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+
 # -------------------------
 # Crear JWT
 # -------------------------
@@ -39,17 +46,6 @@ def create_jwt_token(
 # -------------------------
 # Helpers internos
 # -------------------------
-def _get_request_from_args_kwargs(*args, **kwargs) -> Request:
-    req = kwargs.get("request")
-    if req is None:
-        for a in args:
-            if isinstance(a, Request):
-                req = a
-                break
-    if req is None:
-        raise HTTPException(status_code=400, detail="Request object not found")
-    return req
-
 def _extract_bearer_token(req: Request) -> str:
     auth = req.headers.get("Authorization")
     if not auth:
@@ -70,6 +66,23 @@ def _decode_token(token: str) -> dict:
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
 
+def _decode_token_cached(token: str) -> dict:
+    """Igual que _decode_token, pero evita repetir la verificación HMAC de un token ya visto."""
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            _token_cache.move_to_end(key)
+            return payload
+        del _token_cache[key]
+
+    payload = _decode_token(token)  # lanza 401 si es inválido o expiró
+    if JWT_CACHE_SIZE > 0 and payload.get("exp"):
+        _token_cache[key] = payload
+        if len(_token_cache) > JWT_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
 def _attach_user_to_request(req: Request, payload: dict) -> None:
     # 🔹 Compatibilidad con controladores que esperan request.state.user
     req.state.user = payload
@@ -84,38 +97,29 @@ def _attach_user_to_request(req: Request, payload: dict) -> None:
     req.state.active = bool(payload.get("active", False))
 
 # -------------------------
-# Decoradores públicos
+# Dependencias públicas
+# Uso: @router.get(..., dependencies=[Depends(validateuser)])
 # -------------------------
-def validateuser(func):
+async def validateuser(request: Request) -> dict:
     """Requiere: token válido + usuario activo."""
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        req = _get_request_from_args_kwargs(*args, **kwargs)
-        token = _extract_bearer_token(req)
-        payload = _decode_token(token)
+    payload = _decode_token_cached(_extract_bearer_token(request))
 
-        if not payload.get("active"):
-            raise HTTPException(status_code=401, detail="Inactive user")
+    if not payload.get("active"):
+        raise HTTPException(status_code=401, detail="Inactive user")
 
-        _attach_user_to_request(req, payload)
-        return await func(*args, **kwargs)
-    return wrapper
+    _attach_user_to_request(request, payload)
+    return payload
 
-def validateadmin(func):
+async def validateadmin(request: Request) -> dict:
     """Requiere: token válido + usuario activo + admin=True."""
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        req = _get_request_from_args_kwargs(*args, **kwargs)
-        token = _extract_bearer_token(req)
-        payload = _decode_token(token)
-
-        if not payload.get("active"):
-            raise HTTPException(status_code=401, detail="Inactive user")
-        if not payload.get("admin"):
-            raise HTTPException(status_code=403, detail="User is not admin")
-
-        _attach_user_to_request(req, payload)
-        return await func(*args, **kwargs)
-    return wrapper
+    payload = _decode_token_cached(_extract_bearer_token(request))
+
+    if not payload.get("active"):
+        raise HTTPException(status_code=401, detail="Inactive user")
+    if not payload.get("admin"):
+        raise HTTPException(status_code=403, detail="User is not admin")
+
+    _attach_user_to_request(request, payload)
+    return payload
 
 
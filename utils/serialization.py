@@ -0,0 +1,101 @@
+"""
+Camino rápido de lectura: documento de Mongo -> JSON sin pasar por Pydantic.
+
+Los endpoints de lectura armaban un modelo por documento (Reservation(**doc))
+y FastAPI lo volvía a validar contra response_model antes de serializarlo con
+jsonable_encoder: dos validaciones completas de datos que ya se validaron al
+escribirse. Con este módulo:
+
+- Projection(Model, "coleccion").fields es la proyección de find() con solo
+  los campos de la respuesta (no viajan search_tokens, created_at, etc.).
+- Projection.build(doc) arma el dict de respuesta con la misma forma que el
+  modelo (id hex, referencias como string, defaults de los campos que falten,
+  enteros como float donde el modelo declara float), sin validar.
+- fast_response(content) lo serializa con orjson (o json si no está
+  instalado). Al devolver un Response, FastAPI no valida ni re-serializa;
+  response_model queda solo para la documentación de OpenAPI.
+
+Solo para datos leídos de la base: lo que llega del cliente se sigue validando
+con los modelos. Benchmark: python -m benchmarks.serialization
+"""
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel
+
+from utils.references import REFERENCE_FIELDS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson está en requirements.txt
+    orjson = None
+
+_MISSING = object()
+
+
+def json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON compacto en UTF-8 (ObjectId como hex, datetime en ISO 8601)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default)
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Respuesta ya serializada. `response` es el Response que inyecta FastAPI
+    en la ruta: se copian los headers que le agregaron las dependencias
+    (ETag, Cache-Control), que de otro modo se pierden al devolver un Response.
+    """
+    out = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
+
+
+class Projection:
+    """Campos de `model` leídos de `collection`, sin validar (ver docstring del módulo)."""
+
+    def __init__(self, model: type[BaseModel], collection: str):
+        references = REFERENCE_FIELDS.get(collection, ())
+        # (campo, FieldInfo, tipo de conversión) en el orden del modelo
+        self._fields = [
+            (name, info, "ref" if name in references else "float" if info.annotation is float else None)
+            for name, info in model.model_fields.items()
+            if name != "id"
+        ]
+        self.fields = {name: 1 for name, _, _ in self._fields}
+
+    def build(self, doc: dict) -> dict:
+        """No modifica `doc` (puede venir de una caché compartida)."""
+        out = {"id": str(doc["_id"])}
+        for name, info, kind in self._fields:
+            value = doc.get(name, _MISSING)
+            if value is _MISSING:
+                value = None if info.is_required() else info.get_default(call_default_factory=True)
+            elif kind == "ref" and isinstance(value, ObjectId):
+                value = str(value)
+            elif kind == "float" and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+            out[name] = value
+        return out
+
+    def build_many(self, docs: list[dict]) -> list[dict]:
+        return [self.build(doc) for doc in docs]
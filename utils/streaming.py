@@ -0,0 +1,46 @@
+"""
+Exportación en streaming (NDJSON: un documento JSON por línea).
+
+El cursor de Mongo se recorre por lotes y cada lote se envía en cuanto llega,
+así que la memoria queda acotada por batch_size y el primer byte sale antes
+de que termine la consulta.
+"""
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from utils.serialization import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _serialize(doc: dict) -> dict:
+    """Mismo formato que las respuestas de la API: _id -> id (hex)."""
+    if "_id" in doc:
+        return {"id": str(doc.pop("_id")), **doc}
+    return doc
+
+
+async def ndjson_lines(coll, query: dict | None = None, *, batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Genera bloques NDJSON de hasta batch_size documentos, en orden de _id."""
+    cursor = coll.find(query or {}, batch_size=batch_size).sort("_id", 1)
+    chunk: list[bytes] = []
+    try:
+        async for doc in cursor:
+            chunk.append(dumps(_serialize(doc)))
+            if len(chunk) >= batch_size:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+    finally:
+        await cursor.close()
+
+
+def ndjson_response(lines: AsyncIterator[bytes], filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        lines,
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )